@@ -0,0 +1,262 @@
+"""
+Ajuste de Rolls (Back-Adjustment) por Diferencia o Ratio
+Versión: 1.0
+Fecha: 2025-12-06
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Calcula una tabla compacta de ajustes (una fila por contrato) a partir
+    de la tabla de rolls de construir_serie_continua.py y la aplica de forma
+    perezosa al leer los datos, sin guardar copias ajustadas del histórico.
+
+    En cada roll se mide el salto entre contratos en la última barra común
+    anterior al roll (Close entrante - Close saliente, o su cociente); los
+    rolls sin barras comunes se dejan con ajuste neutro. El ajuste de un
+    contrato es la acumulación de los saltos de todos los rolls posteriores,
+    de modo que el contrato más reciente queda sin modificar y los
+    anteriores se desplazan hacia él:
+
+        diferencia: precio_ajustado = precio + Ajuste_Diferencia
+        ratio:      precio_ajustado = precio * Ajuste_Ratio
+
+    La aplicación es vectorizada: cada fila toma el ajuste de su contrato a
+    partir de la columna Symbol (códigos categóricos, sin joins). Solo se
+    ajustan series cuya selección de contratos coincide con la tabla de
+    rolls (la serie continua de construir_serie_continua.py): si falta
+    Symbol, aparece un contrato desconocido o una fila cae fuera de la
+    ventana [Inicio, Fin) de su contrato, se rechaza el ajuste. Los
+    consolidados diarios (keep='first' por orden de archivo) no llevan
+    Symbol y no se pueden ajustar: los calculadores diarios con ajuste
+    leen en su lugar el diario de la serie continua (cargar_diario_continuo),
+    agregado por sesión CME y con el contrato de cada sesión.
+
+Archivo de ajustes:
+    ../Originales/NQ_1min_2020-2025_Ajustes.csv
+    Symbol,Inicio,Fin,Referencia,Diferencia,Ratio,Ajuste_Diferencia,Ajuste_Ratio
+
+Serie continua (construir_serie_continua.py):
+    ../Originales/NQ_1min_2020-2025_Continuo.csv
+    DateTime,Open,High,Low,Close,Volume,Symbol
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indice_sesiones import construir_indice_sesiones, resumen_por_sesion
+from lector_minutos import leer_minutos
+
+logger = logging.getLogger(__name__)
+
+AJUSTES_PATH = Path("..") / "Originales" / "NQ_1min_2020-2025_Ajustes.csv"
+CONTINUO_PATH = Path("..") / "Originales" / "NQ_1min_2020-2025_Continuo.csv"
+MODOS_AJUSTE = ('diferencia', 'ratio')
+COLUMNAS_PRECIO = ['Open', 'High', 'Low', 'Close']
+
+def calcular_tabla_ajustes(df, tabla_rolls):
+    """
+    Calcula los saltos de cada roll y el ajuste acumulado por contrato
+
+    Args:
+        df: DataFrame con DateTime, Close y Symbol de todos los contratos
+        tabla_rolls: Tabla de rolls (Symbol, Inicio, Fin, Contrato_Anterior)
+
+    Returns:
+        DataFrame con una fila por contrato en orden de vencimiento
+    """
+    tabla = tabla_rolls[['Symbol', 'Inicio', 'Fin']].copy()
+    tabla['Referencia'] = pd.NaT
+    tabla['Diferencia'] = 0.0
+    tabla['Ratio'] = 1.0
+
+    closes = {symbol: grupo[['DateTime', 'Close']] for symbol, grupo in df.groupby('Symbol')}
+
+    for i in range(1, len(tabla_rolls)):
+        roll = tabla_rolls.iloc[i]
+        saliente = closes[roll['Contrato_Anterior']]
+        entrante = closes[roll['Symbol']]
+
+        comunes = saliente.merge(entrante, on='DateTime', suffixes=('_Sal', '_Ent'))
+
+        if len(comunes) == 0:
+            logger.warning(
+                f"⚠️  {roll['Contrato_Anterior']} -> {roll['Symbol']}: sin barras comunes, "
+                f"salto no medible (ajuste neutro)"
+            )
+            continue
+
+        # Última barra común antes del roll o, si no la hay, la primera después
+        anteriores = comunes[comunes['DateTime'] < roll['Inicio']]
+        if len(anteriores) > 0:
+            referencia = anteriores.loc[anteriores['DateTime'].idxmax()]
+        else:
+            referencia = comunes.loc[comunes['DateTime'].idxmin()]
+        tabla.loc[tabla.index[i], 'Referencia'] = referencia['DateTime']
+        tabla.loc[tabla.index[i], 'Diferencia'] = referencia['Close_Ent'] - referencia['Close_Sal']
+        tabla.loc[tabla.index[i], 'Ratio'] = referencia['Close_Ent'] / referencia['Close_Sal']
+
+    # Ajuste de un contrato = acumulado de los saltos de los rolls posteriores
+    diferencias = tabla['Diferencia'].to_numpy()
+    ratios = tabla['Ratio'].to_numpy()
+    tabla['Ajuste_Diferencia'] = np.append(np.cumsum(diferencias[::-1])[::-1][1:], 0.0)
+    tabla['Ajuste_Ratio'] = np.append(np.cumprod(ratios[::-1])[::-1][1:], 1.0)
+
+    return tabla
+
+def guardar_tabla_ajustes(tabla, ruta=AJUSTES_PATH):
+    """
+    Guarda la tabla de ajustes en CSV
+
+    Args:
+        tabla: Resultado de calcular_tabla_ajustes()
+        ruta: Ruta del archivo de salida
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    tabla.to_csv(ruta, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    logger.info(f"✅ Tabla de ajustes guardada: {ruta} ({len(tabla)} contratos)")
+
+def cargar_tabla_ajustes(ruta=AJUSTES_PATH):
+    """
+    Carga la tabla de ajustes
+
+    Args:
+        ruta: Ruta del archivo de ajustes
+
+    Returns:
+        DataFrame de ajustes o None si no existe
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        logger.warning(f"⚠️  No existe la tabla de ajustes: {ruta}")
+        return None
+
+    return pd.read_csv(ruta, parse_dates=['Inicio', 'Fin', 'Referencia'])
+
+def aplicar_ajuste(df, tabla, modo='diferencia', columna_fecha='DateTime', columnas=COLUMNAS_PRECIO):
+    """
+    Aplica el back-adjustment sobre las columnas de precio (in situ)
+
+    El contrato de cada fila se toma de su columna Symbol, y la fecha solo
+    se usa para comprobar que la fila cae en la ventana [Inicio, Fin) de ese
+    contrato, es decir, que la serie se construyó con la misma tabla de rolls.
+
+    Args:
+        df: DataFrame recién leído (minutos o diario) con columna Symbol
+        tabla: Tabla de ajustes
+        modo: 'diferencia' o 'ratio'
+        columna_fecha: Columna temporal con la que se valida la ventana
+        columnas: Columnas de precio a ajustar (las ausentes se ignoran)
+
+    Returns:
+        El mismo DataFrame con los precios ajustados
+
+    Raises:
+        ValueError: si el modo no es válido o la selección de contratos de la
+            serie no coincide con la tabla de rolls
+    """
+    if modo not in MODOS_AJUSTE:
+        raise ValueError(f"Modo de ajuste no válido: {modo} (opciones: {MODOS_AJUSTE})")
+
+    if 'Symbol' not in df.columns:
+        raise ValueError(
+            "La serie no tiene columna Symbol: no se puede comprobar qué contrato "
+            "ocupa cada fila (use la serie continua de construir_serie_continua.py)"
+        )
+
+    contrato = pd.Categorical(df['Symbol'], categories=tabla['Symbol'].tolist()).codes
+    desconocidos = contrato < 0
+    if desconocidos.any():
+        symbols = sorted(df.loc[desconocidos, 'Symbol'].astype(str).unique())
+        raise ValueError(f"Contratos sin fila en la tabla de ajustes: {', '.join(symbols)}")
+
+    # Extremos abiertos (primer Inicio, último Fin) -> mínimo/máximo de datetime64
+    inicios = tabla['Inicio'].to_numpy(dtype='datetime64[ns]').copy()
+    fines = tabla['Fin'].to_numpy(dtype='datetime64[ns]').copy()
+    inicios[np.isnat(inicios)] = np.datetime64(pd.Timestamp.min.ceil('s'), 'ns')
+    fines[np.isnat(fines)] = np.datetime64(pd.Timestamp.max.floor('s'), 'ns')
+
+    timestamps = pd.to_datetime(df[columna_fecha]).to_numpy(dtype='datetime64[ns]')
+    fuera = (timestamps < inicios[contrato]) | (timestamps >= fines[contrato])
+    if fuera.any():
+        raise ValueError(
+            f"{int(fuera.sum()):,} registros fuera de la ventana de roll de su contrato: "
+            f"la serie no se construyó con esta tabla de rolls"
+        )
+
+    columnas = [c for c in columnas if c in df.columns]
+    if modo == 'diferencia':
+        desplazamiento = tabla['Ajuste_Diferencia'].to_numpy()[contrato]
+        df[columnas] = df[columnas].to_numpy() + desplazamiento[:, None]
+    else:
+        factor = tabla['Ajuste_Ratio'].to_numpy()[contrato]
+        df[columnas] = df[columnas].to_numpy() * factor[:, None]
+
+    logger.info(f"📐 Back-adjustment '{modo}' aplicado a {len(df):,} registros "
+                f"({len(tabla)} contratos)")
+    return df
+
+def cargar_diario_continuo(ruta=CONTINUO_PATH):
+    """
+    Diario OHLCV por sesión CME de la serie continua, con su contrato
+
+    Cada sesión toma un único contrato en la serie continua (los rolls se
+    hacen en el inicio de sesión), así que el Symbol de la primera barra
+    identifica el de todo el día y la fila diaria cae en la ventana
+    [Inicio, Fin) de ese contrato en la tabla de rolls.
+
+    Args:
+        ruta: CSV de minutos de la serie continua (con columna Symbol)
+
+    Returns:
+        DataFrame con Date, Open, High, Low, Close, Volume y Symbol
+
+    Raises:
+        ValueError: si una sesión mezcla barras de dos contratos
+    """
+    ruta = Path(ruta)
+    minutos = leer_minutos(ruta, columnas=COLUMNAS_PRECIO + ['Volume', 'Symbol'])
+    indice = construir_indice_sesiones(minutos['DateTime'])
+
+    diario = resumen_por_sesion(minutos, indice)
+    diario = diario.astype({c: 'float64' for c in COLUMNAS_PRECIO})
+
+    symbols = minutos['Symbol'].to_numpy()
+    inicios = indice['Inicio'].to_numpy()
+    cambios = np.flatnonzero(symbols[1:] != symbols[:-1]) + 1
+    mixtas = ~np.isin(cambios, inicios)
+    if mixtas.any():
+        fecha = diario['Date'].iloc[np.searchsorted(inicios, cambios[mixtas][0], side='right') - 1]
+        raise ValueError(
+            f"{int(mixtas.sum())} cambios de contrato dentro de una sesión "
+            f"(primera: {fecha:%Y-%m-%d}): la serie no sigue rolls de inicio de sesión"
+        )
+    diario['Symbol'] = symbols[inicios]
+
+    logger.info(f"📅 Diario de la serie continua: {len(diario):,} sesiones de {ruta.name}")
+    return diario
+
+def cargar_diario_ajustado(modo, ruta=CONTINUO_PATH, ruta_ajustes=AJUSTES_PATH):
+    """
+    Diario de la serie continua con el back-adjustment aplicado
+
+    Args:
+        modo: 'diferencia' o 'ratio'
+        ruta: CSV de minutos de la serie continua
+        ruta_ajustes: Archivo de ajustes de la misma serie
+
+    Returns:
+        DataFrame diario (Date, OHLC, Volume, Symbol) ajustado
+
+    Raises:
+        FileNotFoundError: si falta la tabla de ajustes
+        ValueError: si la serie no coincide con la tabla de rolls
+    """
+    tabla = cargar_tabla_ajustes(ruta_ajustes)
+    if tabla is None:
+        raise FileNotFoundError(
+            f"Sin tabla de ajustes en {ruta_ajustes}: ejecute construir_serie_continua.py"
+        )
+    return aplicar_ajuste(cargar_diario_continuo(ruta), tabla, modo, columna_fecha='Date')
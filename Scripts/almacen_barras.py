@@ -0,0 +1,214 @@
+"""
+Almacén Columnar de Barras (Parquet particionado por instrumento/año/mes)
+Versión: 1.0
+Fecha: 2025-12-06
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Complementa a los CSV anuales (Procesados/YYYY/NQ_1min_YYYY.csv) con un
+    almacén Parquet comprimido (zstd) particionado al estilo Hive:
+
+        Procesados/almacen/instrument=NQ/year=2024/month=3/part-0.parquet
+
+    cargar_barras() lee el almacén:
+    - Poda de particiones: un rango de fechas se traduce a un filtro sobre
+      year/month, así que solo se abren los archivos de los meses pedidos
+    - Predicate pushdown: el filtro sobre DateTime usa las estadísticas de
+      cada row group para saltarse los que quedan fuera del rango
+    - Proyección de columnas: solo se leen las columnas solicitadas
+
+    Las columnas de barra se guardan siempre con los tipos de
+    lector_minutos.ESQUEMA_MINUTOS (float32/int32), sea cual sea el tipo
+    con el que llegan, para que todos los años tengan el mismo esquema.
+
+    El almacén se publica desde _Limpio.csv (dividir_datos_minutos_por_anio.py
+    y la republicación de vigilar_carpetas.py), que por eso se sigue
+    leyendo como CSV con lector_minutos.
+
+Uso:
+    from almacen_barras import cargar_barras
+    df = cargar_barras('2024-03-01', '2024-04-01', columnas=['Close', 'Volume'])
+"""
+
+import logging
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from lector_minutos import ESQUEMA_MINUTOS
+
+logger = logging.getLogger(__name__)
+
+ALMACEN_PATH = Path("..") / "Procesados" / "almacen"
+INSTRUMENTO_DEFECTO = 'NQ'
+COMPRESION = 'zstd'
+FILAS_POR_ROW_GROUP = 50_000
+
+ESQUEMA_PARTICION = pa.schema([
+    ('instrument', pa.string()),
+    ('year', pa.int16()),
+    ('month', pa.int8()),
+])
+_PARTICIONADO = ds.partitioning(ESQUEMA_PARTICION, flavor='hive')
+
+def escribir_almacen(df, instrumento=INSTRUMENTO_DEFECTO, anios=None, ruta=ALMACEN_PATH):
+    """
+    Escribe barras en el almacén, reemplazando los años afectados
+
+    Args:
+        df: DataFrame con DateTime y columnas de barra (OHLCV...)
+        instrumento: Nombre del instrumento (partición instrument=)
+        anios: Años a escribir (None = todos los del DataFrame); las
+            particiones de esos años se borran antes de escribir
+        ruta: Carpeta raíz del almacén
+
+    Returns:
+        Lista de años escritos
+    """
+    ruta = Path(ruta)
+    anios_df = df['DateTime'].dt.year
+    anios = sorted(int(a) for a in (anios_df.unique() if anios is None else anios))
+
+    df = df[anios_df.isin(anios)]
+    if len(df) == 0:
+        return []
+
+    # Mismo esquema con cualquier escritor: main() de la división lee con
+    # leer_minutos (float32/int32) y la vigilancia pasa el consolidado (float64/int64)
+    df = df.astype({c: t for c, t in ESQUEMA_MINUTOS.items() if c in df.columns})
+
+    # Un año se reescribe completo: no quedan meses huérfanos de una versión anterior
+    for anio in anios:
+        carpeta = ruta / f"instrument={instrumento}" / f"year={anio}"
+        if carpeta.exists():
+            shutil.rmtree(carpeta)
+
+    tabla = pa.Table.from_pandas(
+        df.assign(
+            instrument=instrumento,
+            year=df['DateTime'].dt.year.astype('int16'),
+            month=df['DateTime'].dt.month.astype('int8'),
+        ),
+        preserve_index=False
+    )
+
+    ds.write_dataset(
+        tabla,
+        ruta,
+        format='parquet',
+        partitioning=_PARTICIONADO,
+        existing_data_behavior='delete_matching',
+        file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESION),
+        max_rows_per_group=FILAS_POR_ROW_GROUP,
+        min_rows_per_group=FILAS_POR_ROW_GROUP,
+    )
+
+    logger.info(f"✅ Almacén actualizado: {ruta} ({instrumento}, años {anios}, {len(df):,} registros)")
+    return anios
+
+def _abrir_almacen(ruta=ALMACEN_PATH):
+    """Abre el almacén como dataset de Arrow (solo lee metadatos)"""
+    return ds.dataset(Path(ruta), format='parquet', partitioning=_PARTICIONADO)
+
+def _filtro_particiones(inicio, fin):
+    """
+    Filtro sobre year/month que cubre [inicio, fin)
+
+    Returns:
+        Expresión de Arrow o None si no hay límites
+    """
+    anio, mes = ds.field('year'), ds.field('month')
+    filtro = None
+
+    if inicio is not None:
+        cota = (anio > inicio.year) | ((anio == inicio.year) & (mes >= inicio.month))
+        filtro = cota
+
+    if fin is not None:
+        ultimo = fin - pd.Timedelta(1, 'ns')
+        cota = (anio < ultimo.year) | ((anio == ultimo.year) & (mes <= ultimo.month))
+        filtro = cota if filtro is None else filtro & cota
+
+    return filtro
+
+def construir_filtro(instrumento=INSTRUMENTO_DEFECTO, inicio=None, fin=None):
+    """
+    Filtro completo: instrumento, particiones del rango y DateTime
+
+    Args:
+        instrumento: Instrumento a leer
+        inicio: Fecha/hora inicial incluida (None = sin límite)
+        fin: Fecha/hora final excluida (None = sin límite)
+
+    Returns:
+        Expresión de Arrow
+    """
+    inicio = pd.Timestamp(inicio) if inicio is not None else None
+    fin = pd.Timestamp(fin) if fin is not None else None
+
+    filtro = ds.field('instrument') == instrumento
+    particiones = _filtro_particiones(inicio, fin)
+    if particiones is not None:
+        filtro = filtro & particiones
+
+    if inicio is not None:
+        filtro = filtro & (ds.field('DateTime') >= inicio.to_pydatetime())
+    if fin is not None:
+        filtro = filtro & (ds.field('DateTime') < fin.to_pydatetime())
+
+    return filtro
+
+def cargar_barras(inicio=None, fin=None, columnas=None, instrumento=INSTRUMENTO_DEFECTO, ruta=ALMACEN_PATH):
+    """
+    Carga barras del almacén con poda de particiones y proyección de columnas
+
+    Args:
+        inicio: Fecha/hora inicial incluida, p.ej. '2024-03-01' (None = desde el principio)
+        fin: Fecha/hora final excluida, p.ej. '2024-04-01' (None = hasta el final)
+        columnas: Columnas a leer además de DateTime (None = todas las de barra)
+        instrumento: Instrumento a leer
+        ruta: Carpeta raíz del almacén
+
+    Returns:
+        DataFrame ordenado por DateTime (sin columnas de partición)
+    """
+    dataset = _abrir_almacen(ruta)
+
+    if columnas is None:
+        columnas = [c for c in dataset.schema.names if c not in ESQUEMA_PARTICION.names]
+    else:
+        columnas = ['DateTime'] + [c for c in columnas if c != 'DateTime']
+
+    tabla = dataset.to_table(columns=columnas, filter=construir_filtro(instrumento, inicio, fin))
+    df = tabla.to_pandas()
+
+    if not df['DateTime'].is_monotonic_increasing:
+        df = df.sort_values('DateTime', kind='stable')
+
+    return df.reset_index(drop=True)
+
+def archivos_para_rango(inicio=None, fin=None, instrumento=INSTRUMENTO_DEFECTO, ruta=ALMACEN_PATH):
+    """
+    Archivos del almacén que se abrirían para un rango (diagnóstico de la poda)
+
+    Returns:
+        Lista de rutas de archivo
+    """
+    dataset = _abrir_almacen(ruta)
+    filtro = construir_filtro(instrumento, inicio, fin)
+    return [fragmento.path for fragmento in dataset.get_fragments(filter=filtro)]
+
+def anios_en_almacen(instrumento=INSTRUMENTO_DEFECTO, ruta=ALMACEN_PATH):
+    """
+    Años con partición en el almacén para un instrumento
+
+    Returns:
+        Conjunto de años (int)
+    """
+    carpeta = Path(ruta) / f"instrument={instrumento}"
+    if not carpeta.exists():
+        return set()
+    return {int(p.name.split('=')[1]) for p in carpeta.glob("year=*") if p.is_dir()}
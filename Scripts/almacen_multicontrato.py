@@ -0,0 +1,301 @@
+"""
+Almacén Multicontrato de Minutos (todos los contratos, no solo el front month)
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    La consolidación de minutos se queda con un único registro por DateTime
+    (drop_duplicates) y la serie continua con el contrato activo, así que los
+    estudios de roll o de estructura temporal tenían que volver a leer los
+    archivos brutos. Este almacén conserva todas las barras de todos los
+    contratos, ordenadas por contrato (vencimiento) y después por DateTime,
+    en el mismo formato binario por columnas y con la misma publicación por
+    generaciones que barras_memmap.py:
+
+        Procesados/multicontrato/NQ/actual.json        (puntero)
+        Procesados/multicontrato/NQ/g000001/cabecera.json
+        Procesados/multicontrato/NQ/g000001/DateTime.int64 ... Volume.int32
+        Procesados/multicontrato/NQ/g000001/contratos.csv
+            Symbol, Inicio, Fin (filas [Inicio, Fin)), Primera, Ultima, Barras
+
+    Cada contrato ocupa un bloque contiguo de filas. Una consulta como
+    "NQ 03-21 y NQ 06-21 durante marzo de 2021" son dos slices: el índice
+    de contratos da el bloque de cada uno y una búsqueda binaria sobre su
+    DateTime da la ventana de fechas, sin recorrer el resto del histórico.
+
+    Los contratos se nombran como en el resto del sistema ('NQ 03-21'); las
+    consultas aceptan también el código CME ('NQH1', 'NQH21').
+
+    Se publica desde construir_serie_continua.py (PUBLICAR_MULTICONTRATO),
+    que ya carga todos los contratos con su columna Symbol.
+
+Uso:
+    from almacen_multicontrato import cargar_contratos
+    df = cargar_contratos(['NQH1', 'NQM1'], '2021-03-01', '2021-04-01')
+"""
+
+import json
+import logging
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from barras_memmap import (
+    TIPOS_COLUMNA, VERSION_FORMATO, CABECERA,
+    escribir_columnas, columnas_barras, publicar_generacion, carpeta_publicada, abrir_columnas
+)
+from contratos_futuros import CODIGOS_MES, vencimiento_contrato
+from precios_tick import TAMANO_TICK, COLUMNAS_PRECIO, a_puntos
+
+logger = logging.getLogger(__name__)
+
+MULTICONTRATO_PATH = Path("..") / "Procesados" / "multicontrato"
+INSTRUMENTO_DEFECTO = 'NQ'
+ARCHIVO_CONTRATOS = 'contratos.csv'
+
+# Código CME con uno o dos dígitos de año (NQH1, NQH21)
+PATRON_CME = re.compile(r'^(?P<raiz>[A-Z]+?)(?P<mes>[HMUZ])(?P<anio>\d{1,2})$')
+
+def resolver_contrato(nombre, disponibles):
+    """
+    Traduce el nombre de un contrato a la etiqueta guardada en el almacén
+
+    Args:
+        nombre: 'NQ 03-21' o código CME 'NQH1' / 'NQH21'
+        disponibles: Etiquetas de los contratos del almacén
+
+    Returns:
+        Etiqueta 'NQ MM-AA' presente en el almacén
+
+    Raises:
+        KeyError: si el contrato no está en el almacén (o el código CME de un
+            dígito es ambiguo entre décadas)
+    """
+    if nombre in disponibles:
+        return nombre
+
+    coincidencia = PATRON_CME.match(nombre)
+    if coincidencia is None:
+        raise KeyError(f"Contrato no encontrado en el almacén: '{nombre}'")
+
+    raiz = coincidencia['raiz']
+    mes = CODIGOS_MES[coincidencia['mes']]
+    anio = int(coincidencia['anio'])
+    modulo = 10 if len(coincidencia['anio']) == 1 else 100
+
+    # Con un solo dígito de año la década se deduce de los contratos guardados
+    candidatos = [
+        symbol for symbol in disponibles
+        if symbol.startswith(f"{raiz} ")
+        and vencimiento_contrato(symbol)[1] == mes
+        and vencimiento_contrato(symbol)[0] % modulo == anio
+    ]
+    if len(candidatos) != 1:
+        motivo = "ambiguo" if candidatos else "no encontrado en el almacén"
+        raise KeyError(f"Contrato {motivo}: '{nombre}' {candidatos if candidatos else ''}".rstrip())
+    return candidatos[0]
+
+def ordenar_por_contrato(df):
+    """
+    Ordena las barras por contrato (vencimiento) y DateTime
+
+    Args:
+        df: DataFrame con DateTime, OHLCV y Symbol de varios contratos
+
+    Returns:
+        Tupla (DataFrame ordenado, índice de contratos con Symbol, Inicio,
+        Fin, Primera, Ultima y Barras)
+    """
+    contratos = sorted(df['Symbol'].unique(), key=vencimiento_contrato)
+    codigos = pd.Categorical(df['Symbol'], categories=contratos).codes
+    timestamps = df['DateTime'].to_numpy(dtype='datetime64[ns]')
+
+    # lexsort: la última clave es la principal (contrato, luego DateTime)
+    orden = np.lexsort((timestamps, codigos))
+    df = df.iloc[orden].reset_index(drop=True)
+    codigos = codigos[orden]
+
+    barras = np.bincount(codigos, minlength=len(contratos)).astype(np.int64)
+    fines = np.cumsum(barras)
+    inicios = fines - barras
+
+    timestamps = df['DateTime'].to_numpy(dtype='datetime64[ns]')
+    indice = pd.DataFrame({
+        'Symbol': contratos,
+        'Inicio': inicios,
+        'Fin': fines,
+        'Primera': timestamps[inicios],
+        'Ultima': timestamps[fines - 1],
+        'Barras': barras,
+    })
+    return df, indice
+
+def escribir_multicontrato(df, instrumento=INSTRUMENTO_DEFECTO, ruta=MULTICONTRATO_PATH):
+    """
+    Publica todas las barras de todos los contratos en formato binario
+
+    Las barras repetidas de un mismo contrato (mismo DateTime y Symbol) se
+    eliminan; las de contratos distintos se conservan todas.
+
+    Args:
+        df: DataFrame con DateTime, Open, High, Low, Close, Volume y Symbol
+        instrumento: Subcarpeta del instrumento
+        ruta: Carpeta raíz del almacén
+
+    Returns:
+        Ruta de la generación publicada
+    """
+    carpeta = Path(ruta) / instrumento
+
+    registros = len(df)
+    df = df.drop_duplicates(subset=['Symbol', 'DateTime'], keep='first')
+    if len(df) < registros:
+        logger.warning(f"⚠️  {registros - len(df):,} barras repetidas dentro de un mismo contrato eliminadas")
+
+    df, indice = ordenar_por_contrato(df)
+    columnas = columnas_barras(df)
+
+    def escribir(destino, generacion):
+        escribir_columnas(destino, columnas)
+        indice.to_csv(destino / ARCHIVO_CONTRATOS, index=False, date_format='%Y-%m-%d %H:%M:%S')
+
+        cabecera = {
+            'version': VERSION_FORMATO,
+            'instrumento': instrumento,
+            'generacion': generacion,
+            'filas': int(len(df)),
+            'contratos': int(len(indice)),
+            'orden': ['Symbol', 'DateTime'],
+            'tamano_tick': TAMANO_TICK,
+            'columnas': {c: np.dtype(t).name for c, t in TIPOS_COLUMNA.items()},
+        }
+        with open(destino / CABECERA, 'w', encoding='utf-8') as f:
+            json.dump(cabecera, f, indent=2, ensure_ascii=False)
+
+    # Los memmap ya abiertos siguen leyendo su generación
+    generacion, publicada = publicar_generacion(carpeta, escribir)
+
+    logger.info(f"✅ Almacén multicontrato publicado: {publicada} "
+                f"(generación {generacion}, {len(df):,} registros, {len(indice)} contratos)")
+    return publicada
+
+def abrir_multicontrato(instrumento=INSTRUMENTO_DEFECTO, ruta=MULTICONTRATO_PATH, columnas=None):
+    """
+    Abre el almacén multicontrato como np.memmap de solo lectura
+
+    Args:
+        instrumento: Subcarpeta del instrumento
+        ruta: Carpeta raíz del almacén
+        columnas: Columnas a abrir (None = todas)
+
+    Returns:
+        Tupla (diccionario {columna: np.memmap}, índice de contratos)
+
+    Raises:
+        FileNotFoundError: si el instrumento no está publicado
+    """
+    # Columnas e índice de contratos de la misma generación
+    carpeta = carpeta_publicada(Path(ruta) / instrumento)
+    if carpeta is None:
+        raise FileNotFoundError(f"No hay almacén multicontrato publicado en {Path(ruta) / instrumento}")
+    _, barras = abrir_columnas(carpeta, columnas)
+
+    indice = pd.read_csv(carpeta / ARCHIVO_CONTRATOS, parse_dates=['Primera', 'Ultima'])
+    return barras, indice
+
+def posiciones_por_contrato(indice):
+    """
+    Diccionario de acceso O(1): contrato -> (inicio, fin)
+
+    Args:
+        indice: Índice de contratos de abrir_multicontrato()
+
+    Returns:
+        Diccionario {Symbol: (inicio, fin)}
+    """
+    return {
+        symbol: (int(inicio), int(fin))
+        for symbol, inicio, fin in zip(indice['Symbol'], indice['Inicio'], indice['Fin'])
+    }
+
+def filas_contrato(barras, posiciones, contrato, inicio=None, fin=None):
+    """
+    Filas [desde, hasta) de un contrato entre dos fechas
+
+    Args:
+        barras: Diccionario de abrir_multicontrato() (con DateTime)
+        posiciones: Resultado de posiciones_por_contrato()
+        contrato: Nombre del contrato ('NQ 03-21' o 'NQH1')
+        inicio: Fecha/hora inicial incluida (None = desde la primera barra)
+        fin: Fecha/hora final excluida (None = hasta la última barra)
+
+    Returns:
+        Tupla (desde, hasta)
+    """
+    desde, hasta = posiciones[resolver_contrato(contrato, posiciones)]
+
+    # Búsqueda binaria solo dentro del bloque del contrato
+    timestamps = barras['DateTime'][desde:hasta]
+    if inicio is not None:
+        desde_rango = desde + int(np.searchsorted(timestamps, pd.Timestamp(inicio).value, side='left'))
+    else:
+        desde_rango = desde
+    if fin is not None:
+        hasta_rango = desde + int(np.searchsorted(timestamps, pd.Timestamp(fin).value, side='left'))
+    else:
+        hasta_rango = hasta
+    return desde_rango, max(desde_rango, hasta_rango)
+
+def _ventana_a_dataframe(barras, desde, hasta):
+    """Convierte las filas [desde, hasta) a DataFrame con precios en puntos"""
+    datos = {}
+    for columna, valores in barras.items():
+        ventana = valores[desde:hasta]
+        if columna == 'DateTime':
+            datos[columna] = np.asarray(ventana).view('datetime64[ns]')
+        elif columna in COLUMNAS_PRECIO:
+            datos[columna] = a_puntos(ventana)
+        else:
+            datos[columna] = np.asarray(ventana, dtype=np.int64)
+    return pd.DataFrame(datos)
+
+def cargar_contratos(contratos, inicio=None, fin=None, columnas=None,
+                     instrumento=INSTRUMENTO_DEFECTO, ruta=MULTICONTRATO_PATH):
+    """
+    Barras de varios contratos en un rango de fechas (un slice por contrato)
+
+    Args:
+        contratos: Lista de contratos ('NQ 03-21' o 'NQH1'); None = todos
+        inicio: Fecha/hora inicial incluida (None = sin límite)
+        fin: Fecha/hora final excluida (None = sin límite)
+        columnas: Columnas a leer además de DateTime (None = todas)
+        instrumento: Subcarpeta del instrumento
+        ruta: Carpeta raíz del almacén
+
+    Returns:
+        DataFrame con DateTime, las columnas pedidas y Symbol, ordenado por
+        contrato (en el orden pedido) y DateTime
+    """
+    if columnas is not None:
+        columnas = ['DateTime'] + [c for c in columnas if c not in ('DateTime', 'Symbol')]
+    barras, indice = abrir_multicontrato(instrumento, ruta, columnas)
+    posiciones = posiciones_por_contrato(indice)
+
+    if contratos is None:
+        contratos = list(posiciones)
+
+    piezas = []
+    for contrato in contratos:
+        symbol = resolver_contrato(contrato, posiciones)
+        desde, hasta = filas_contrato(barras, posiciones, symbol, inicio, fin)
+        pieza = _ventana_a_dataframe(barras, desde, hasta)
+        pieza['Symbol'] = symbol
+        piezas.append(pieza)
+        logger.info(f"📊 {symbol}: {hasta - desde:,} barras")
+
+    if not piezas:
+        return _ventana_a_dataframe(barras, 0, 0).assign(Symbol=pd.Series(dtype=str))
+    return pd.concat(piezas, ignore_index=True)
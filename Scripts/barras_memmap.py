@@ -0,0 +1,450 @@
+"""
+Barras en Binario por Columnas (np.memmap)
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Guarda el histórico de minutos como un archivo binario por columna para
+    abrirlo con np.memmap sin parsear texto. Cada publicación es una
+    generación inmutable en su propia carpeta y un puntero indica cuál es
+    la vigente:
+
+        Procesados/memmap/NQ/actual.json          ({"generacion": 7, "carpeta": "g000007"})
+        Procesados/memmap/NQ/g000007/cabecera.json
+        Procesados/memmap/NQ/g000007/DateTime.int64   (ns desde 1970-01-01, hora del CSV)
+        Procesados/memmap/NQ/g000007/Open.int32       (precio en ticks: precio * 4)
+        Procesados/memmap/NQ/g000007/High.int32
+        Procesados/memmap/NQ/g000007/Low.int32
+        Procesados/memmap/NQ/g000007/Close.int32
+        Procesados/memmap/NQ/g000007/Volume.int32
+        Procesados/memmap/NQ/g000007/sesiones.csv     (índice de sesiones, indice_sesiones.py)
+        Procesados/memmap/NQ/g000007/zonas.csv        (mín/máx por chunk, zonas_chunks.py)
+
+    Abrir el histórico completo 2020-2025 cuesta milisegundos: el sistema
+    operativo carga las páginas bajo demanda y varios procesos que abren los
+    mismos archivos comparten las páginas de la caché del sistema.
+
+    Publicación (publicar_generacion(), también para almacen_multicontrato.py):
+    1. La generación nueva se escribe en gNNNNNN.tmp y se renombra a gNNNNNN
+       (el destino no existe, así que el renombrado es válido también en
+       Windows)
+    2. actual.json se sustituye con os.replace, un único paso atómico: un
+       lector ve la generación anterior completa o la nueva completa
+    3. Las generaciones antiguas se borran de forma perezosa: se conserva la
+       anterior (lectores que leyeron el puntero justo antes del cambio) y si
+       un borrado falla porque otro proceso aún tiene los archivos mapeados
+       (Windows no permite borrarlos) se reintenta en la siguiente publicación
+
+    Las carpetas publicadas antes de este formato (archivos directamente en
+    Procesados/memmap/NQ/, sin actual.json) se siguen leyendo.
+
+Uso:
+    from barras_memmap import abrir_barras_memmap, barras_a_dataframe
+    barras = abrir_barras_memmap()
+    closes = barras['Close']                  # np.memmap int32 (ticks)
+    df = barras_a_dataframe(barras, '2024-03-01', '2024-04-01')
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indice_sesiones import (
+    ARCHIVO_SESIONES, construir_indice_sesiones, guardar_indice_sesiones, cargar_indice_sesiones
+)
+from precios_tick import TAMANO_TICK, COLUMNAS_PRECIO, a_ticks, a_puntos
+from zonas_chunks import ARCHIVO_ZONAS, construir_zonas, guardar_zonas, cargar_zonas
+
+logger = logging.getLogger(__name__)
+
+MEMMAP_PATH = Path("..") / "Procesados" / "memmap"
+INSTRUMENTO_DEFECTO = 'NQ'
+CABECERA = 'cabecera.json'
+PUNTERO = 'actual.json'
+VERSION_FORMATO = 1
+# Generaciones que se conservan al publicar (la vigente y la anterior)
+GENERACIONES_CONSERVADAS = 2
+# Reintentos al sustituir el puntero (Windows rechaza el reemplazo mientras
+# otro proceso tiene el archivo abierto)
+REINTENTOS_PUNTERO = 20
+ESPERA_REINTENTO = 0.05
+
+TIPOS_COLUMNA = {
+    'DateTime': np.int64,
+    'Open': np.int32,
+    'High': np.int32,
+    'Low': np.int32,
+    'Close': np.int32,
+    'Volume': np.int32,
+}
+
+def _archivo_columna(carpeta, columna):
+    """Ruta del archivo binario de una columna (extensión = tipo)"""
+    return Path(carpeta) / f"{columna}.{np.dtype(TIPOS_COLUMNA[columna]).name}"
+
+def _a_int32(valores, columna):
+    """Convierte a int32 comprobando que no hay desbordamiento"""
+    valores = np.asarray(valores, dtype=np.int64)
+    info = np.iinfo(np.int32)
+    if len(valores) > 0 and (valores.min() < info.min or valores.max() > info.max):
+        raise ValueError(f"{columna}: valores fuera del rango de int32")
+    return valores.astype(np.int32)
+
+def escribir_columnas(carpeta, columnas, tipos=TIPOS_COLUMNA):
+    """
+    Escribe cada columna en su archivo binario (extensión = tipo)
+
+    Args:
+        carpeta: Carpeta de destino (ya creada)
+        columnas: Diccionario {columna: array}
+        tipos: Diccionario {columna: dtype}
+    """
+    for columna, valores in columnas.items():
+        np.asarray(valores).astype(tipos[columna], copy=False).tofile(_archivo_columna(carpeta, columna))
+
+def columnas_barras(df):
+    """
+    Columnas binarias de un DataFrame de barras (DateTime en ns, precios en ticks)
+
+    Args:
+        df: DataFrame con DateTime, Open, High, Low, Close y Volume
+
+    Returns:
+        Diccionario {columna: array} con los tipos de TIPOS_COLUMNA
+    """
+    columnas = {
+        'DateTime': df['DateTime'].to_numpy(dtype='datetime64[ns]').view(np.int64),
+        'Volume': _a_int32(df['Volume'].to_numpy(), 'Volume'),
+    }
+    for columna in COLUMNAS_PRECIO:
+        columnas[columna] = a_ticks(df[columna].to_numpy(), columna)
+    return columnas
+
+def _numero_generacion(nombre):
+    """Número de una carpeta 'g000007' (o 'g000007.tmp'); None si no lo es"""
+    base = nombre[:-len('.tmp')] if nombre.endswith('.tmp') else nombre
+    if len(base) > 1 and base[0] == 'g' and base[1:].isdigit():
+        return int(base[1:])
+    return None
+
+def leer_puntero(carpeta):
+    """
+    Generación vigente de una carpeta publicada
+
+    Args:
+        carpeta: Carpeta del instrumento
+
+    Returns:
+        Diccionario {'generacion', 'carpeta'} o None si no hay puntero
+    """
+    archivo = Path(carpeta) / PUNTERO
+    for intento in range(REINTENTOS_PUNTERO):
+        try:
+            with open(archivo, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except PermissionError:
+            # Windows: el puntero se está sustituyendo en este instante
+            if intento == REINTENTOS_PUNTERO - 1:
+                raise
+            time.sleep(ESPERA_REINTENTO)
+
+def carpeta_publicada(carpeta):
+    """
+    Carpeta con los archivos de la generación vigente
+
+    Args:
+        carpeta: Carpeta del instrumento
+
+    Returns:
+        Ruta de la generación vigente, la propia carpeta si se publicó con el
+        formato anterior (sin puntero) o None si no hay nada publicado
+    """
+    carpeta = Path(carpeta)
+    puntero = leer_puntero(carpeta)
+    if puntero is not None:
+        return carpeta / puntero['carpeta']
+    if (carpeta / CABECERA).exists():
+        return carpeta
+    return None
+
+def _sustituir_puntero(carpeta, puntero):
+    """Escribe el puntero en un temporal y lo sustituye de forma atómica"""
+    archivo = Path(carpeta) / PUNTERO
+    temporal = archivo.with_name(archivo.name + '.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(puntero, f, indent=2, ensure_ascii=False)
+
+    for intento in range(REINTENTOS_PUNTERO):
+        try:
+            os.replace(temporal, archivo)
+            return
+        except PermissionError:
+            # Windows: un lector tiene abierto el puntero; dura milisegundos
+            if intento == REINTENTOS_PUNTERO - 1:
+                raise
+            time.sleep(ESPERA_REINTENTO)
+
+def _borrar_generaciones_antiguas(carpeta, vigente):
+    """
+    Borra las generaciones anteriores a las conservadas, los temporales
+    huérfanos y los archivos del formato anterior a las generaciones
+
+    Un fallo de borrado (archivos aún mapeados por otro proceso en Windows)
+    no es un error: la carpeta se intenta borrar en la siguiente publicación.
+    """
+    limite = vigente - GENERACIONES_CONSERVADAS + 1
+    for entrada in Path(carpeta).iterdir():
+        numero = _numero_generacion(entrada.name)
+        if entrada.is_file():
+            # Archivos sueltos del formato anterior (todo salvo el puntero)
+            obsoleto = not entrada.name.startswith(PUNTERO)
+        else:
+            huerfano = numero is not None and entrada.name.endswith('.tmp') and numero < vigente
+            obsoleto = numero is not None and (numero < limite or huerfano)
+        if not obsoleto:
+            continue
+        try:
+            if entrada.is_dir():
+                shutil.rmtree(entrada)
+            else:
+                entrada.unlink()
+        except OSError as e:
+            logger.info(f"🕓 {entrada} aún en uso, se borrará más adelante ({str(e)})")
+
+def publicar_generacion(carpeta, escribir):
+    """
+    Publica una generación nueva de una carpeta de archivos binarios
+
+    Args:
+        carpeta: Carpeta del instrumento (contiene el puntero y las generaciones)
+        escribir: Función (carpeta_destino, generacion) -> None que escribe
+            todos los archivos de la generación
+
+    Returns:
+        Tupla (número de generación, ruta de la generación publicada)
+    """
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+
+    existentes = [_numero_generacion(e.name) for e in carpeta.iterdir()]
+    puntero = leer_puntero(carpeta)
+    if puntero is not None:
+        existentes.append(puntero['generacion'])
+    generacion = max([n for n in existentes if n is not None], default=0) + 1
+
+    nombre = f"g{generacion:06d}"
+    temporal = carpeta / f"{nombre}.tmp"
+    temporal.mkdir()
+    try:
+        escribir(temporal, generacion)
+        os.replace(temporal, carpeta / nombre)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+
+    _sustituir_puntero(carpeta, {'generacion': generacion, 'carpeta': nombre})
+    _borrar_generaciones_antiguas(carpeta, generacion)
+    return generacion, carpeta / nombre
+
+def escribir_barras_memmap(df, instrumento=INSTRUMENTO_DEFECTO, ruta=MEMMAP_PATH):
+    """
+    Publica el histórico de barras en formato binario por columnas
+
+    Args:
+        df: DataFrame con DateTime, Open, High, Low, Close y Volume
+        instrumento: Subcarpeta del instrumento
+        ruta: Carpeta raíz de los archivos binarios
+
+    Returns:
+        Ruta de la generación publicada
+    """
+    carpeta = Path(ruta) / instrumento
+
+    df = df.sort_values('DateTime', kind='stable') if not df['DateTime'].is_monotonic_increasing else df
+    columnas = columnas_barras(df)
+
+    def escribir(destino, generacion):
+        escribir_columnas(destino, columnas)
+
+        cabecera = {
+            'version': VERSION_FORMATO,
+            'instrumento': instrumento,
+            'generacion': generacion,
+            'filas': int(len(df)),
+            'tamano_tick': TAMANO_TICK,
+            'columnas': {c: np.dtype(t).name for c, t in TIPOS_COLUMNA.items()},
+            'inicio': str(df['DateTime'].iloc[0]) if len(df) > 0 else None,
+            'fin': str(df['DateTime'].iloc[-1]) if len(df) > 0 else None,
+        }
+        # Índice de sesiones en la misma generación: siempre coincide con las columnas
+        indice = construir_indice_sesiones(df['DateTime'])
+        guardar_indice_sesiones(indice, destino / ARCHIVO_SESIONES)
+        cabecera['sesiones'] = int(len(indice))
+
+        zonas = construir_zonas(columnas)
+        guardar_zonas(zonas, destino / ARCHIVO_ZONAS)
+        cabecera['chunks'] = int(len(zonas))
+
+        with open(destino / CABECERA, 'w', encoding='utf-8') as f:
+            json.dump(cabecera, f, indent=2, ensure_ascii=False)
+
+    generacion, publicada = publicar_generacion(carpeta, escribir)
+
+    logger.info(f"✅ Barras binarias publicadas: {publicada} (generación {generacion}, {len(df):,} registros)")
+    return publicada
+
+def _leer_cabecera_carpeta(carpeta):
+    """Cabecera de una generación concreta"""
+    with open(Path(carpeta) / CABECERA, encoding='utf-8') as f:
+        return json.load(f)
+
+def leer_cabecera(instrumento=INSTRUMENTO_DEFECTO, ruta=MEMMAP_PATH):
+    """
+    Lee la cabecera de la generación vigente de un instrumento
+
+    Returns:
+        Diccionario de cabecera o None si no hay barras publicadas
+    """
+    carpeta = carpeta_publicada(Path(ruta) / instrumento)
+    if carpeta is None:
+        return None
+    return _leer_cabecera_carpeta(carpeta)
+
+def abrir_columnas(carpeta, columnas=None, tipos=TIPOS_COLUMNA):
+    """
+    Abre las columnas de una generación como np.memmap de solo lectura
+
+    Args:
+        carpeta: Carpeta de la generación (ver carpeta_publicada())
+        columnas: Columnas a abrir (None = todas)
+        tipos: Diccionario {columna: dtype}
+
+    Returns:
+        Tupla (cabecera, diccionario {columna: np.memmap}) de esa generación
+
+    Raises:
+        ValueError: si la versión de formato no está soportada
+    """
+    cabecera = _leer_cabecera_carpeta(carpeta)
+    if cabecera['version'] != VERSION_FORMATO:
+        raise ValueError(f"Versión de formato no soportada: {cabecera['version']}")
+
+    filas = cabecera['filas']
+    barras = {}
+    for columna in (columnas or list(tipos)):
+        tipo = tipos[columna]
+        if filas == 0:
+            # np.memmap no admite archivos vacíos
+            barras[columna] = np.empty(0, dtype=tipo)
+        else:
+            barras[columna] = np.memmap(_archivo_columna(carpeta, columna), dtype=tipo, mode='r', shape=(filas,))
+
+    return cabecera, barras
+
+def abrir_barras_memmap(instrumento=INSTRUMENTO_DEFECTO, ruta=MEMMAP_PATH, columnas=None):
+    """
+    Abre las columnas de un instrumento como np.memmap de solo lectura
+
+    Args:
+        instrumento: Subcarpeta del instrumento
+        ruta: Carpeta raíz de los archivos binarios
+        columnas: Columnas a abrir (None = todas)
+
+    Returns:
+        Diccionario {columna: np.memmap}; DateTime en int64 (ns) y precios en ticks
+
+    Raises:
+        FileNotFoundError: si el instrumento no está publicado
+    """
+    # Cabecera y columnas de la misma generación aunque se publique otra a la vez
+    carpeta = carpeta_publicada(Path(ruta) / instrumento)
+    if carpeta is None:
+        raise FileNotFoundError(f"No hay barras binarias publicadas en {Path(ruta) / instrumento}")
+    _, barras = abrir_columnas(carpeta, columnas)
+    return barras
+
+def cargar_sesiones_memmap(instrumento=INSTRUMENTO_DEFECTO, ruta=MEMMAP_PATH):
+    """
+    Carga el índice de sesiones publicado con las barras binarias
+
+    Args:
+        instrumento: Subcarpeta del instrumento
+        ruta: Carpeta raíz de los archivos binarios
+
+    Returns:
+        DataFrame con Sesion, Inicio, Fin y Barras
+    """
+    carpeta = carpeta_publicada(Path(ruta) / instrumento)
+    archivo = (carpeta if carpeta is not None else Path(ruta) / instrumento) / ARCHIVO_SESIONES
+    if not archivo.exists():
+        raise FileNotFoundError(f"No hay índice de sesiones en {archivo}")
+    return cargar_indice_sesiones(archivo)
+
+def cargar_zonas_memmap(instrumento=INSTRUMENTO_DEFECTO, ruta=MEMMAP_PATH):
+    """
+    Carga los zone maps publicados con las barras binarias
+
+    Args:
+        instrumento: Subcarpeta del instrumento
+        ruta: Carpeta raíz de los archivos binarios
+
+    Returns:
+        DataFrame de zonas (ver zonas_chunks.py)
+    """
+    carpeta = carpeta_publicada(Path(ruta) / instrumento)
+    archivo = (carpeta if carpeta is not None else Path(ruta) / instrumento) / ARCHIVO_ZONAS
+    if not archivo.exists():
+        raise FileNotFoundError(f"No hay zone maps en {archivo}")
+    return cargar_zonas(archivo)
+
+def rango_filas(barras, inicio=None, fin=None):
+    """
+    Filas [desde, hasta) de las barras entre dos fechas (búsqueda binaria)
+
+    Args:
+        barras: Resultado de abrir_barras_memmap() (con DateTime)
+        inicio: Fecha/hora inicial incluida (None = desde el principio)
+        fin: Fecha/hora final excluida (None = hasta el final)
+
+    Returns:
+        Tupla (desde, hasta)
+    """
+    timestamps = barras['DateTime']
+    desde = 0 if inicio is None else int(np.searchsorted(timestamps, pd.Timestamp(inicio).value, side='left'))
+    hasta = len(timestamps) if fin is None else int(np.searchsorted(timestamps, pd.Timestamp(fin).value, side='left'))
+    return desde, max(desde, hasta)
+
+def barras_a_dataframe(barras, inicio=None, fin=None):
+    """
+    Convierte (una ventana de) las barras binarias a DataFrame con precios en puntos
+
+    Args:
+        barras: Resultado de abrir_barras_memmap()
+        inicio: Fecha/hora inicial incluida (None = desde el principio)
+        fin: Fecha/hora final excluida (None = hasta el final)
+
+    Returns:
+        DataFrame con las mismas columnas que el consolidado limpio
+    """
+    desde, hasta = rango_filas(barras, inicio, fin)
+
+    datos = {}
+    for columna, valores in barras.items():
+        ventana = valores[desde:hasta]
+        if columna == 'DateTime':
+            datos[columna] = np.asarray(ventana).view('datetime64[ns]')
+        elif columna in COLUMNAS_PRECIO:
+            datos[columna] = a_puntos(ventana)
+        else:
+            datos[columna] = np.asarray(ventana, dtype=np.int64)
+
+    return pd.DataFrame(datos)
@@ -0,0 +1,206 @@
+"""
+Caché Direccionada por Contenido para Artefactos Derivados
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Los archivos derivados (Niveles_Diarios.csv/.xlsx,
+    Datos_Diarios_DN_Niveles.xlsx, Datos_2025_EM*_Niveles.*) se guardan en
+    una caché local identificada por la huella de todo lo que los determina:
+
+        clave = SHA-256( contenido de los archivos de entrada
+                       + código de los scripts que los calculan
+                       + parámetros (lookback, RANGE_MULTIPLIER, ...) )
+
+        ../Cache/artefactos/<artefacto>/<clave[:16]>/
+            Niveles_Diarios.csv
+            Niveles_Diarios.xlsx
+            artefacto.json          (clave, parámetros, entradas, fecha)
+
+    - Si la clave ya está en caché, los archivos se copian a su ruta de
+      salida y el cálculo no se ejecuta
+    - Cada combinación de parámetros (p.ej. EM9 y EM21) tiene su propia
+      carpeta, así que los resultados conviven en la caché aunque la ruta
+      de salida sea la misma
+    - La entrada se guarda en una carpeta temporal que se renombra al
+      final: una ejecución interrumpida nunca deja una entrada a medias
+
+    Los hashes de entradas se recuerdan por (tamaño, mtime) en
+    ../Cache/artefactos/huellas.json para no releer archivos grandes.
+
+Uso:
+    from cache_artefactos import ejecutar_con_cache
+    ejecutar_con_cache('niveles_diarios', entradas=[DATA_PATH],
+                       salidas=[OUTPUT_CSV], generar=calcular_y_exportar,
+                       parametros={'lookback': 21}, codigo=[__file__])
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from manifiesto_datos import calcular_hash_archivo
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = Path("..") / "Cache" / "artefactos"
+ARCHIVO_METADATOS = 'artefacto.json'
+ARCHIVO_HUELLAS = 'huellas.json'
+VERSION_CACHE = 1
+
+# False = ejecutar siempre el cálculo (la caché no se lee ni se escribe)
+CACHE_ACTIVADA = True
+
+def cargar_huellas(ruta):
+    """Carga los hashes recordados de archivos de entrada"""
+    archivo = Path(ruta) / ARCHIVO_HUELLAS
+    if not archivo.exists():
+        return {}
+    try:
+        with open(archivo, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def guardar_huellas(huellas, ruta):
+    """Guarda los hashes recordados de forma atómica"""
+    archivo = Path(ruta) / ARCHIVO_HUELLAS
+    archivo.parent.mkdir(parents=True, exist_ok=True)
+    temporal = archivo.with_suffix(archivo.suffix + '.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(huellas, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, archivo)
+
+def hash_archivo(filepath, huellas=None):
+    """
+    Hash SHA-256 de un archivo, reutilizando el recordado si no ha cambiado
+
+    Args:
+        filepath: Ruta del archivo
+        huellas: Diccionario {ruta: {tamano, mtime, hash}} (se actualiza)
+
+    Returns:
+        Hash en hexadecimal
+    """
+    filepath = Path(filepath)
+    stat = filepath.stat()
+    clave = str(filepath.resolve())
+
+    if huellas is not None:
+        previa = huellas.get(clave)
+        if previa and previa['tamano'] == stat.st_size and previa['mtime'] == stat.st_mtime:
+            return previa['hash']
+
+    valor = calcular_hash_archivo(filepath)
+    if huellas is not None:
+        huellas[clave] = {'tamano': stat.st_size, 'mtime': stat.st_mtime, 'hash': valor}
+    return valor
+
+def calcular_clave(entradas=(), parametros=None, codigo=(), huellas=None):
+    """
+    Huella de un artefacto: entradas + código + parámetros
+
+    Args:
+        entradas: Rutas de los archivos de datos de entrada
+        parametros: Diccionario de parámetros (serializable en JSON)
+        codigo: Rutas de los scripts/módulos que determinan el resultado
+        huellas: Hashes recordados (ver hash_archivo)
+
+    Returns:
+        Clave SHA-256 en hexadecimal
+    """
+    sha = hashlib.sha256()
+    sha.update(f"version={VERSION_CACHE}\n".encode())
+
+    for etiqueta, rutas in (('entrada', entradas), ('codigo', codigo)):
+        for ruta in rutas:
+            ruta = Path(ruta)
+            contenido = hash_archivo(ruta, huellas) if ruta.exists() else 'ausente'
+            sha.update(f"{etiqueta}:{ruta.name}:{contenido}\n".encode())
+
+    sha.update(json.dumps(parametros or {}, sort_keys=True, default=str).encode())
+    return sha.hexdigest()
+
+def carpeta_artefacto(nombre, clave, ruta=CACHE_PATH):
+    """Carpeta de la caché de una versión concreta de un artefacto"""
+    return Path(ruta) / nombre / clave[:16]
+
+def _completa(carpeta, salidas):
+    """La entrada de caché existe y contiene todos los archivos de salida"""
+    return (carpeta / ARCHIVO_METADATOS).exists() and all((carpeta / Path(s).name).exists() for s in salidas)
+
+def ejecutar_con_cache(nombre, entradas, salidas, generar, parametros=None, codigo=(),
+                       ruta=CACHE_PATH, activada=None):
+    """
+    Publica un artefacto desde la caché o lo genera y lo guarda en ella
+
+    Args:
+        nombre: Nombre del artefacto (subcarpeta de la caché)
+        entradas: Rutas de los archivos de entrada
+        salidas: Rutas de los archivos que escribe `generar`
+        generar: Función sin argumentos que calcula y escribe las salidas
+        parametros: Diccionario de parámetros que afectan al resultado
+        codigo: Rutas de los scripts que determinan el resultado
+        ruta: Carpeta raíz de la caché
+        activada: Forzar el uso de la caché (None = CACHE_ACTIVADA)
+
+    Returns:
+        True si se sirvió desde la caché, False si se generó
+    """
+    activada = CACHE_ACTIVADA if activada is None else activada
+    if not activada:
+        generar()
+        return False
+
+    salidas = [Path(s) for s in salidas]
+    nombres = [s.name for s in salidas]
+    if len(set(nombres)) != len(nombres):
+        raise ValueError(f"Las salidas de '{nombre}' deben tener nombres de archivo distintos: {nombres}")
+
+    huellas = cargar_huellas(ruta)
+    clave = calcular_clave(entradas, parametros, codigo, huellas)
+    carpeta = carpeta_artefacto(nombre, clave, ruta)
+
+    if _completa(carpeta, salidas):
+        for salida in salidas:
+            salida.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(carpeta / salida.name, salida)
+        guardar_huellas(huellas, ruta)
+        logger.info(f"✅ Caché: '{nombre}' sin cambios ({clave[:16]}), publicado sin recalcular")
+        return True
+
+    logger.info(f"📂 Caché: '{nombre}' no encontrado ({clave[:16]}), calculando...")
+    generar()
+
+    temporal = carpeta.with_name(carpeta.name + '.tmp')
+    if temporal.exists():
+        shutil.rmtree(temporal)
+    temporal.mkdir(parents=True)
+
+    for salida in salidas:
+        shutil.copy2(salida, temporal / salida.name)
+
+    metadatos = {
+        'artefacto': nombre,
+        'clave': clave,
+        'parametros': parametros or {},
+        'entradas': [str(e) for e in entradas],
+        'codigo': [Path(c).name for c in codigo],
+        'salidas': nombres,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(temporal / ARCHIVO_METADATOS, 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, indent=2, ensure_ascii=False, default=str)
+
+    if carpeta.exists():
+        shutil.rmtree(carpeta)
+    os.replace(temporal, carpeta)
+
+    guardar_huellas(huellas, ruta)
+    logger.info(f"✅ Caché: '{nombre}' guardado en {carpeta}")
+    return False
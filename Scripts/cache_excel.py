@@ -0,0 +1,235 @@
+"""
+Caché de Lectura Excel -> Columnar (Parquet)
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Leer un .xlsx con openpyxl es más lento que los cálculos que se hacen
+    después. Esta capa convierte cada hoja a Parquet la primera vez que se
+    lee y sirve las lecturas siguientes desde ese archivo:
+
+        ../Cache/excel/<libro>_<hash[:16]>/
+            libro.json       (origen, hash, nombres y orden de las hojas)
+            hoja_000.parquet (una por hoja ya leída)
+
+    - La clave es el hash SHA-256 del libro: si el .xlsx cambia, la caché
+      anterior se descarta y las hojas se vuelven a convertir
+    - Las hojas se convierten bajo demanda (solo las que se leen)
+    - Las hojas que Parquet no puede representar tal cual (columnas con
+      tipos mezclados, nombres de columna no textuales) se guardan con
+      pickle para que la lectura siga siendo idéntica a read_excel
+
+    Cubre los libros de Fase1 (Datos_Diarios_por_Año.xlsx,
+    Datos_Diarios_DN_Niveles.xlsx, Datos_2025_EM*.xlsx) y los libros fuente
+    de datos brutos (nq10años.xlsx, nq2020.xlsx, nq2022.xlsx). Ejecutado
+    como script, precalienta la caché de los libros fuente.
+
+Uso:
+    from cache_excel import leer_hoja_excel, leer_hojas_excel
+    df = leer_hoja_excel(ruta, 'Datos_Completos')
+    hojas = leer_hojas_excel(ruta)          # {nombre: DataFrame}
+"""
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cache_artefactos import hash_archivo, cargar_huellas, guardar_huellas
+
+logger = logging.getLogger(__name__)
+
+CACHE_EXCEL_PATH = Path("..") / "Cache" / "excel"
+ARCHIVO_LIBRO = 'libro.json'
+
+# Libros fuente grandes (se precalientan al ejecutar el módulo como script)
+LIBROS_FUENTE = [
+    Path("..") / "datos brutos" / "varios" / "nq10años.xlsx",
+    Path("..") / "datos brutos" / "base de datos a corregir" / "nq2020.xlsx",
+    Path("..") / "datos brutos" / "base de datos a corregir" / "nq2022.xlsx",
+]
+
+def _carpeta_libro(ruta_libro, cache, huellas):
+    """
+    Carpeta de caché del libro (la crea y limpia versiones anteriores)
+
+    Returns:
+        Tupla (carpeta, metadatos del libro)
+    """
+    ruta_libro = Path(ruta_libro)
+    huella = hash_archivo(ruta_libro, huellas)
+    carpeta = Path(cache) / f"{ruta_libro.stem}_{huella[:16]}"
+
+    archivo_meta = carpeta / ARCHIVO_LIBRO
+    if archivo_meta.exists():
+        with open(archivo_meta, encoding='utf-8') as f:
+            return carpeta, json.load(f)
+
+    # Versiones anteriores del mismo libro: ya no sirven
+    origen = str(ruta_libro.resolve())
+    for anterior in Path(cache).glob(f"{ruta_libro.stem}_*"):
+        meta_anterior = anterior / ARCHIVO_LIBRO
+        if anterior != carpeta and meta_anterior.exists():
+            with open(meta_anterior, encoding='utf-8') as f:
+                if json.load(f).get('origen') == origen:
+                    shutil.rmtree(anterior)
+
+    with pd.ExcelFile(ruta_libro) as libro:
+        hojas = list(libro.sheet_names)
+
+    meta = {'origen': origen, 'hash': huella, 'hojas': hojas, 'formatos': {}}
+    carpeta.mkdir(parents=True, exist_ok=True)
+    _guardar_meta(carpeta, meta)
+    return carpeta, meta
+
+def _guardar_meta(carpeta, meta):
+    """Guarda libro.json de forma atómica"""
+    archivo = carpeta / ARCHIVO_LIBRO
+    temporal = archivo.with_suffix('.json.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, archivo)
+
+def _archivo_hoja(carpeta, indice, formato):
+    """Archivo de una hoja convertida"""
+    return carpeta / f"hoja_{indice:03d}.{formato}"
+
+def _guardar_hoja(df, carpeta, indice):
+    """
+    Guarda una hoja en Parquet o, si no es representable, con pickle
+
+    Returns:
+        Formato usado ('parquet' o 'pkl')
+    """
+    try:
+        if not all(isinstance(c, str) for c in df.columns):
+            raise ValueError("nombres de columna no textuales")
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        if not tabla.to_pandas().equals(df.reset_index(drop=True)):
+            raise ValueError("la conversión no es idéntica")
+        formato = 'parquet'
+        destino = _archivo_hoja(carpeta, indice, formato)
+        temporal = destino.with_suffix('.tmp')
+        pq.write_table(tabla, temporal)
+    except (pa.ArrowException, ValueError, TypeError) as e:
+        logger.info(f"📂 Hoja {indice} guardada con pickle ({e})")
+        formato = 'pkl'
+        destino = _archivo_hoja(carpeta, indice, formato)
+        temporal = destino.with_suffix('.tmp')
+        df.to_pickle(temporal)
+
+    os.replace(temporal, destino)
+    return formato
+
+def _leer_hoja_cache(carpeta, indice, formato):
+    """Lee una hoja ya convertida"""
+    archivo = _archivo_hoja(carpeta, indice, formato)
+    if formato == 'parquet':
+        return pd.read_parquet(archivo)
+    return pd.read_pickle(archivo)
+
+def leer_hojas_excel(ruta_libro, hojas=None, cache=CACHE_EXCEL_PATH):
+    """
+    Lee hojas de un libro Excel a través de la caché columnar
+
+    Args:
+        ruta_libro: Ruta del .xlsx
+        hojas: Lista de nombres o índices de hoja (None = todas, en orden)
+        cache: Carpeta raíz de la caché
+
+    Returns:
+        Diccionario {nombre de hoja: DataFrame} en el orden del libro
+        (o en el orden pedido)
+    """
+    huellas = cargar_huellas(cache)
+    carpeta, meta = _carpeta_libro(ruta_libro, cache, huellas)
+    guardar_huellas(huellas, cache)
+
+    nombres = meta['hojas']
+    if hojas is None:
+        pedidas = nombres
+    else:
+        pedidas = [nombres[h] if isinstance(h, int) else h for h in hojas]
+        desconocidas = [h for h in pedidas if h not in nombres]
+        if desconocidas:
+            raise ValueError(f"Hojas no encontradas en {Path(ruta_libro).name}: {desconocidas}")
+
+    resultado = {}
+    pendientes = []
+    for nombre in pedidas:
+        indice = nombres.index(nombre)
+        formato = meta['formatos'].get(nombre)
+        if formato is not None and _archivo_hoja(carpeta, indice, formato).exists():
+            resultado[nombre] = _leer_hoja_cache(carpeta, indice, formato)
+        else:
+            pendientes.append(nombre)
+
+    if pendientes:
+        logger.info(f"📂 Convirtiendo {len(pendientes)} hoja(s) de {Path(ruta_libro).name} a columnar...")
+        with pd.ExcelFile(ruta_libro) as libro:
+            for nombre in pendientes:
+                df = pd.read_excel(libro, nombre)
+                meta['formatos'][nombre] = _guardar_hoja(df, carpeta, nombres.index(nombre))
+                resultado[nombre] = df
+        _guardar_meta(carpeta, meta)
+
+    return {nombre: resultado[nombre] for nombre in pedidas}
+
+def leer_hoja_excel(ruta_libro, hoja=0, cache=CACHE_EXCEL_PATH):
+    """
+    Lee una hoja de un libro Excel a través de la caché columnar
+
+    Args:
+        ruta_libro: Ruta del .xlsx
+        hoja: Nombre o índice de la hoja (por defecto la primera, como read_excel)
+        cache: Carpeta raíz de la caché
+
+    Returns:
+        DataFrame de la hoja
+    """
+    return next(iter(leer_hojas_excel(ruta_libro, [hoja], cache).values()))
+
+def nombres_hojas(ruta_libro, cache=CACHE_EXCEL_PATH):
+    """
+    Nombres de las hojas de un libro (sin abrirlo si ya está en caché)
+
+    Returns:
+        Lista de nombres en el orden del libro
+    """
+    huellas = cargar_huellas(cache)
+    _, meta = _carpeta_libro(ruta_libro, cache, huellas)
+    guardar_huellas(huellas, cache)
+    return list(meta['hojas'])
+
+def main():
+    """
+    Precalienta la caché con todas las hojas de los libros fuente
+    """
+    logger.info("="*80)
+    logger.info("PRECALENTANDO CACHÉ EXCEL -> COLUMNAR")
+    logger.info("="*80)
+
+    for libro in LIBROS_FUENTE:
+        if not libro.exists():
+            logger.warning(f"⚠️  No existe: {libro}")
+            continue
+        hojas = leer_hojas_excel(libro)
+        registros = sum(len(df) for df in hojas.values())
+        logger.info(f"✅ {libro.name}: {len(hojas)} hoja(s), {registros:,} registros")
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('../Logs/cache_excel.log'),
+            logging.StreamHandler()
+        ]
+    )
+    main()
@@ -9,6 +9,12 @@ import numpy as np
 from pathlib import Path
 import logging
 
+from ajuste_rolls import cargar_diario_ajustado, AJUSTES_PATH, CONTINUO_PATH
+from cache_artefactos import ejecutar_con_cache
+from cache_excel import leer_hojas_excel
+from precios_tick import COLUMNAS_PRECIO, convertir_a_ticks, convertir_a_puntos
+from registro_niveles import aplicar_familias, familia_dn_ventana, columnas_salida
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -24,129 +30,113 @@ logger = logging.getLogger(__name__)
 INPUT_FILE = Path("c:/Users/oscar/Documents/Proyecto-Trading/Github/NQ_Backtest/Resultados/Fase1/Datos_Diarios_por_Año.xlsx")
 OUTPUT_FILE = Path("c:/Users/oscar/Documents/Proyecto-Trading/Github/NQ_Backtest/Resultados/Fase1/Datos_Diarios_DN_Niveles.xlsx")
 
+# Back-adjustment de rolls al cargar: None (sin ajuste), 'diferencia' o 'ratio'
+# El consolidado diario elige contrato por orden de archivo y no lleva Symbol;
+# con ajuste se usa el diario por sesión de la serie continua (Continuo.csv +
+# Ajustes.csv de construir_serie_continua.py, ver ajuste_rolls)
+MODO_AJUSTE = None
+
+# Cargar OHLC como ticks int32 (precio * 4) y calcular los niveles en ticks;
+# las fórmulas DN son lineales (sin redondeo), así que al volver a puntos
+# antes de las estadísticas los resultados son idénticos
+PRECIOS_EN_TICKS = False
+
+# Ventanas (en días) del motor N días: cada una añade un bloque de columnas
+# con sufijo _<N>D. La de 3 días alimenta las hojas 3D del Excel; se pueden
+# añadir otras, p.ej. [1, 2, 3, 5, 10, 20]
+VENTANAS_DN = [3]
+
+# Los coeficientes DN (NIVELES_DN: 0.125, 0.159, 0.25, 0.341, 0.375) están en
+# registro_niveles.py: su hash forma parte de la clave de caché junto con los
+# datos de entrada
+CODIGO_DN = [
+    Path(__file__),
+    Path(__file__).with_name('ajuste_rolls.py'),
+    Path(__file__).with_name('indice_sesiones.py'),
+    Path(__file__).with_name('lector_minutos.py'),
+    Path(__file__).with_name('registro_niveles.py'),
+    Path(__file__).with_name('precios_tick.py'),
+]
+
 def cargar_datos_diarios():
     """Carga todos los años de datos diarios"""
     logger.info("Cargando datos diarios...")
 
-    xl = pd.ExcelFile(INPUT_FILE)
-    hojas_años = [h for h in xl.sheet_names if h not in ['RESUMEN']]
+    if MODO_AJUSTE is not None:
+        # Diario por sesión de la serie continua: lleva el Symbol de cada día
+        df_completo = cargar_diario_ajustado(MODO_AJUSTE)
+    else:
+        # Lectura a través de la caché columnar (openpyxl solo si el libro cambió)
+        hojas = leer_hojas_excel(INPUT_FILE)
+        dfs = [df for hoja, df in hojas.items() if hoja not in ['RESUMEN']]
 
-    dfs = []
-    for hoja in hojas_años:
-        df = pd.read_excel(xl, hoja)
-        dfs.append(df)
+        df_completo = pd.concat(dfs, ignore_index=True)
+        df_completo['Date'] = pd.to_datetime(df_completo['Date'])
+        df_completo = df_completo.sort_values('Date').reset_index(drop=True)
 
-    df_completo = pd.concat(dfs, ignore_index=True)
-    df_completo['Date'] = pd.to_datetime(df_completo['Date'])
-    df_completo = df_completo.sort_values('Date').reset_index(drop=True)
+    if PRECIOS_EN_TICKS:
+        convertir_a_ticks(df_completo)
+        logger.info("Precios cargados en ticks int32")
 
     logger.info(f"Datos cargados: {len(df_completo)} registros de {df_completo['Date'].min()} a {df_completo['Date'].max()}")
     return df_completo
 
+def calcular_niveles_DN(df, ventanas=VENTANAS_DN):
+    """
+    Calcula los niveles DN One Day y los de N días en una sola pasada
+
+    Las familias 'dn_1d' y 'dn_<N>d' de registro_niveles.py se evalúan en
+    una única llamada sobre el grafo común (High/Low anteriores y rangos
+    compartidos se calculan una vez).
+
+    Args:
+        df: DataFrame diario con High y Low
+        ventanas: Lista de ventanas en días (ver VENTANAS_DN)
+
+    Returns:
+        DataFrame con las columnas One Day y los bloques _<N>D añadidos
+    """
+    logger.info("Calculando niveles DN...")
+
+    familias = [familia_dn_ventana(ventana) for ventana in ventanas]
+    df = aplicar_familias(df, ['dn_1d', *familias])
+
+    logger.info(f"Niveles DN One Day calculados para {max(len(df) - 1, 0)} días")
+    for ventana in ventanas:
+        logger.info(f"Niveles DN {int(ventana)} días calculados para {max(len(df) - int(ventana), 0)} días")
+    return df
+
 def calcular_niveles_DN_oneday(df):
     """
     Calcula niveles según metodología DN - One Day
     Según calculosDN.md líneas 3-27
+
+    Q1 y Q4 son el High y el Low del día anterior; las fórmulas están
+    declaradas en la familia 'dn_1d' de registro_niveles.py (el primer día
+    queda NaN).
+    """
+    return calcular_niveles_DN(df, [])
+
+def calcular_niveles_DN_ndays(df, ventanas=VENTANAS_DN):
+    """
+    Calcula niveles DN para varias ventanas de N días en una sola llamada
+
+    Cada ventana N añade un bloque de columnas con sufijo _<N>D (Q1_5D,
+    Z2H_5D, ...) con la misma disposición que el bloque _3D. Todas las
+    ventanas se evalúan en una sola pasada del registro de niveles.
+
+    Args:
+        df: DataFrame diario con High y Low
+        ventanas: Lista de ventanas en días (ver VENTANAS_DN)
+
+    Returns:
+        DataFrame con los bloques de columnas añadidos
     """
-    logger.info("Calculando niveles DN One Day...")
-
-    # Inicializar columnas
-    df['Q1'] = np.nan
-    df['Q4'] = np.nan
-    df['Range'] = np.nan
-    df['Half_Range'] = np.nan
-    df['NR2'] = np.nan
-    df['Z2H'] = np.nan
-    df['Z2L'] = np.nan
-    df['Z3H'] = np.nan
-    df['Z3L'] = np.nan
-    df['TCH'] = np.nan
-    df['TCL'] = np.nan
-    df['TVH'] = np.nan
-    df['TVL'] = np.nan
-    df['Std1'] = np.nan
-    df['Std2'] = np.nan
-    df['Std3'] = np.nan
-    df['Std4'] = np.nan
-    df['Std5'] = np.nan
-    df['Std1_neg'] = np.nan
-    df['Std2_neg'] = np.nan
-    df['Std3_neg'] = np.nan
-    df['Std4_neg'] = np.nan
-    df['Std5_neg'] = np.nan
-    df['1D_pos'] = np.nan
-    df['1D_neg'] = np.nan
-
-    # Calcular desde el segundo día (necesitamos el día anterior)
-    for i in range(1, len(df)):
-        # Q1 y Q4 del día anterior (ONE DAY)
-        Q1 = df.loc[i-1, 'High']
-        Q4 = df.loc[i-1, 'Low']
-
-        # Range
-        range_val = Q1 - Q4
-        half_range = range_val / 2
-
-        # NR2 (Nivel de Referencia 2)
-        NR2 = Q1 - half_range
-
-        # Niveles según calculosDN.md
-        Z2H = NR2 + (range_val * 0.159)
-        Z2L = NR2 + (range_val * 0.125)
-        Z3H = NR2 - (range_val * 0.125)
-        Z3L = NR2 - (range_val * 0.159)
-
-        TCH = Q1 - (range_val * 0.125)
-        TCL = Q1 - (range_val * 0.159)
-        TVH = Q4 + (range_val * 0.159)
-        TVL = Q4 + (range_val * 0.125)
-
-        # Desviaciones estándar por encima de Q1
-        Std1 = Q1 + (range_val * 0.125)
-        Std2 = Q1 + (range_val * 0.159)
-        Std3 = Q1 + (range_val * 0.25)
-        Std4 = Q1 + (range_val * 0.341)
-        Std5 = Q1 + (range_val * 0.375)
-
-        # Desviaciones estándar por debajo de Q4
-        Std1_neg = Q4 - (range_val * 0.125)
-        Std2_neg = Q4 - (range_val * 0.159)
-        Std3_neg = Q4 - (range_val * 0.25)
-        Std4_neg = Q4 - (range_val * 0.341)
-        Std5_neg = Q4 - (range_val * 0.375)
-
-        # 1D+ y 1D-
-        OneD_pos = Q1 + half_range
-        OneD_neg = Q4 - half_range
-
-        # Guardar en DataFrame
-        df.loc[i, 'Q1'] = Q1
-        df.loc[i, 'Q4'] = Q4
-        df.loc[i, 'Range'] = range_val
-        df.loc[i, 'Half_Range'] = half_range
-        df.loc[i, 'NR2'] = NR2
-        df.loc[i, 'Z2H'] = Z2H
-        df.loc[i, 'Z2L'] = Z2L
-        df.loc[i, 'Z3H'] = Z3H
-        df.loc[i, 'Z3L'] = Z3L
-        df.loc[i, 'TCH'] = TCH
-        df.loc[i, 'TCL'] = TCL
-        df.loc[i, 'TVH'] = TVH
-        df.loc[i, 'TVL'] = TVL
-        df.loc[i, 'Std1'] = Std1
-        df.loc[i, 'Std2'] = Std2
-        df.loc[i, 'Std3'] = Std3
-        df.loc[i, 'Std4'] = Std4
-        df.loc[i, 'Std5'] = Std5
-        df.loc[i, 'Std1_neg'] = Std1_neg
-        df.loc[i, 'Std2_neg'] = Std2_neg
-        df.loc[i, 'Std3_neg'] = Std3_neg
-        df.loc[i, 'Std4_neg'] = Std4_neg
-        df.loc[i, 'Std5_neg'] = Std5_neg
-        df.loc[i, '1D_pos'] = OneD_pos
-        df.loc[i, '1D_neg'] = OneD_neg
-
-    logger.info(f"Niveles DN One Day calculados para {len(df)-1} días")
+    familias = [familia_dn_ventana(ventana) for ventana in ventanas]
+    df = aplicar_familias(df, familias)
+
+    for ventana in ventanas:
+        logger.info(f"Niveles DN {int(ventana)} días calculados para {max(len(df) - int(ventana), 0)} días")
     return df
 
 def calcular_niveles_DN_threedays(df):
@@ -155,114 +145,20 @@ def calcular_niveles_DN_threedays(df):
     Según calculosDN.md líneas 29-53
     """
     logger.info("Calculando niveles DN Three Days...")
+    return calcular_niveles_DN_ndays(df, [3])
 
-    # Inicializar columnas con sufijo _3D
-    df['Q1_3D'] = np.nan
-    df['Q4_3D'] = np.nan
-    df['Range_3D'] = np.nan
-    df['High_3D'] = np.nan
-    df['Low_3D'] = np.nan
-    df['Half_Range_3D'] = np.nan
-    df['NR2_3D'] = np.nan
-    df['Z2H_3D'] = np.nan
-    df['Z2L_3D'] = np.nan
-    df['Z3H_3D'] = np.nan
-    df['Z3L_3D'] = np.nan
-    df['TCH_3D'] = np.nan
-    df['TCL_3D'] = np.nan
-    df['TVH_3D'] = np.nan
-    df['TVL_3D'] = np.nan
-    df['Std1_3D'] = np.nan
-    df['Std2_3D'] = np.nan
-    df['Std3_3D'] = np.nan
-    df['Std4_3D'] = np.nan
-    df['Std5_3D'] = np.nan
-    df['Std1_neg_3D'] = np.nan
-    df['Std2_neg_3D'] = np.nan
-    df['Std3_neg_3D'] = np.nan
-    df['Std4_neg_3D'] = np.nan
-    df['Std5_neg_3D'] = np.nan
-    df['1D_pos_3D'] = np.nan
-    df['1D_neg_3D'] = np.nan
-
-    # Calcular desde el cuarto día (necesitamos 3 días anteriores)
-    for i in range(3, len(df)):
-        # High y Low de los últimos 3 días
-        High_3D = df.loc[i-3:i-1, 'High'].max()
-        Low_3D = df.loc[i-3:i-1, 'Low'].min()
-
-        # Range de 3 días
-        range_3d = High_3D - Low_3D
-        half_range_3d = range_3d / 2
-
-        # NR2 = Q1 - half_range (según línea 37 de calculosDN.md)
-        # Pero primero necesitamos Q1, que es NR2 + half_range (línea 31)
-        # Esto significa que NR2 es el punto medio entre High_3D y Low_3D
-        NR2_3D = Low_3D + half_range_3d
-
-        # Q1 y Q4 según líneas 31-32
-        Q1_3D = NR2_3D + half_range_3d
-        Q4_3D = NR2_3D - half_range_3d
-
-        # Niveles según calculosDN.md (idénticos a One Day pero con range_3d)
-        Z2H_3D = NR2_3D + (range_3d * 0.159)
-        Z2L_3D = NR2_3D + (range_3d * 0.125)
-        Z3H_3D = NR2_3D - (range_3d * 0.125)
-        Z3L_3D = NR2_3D - (range_3d * 0.159)
-
-        TCH_3D = Q1_3D - (range_3d * 0.125)
-        TCL_3D = Q1_3D - (range_3d * 0.159)
-        TVH_3D = Q4_3D + (range_3d * 0.159)
-        TVL_3D = Q4_3D + (range_3d * 0.125)
-
-        # Desviaciones estándar
-        Std1_3D = Q1_3D + (range_3d * 0.125)
-        Std2_3D = Q1_3D + (range_3d * 0.159)
-        Std3_3D = Q1_3D + (range_3d * 0.25)
-        Std4_3D = Q1_3D + (range_3d * 0.341)
-        Std5_3D = Q1_3D + (range_3d * 0.375)
-
-        Std1_neg_3D = Q4_3D - (range_3d * 0.125)
-        Std2_neg_3D = Q4_3D - (range_3d * 0.159)
-        Std3_neg_3D = Q4_3D - (range_3d * 0.25)
-        Std4_neg_3D = Q4_3D - (range_3d * 0.341)
-        Std5_neg_3D = Q4_3D - (range_3d * 0.375)
-
-        # 1D+ y 1D-
-        OneD_pos_3D = Q1_3D + half_range_3d
-        OneD_neg_3D = Q4_3D - half_range_3d
-
-        # Guardar en DataFrame
-        df.loc[i, 'High_3D'] = High_3D
-        df.loc[i, 'Low_3D'] = Low_3D
-        df.loc[i, 'Q1_3D'] = Q1_3D
-        df.loc[i, 'Q4_3D'] = Q4_3D
-        df.loc[i, 'Range_3D'] = range_3d
-        df.loc[i, 'Half_Range_3D'] = half_range_3d
-        df.loc[i, 'NR2_3D'] = NR2_3D
-        df.loc[i, 'Z2H_3D'] = Z2H_3D
-        df.loc[i, 'Z2L_3D'] = Z2L_3D
-        df.loc[i, 'Z3H_3D'] = Z3H_3D
-        df.loc[i, 'Z3L_3D'] = Z3L_3D
-        df.loc[i, 'TCH_3D'] = TCH_3D
-        df.loc[i, 'TCL_3D'] = TCL_3D
-        df.loc[i, 'TVH_3D'] = TVH_3D
-        df.loc[i, 'TVL_3D'] = TVL_3D
-        df.loc[i, 'Std1_3D'] = Std1_3D
-        df.loc[i, 'Std2_3D'] = Std2_3D
-        df.loc[i, 'Std3_3D'] = Std3_3D
-        df.loc[i, 'Std4_3D'] = Std4_3D
-        df.loc[i, 'Std5_3D'] = Std5_3D
-        df.loc[i, 'Std1_neg_3D'] = Std1_neg_3D
-        df.loc[i, 'Std2_neg_3D'] = Std2_neg_3D
-        df.loc[i, 'Std3_neg_3D'] = Std3_neg_3D
-        df.loc[i, 'Std4_neg_3D'] = Std4_neg_3D
-        df.loc[i, 'Std5_neg_3D'] = Std5_neg_3D
-        df.loc[i, '1D_pos_3D'] = OneD_pos_3D
-        df.loc[i, '1D_neg_3D'] = OneD_neg_3D
-
-    logger.info(f"Niveles DN Three Days calculados para {len(df)-3} días")
-    return df
+def columnas_en_precio(ventanas=VENTANAS_DN):
+    """
+    Columnas con unidades de precio tras calcular los niveles DN
+
+    Args:
+        ventanas: Ventanas N días calculadas
+
+    Returns:
+        OHLC más las salidas de 'dn_1d' y de cada ventana
+    """
+    familias = ['dn_1d'] + [familia_dn_ventana(ventana) for ventana in ventanas]
+    return COLUMNAS_PRECIO + columnas_salida(familias)
 
 def calcular_estadisticas_touches_3d(df):
     """Calcula estadísticas de toques en niveles Q1_3D y Q4_3D"""
@@ -593,43 +489,43 @@ def crear_hoja_analisis_superacion_3d(df):
 
     return resumen
 
-def main():
-    logger.info("="*60)
-    logger.info("INICIANDO CÁLCULO DE NIVELES DN")
-    logger.info("="*60)
-
+def generar_niveles_DN():
+    """Calcula los niveles DN y sus estadísticas y escribe OUTPUT_FILE"""
     # 1. Cargar datos
     df = cargar_datos_diarios()
 
-    # 2. Calcular niveles DN One Day
-    df = calcular_niveles_DN_oneday(df)
+    # 2. Calcular niveles DN One Day y de N días en una sola pasada (las
+    # hojas 3D necesitan la ventana de 3)
+    ventanas = sorted(set(VENTANAS_DN) | {3})
+    df = calcular_niveles_DN(df, ventanas)
 
-    # 3. Calcular niveles DN Three Days
-    df = calcular_niveles_DN_threedays(df)
+    # Las estadísticas y el Excel trabajan en puntos
+    if PRECIOS_EN_TICKS:
+        convertir_a_puntos(df, columnas_en_precio(ventanas))
 
-    # 4. Calcular estadísticas One Day
+    # 3. Calcular estadísticas One Day
     df = calcular_estadisticas_touches(df)
     df = calcular_estadisticas_cierres(df)
     df = calcular_estadisticas_superacion(df)
 
-    # 5. Calcular estadísticas Three Days
+    # 4. Calcular estadísticas Three Days
     df = calcular_estadisticas_touches_3d(df)
     df = calcular_estadisticas_cierres_3d(df)
     df = calcular_estadisticas_superacion_3d(df)
 
-    # 6. Crear hojas de resumen One Day
+    # 5. Crear hojas de resumen One Day
     resumen_touches = crear_hoja_resumen_touches(df)
     analisis_cierres = crear_hoja_analisis_cierres(df)
     analisis_superacion = crear_hoja_analisis_superacion(df)
     analisis_ambos = crear_hoja_analisis_ambos_niveles(df)
     detalle_ambos = crear_hoja_detalle_ambos_niveles(df)
 
-    # 7. Crear hojas de resumen Three Days
+    # 6. Crear hojas de resumen Three Days
     resumen_touches_3d = crear_hoja_resumen_touches_3d(df)
     analisis_cierres_3d = crear_hoja_analisis_cierres_3d(df)
     analisis_superacion_3d = crear_hoja_analisis_superacion_3d(df)
 
-    # 8. Guardar en Excel
+    # 7. Guardar en Excel
     logger.info(f"Guardando resultados en {OUTPUT_FILE}")
     with pd.ExcelWriter(OUTPUT_FILE, engine='openpyxl') as writer:
         df.to_excel(writer, sheet_name='Datos_Completos', index=False)
@@ -682,5 +578,19 @@ def main():
     print("="*60)
     print(analisis_superacion_3d.to_string(index=False))
 
+def main():
+    logger.info("="*60)
+    logger.info("INICIANDO CÁLCULO DE NIVELES DN")
+    logger.info("="*60)
+
+    ejecutar_con_cache(
+        'niveles_dn',
+        entradas=[CONTINUO_PATH, AJUSTES_PATH] if MODO_AJUSTE is not None else [INPUT_FILE],
+        salidas=[OUTPUT_FILE],
+        generar=generar_niveles_DN,
+        parametros={'MODO_AJUSTE': MODO_AJUSTE},
+        codigo=CODIGO_DN,
+    )
+
 if __name__ == "__main__":
     main()
@@ -14,11 +14,19 @@ Formato de salida: Date,Open,High,Low,Close,Volume
 
 import pandas as pd
 import glob
+import io
 import os
 from pathlib import Path
 import logging
 from datetime import datetime
 
+from decodificador_timestamps import decodificar_fecha
+from pipeline_ingestion import ejecutar_pipeline
+from manifiesto_datos import (
+    cargar_manifiesto, guardar_manifiesto, clasificar_archivos,
+    registrar_archivo, manifiesto_vacio, conflictos_prioridad
+)
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,13 +43,20 @@ logger = logging.getLogger(__name__)
 DATOS_DIARIOS_PATH = Path("..") / "datos brutos" / "datos ninjatrader" / "Diarios"
 OUTPUT_PATH = Path("..") / "Originales"
 PROCESSED_PATH = Path("..") / "Procesados"
+NOMBRE_CONSOLIDADO = "NQ_Daily_2020-2025"
+MANIFIESTO_PATH = OUTPUT_PATH / "manifiesto_diarios.json"
 
-def cargar_archivo_diario(filepath):
+# Procesos para la carga en paralelo de archivos (1 = carga secuencial)
+N_WORKERS = os.cpu_count() or 1
+
+def cargar_archivo_diario(filepath, contenido=None):
     """
     Carga un archivo de datos diarios de NinjaTrader
 
     Args:
         filepath: Ruta al archivo .txt
+        contenido: Bytes del archivo ya leídos (etapa de lectura del
+            pipeline); si es None se lee de disco
 
     Returns:
         DataFrame con datos del archivo
@@ -49,17 +64,24 @@ def cargar_archivo_diario(filepath):
     try:
         # Leer archivo con formato NinjaTrader (sin headers)
         df = pd.read_csv(
-            filepath,
+            filepath if contenido is None else io.BytesIO(contenido),
             sep=';',
             header=None,
             names=['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
         )
 
-        # Convertir Date a datetime
-        df['Date'] = pd.to_datetime(df['Date'], format='%Y%m%d')
+        # Convertir Date (YYYYMMDD) a datetime (decodificación vectorizada,
+        # las fechas imposibles quedan como NaT)
+        df['Date'] = decodificar_fecha(df['Date'].to_numpy())
 
         # Extraer nombre de archivo para logging
         filename = os.path.basename(filepath)
+
+        # Validar fechas
+        invalid_timestamps = df['Date'].isna().sum()
+        if invalid_timestamps > 0:
+            logger.warning(f"⚠️  {filename}: {invalid_timestamps} timestamps inválidos")
+            df = df.dropna(subset=['Date'])
         logger.info(f"✅ Archivo cargado: {filename} ({len(df)} registros)")
 
         return df
@@ -68,10 +90,46 @@ def cargar_archivo_diario(filepath):
         logger.error(f"❌ Error al cargar {filepath}: {str(e)}")
         return None
 
-def consolidar_datos_diarios():
+def cargar_archivos_diarios(archivos, n_workers=N_WORKERS):
+    """
+    Carga varios archivos diarios con el pipeline por etapas
+
+    Hilos lectores, procesos de parseo y entrega en el orden de `archivos`
+    (pipeline_ingestion.py), de modo que keep='first' no depende de qué
+    proceso acaba antes.
+
+    Args:
+        archivos: Lista de rutas a archivos .txt
+        n_workers: Número de procesos a usar (1 = parseo en este proceso)
+
+    Returns:
+        Lista de DataFrames (None si el archivo falló) en el orden de entrada
+    """
+    return [
+        df for _, df in ejecutar_pipeline(archivos, cargar_archivo_diario, n_procesos=n_workers)
+    ]
+
+def _rango_fechas(df):
+    """(primera, última) Date de un archivo cargado, None si no tiene registros"""
+    if df is None or len(df) == 0:
+        return None
+    return df['Date'].min(), df['Date'].max()
+
+def consolidar_datos_diarios(archivos=None, df_base=None, manifiesto=None, cargados=None,
+                             n_workers=N_WORKERS):
     """
     Consolida todos los archivos de datos diarios en un solo DataFrame
 
+    Args:
+        archivos: Archivos a cargar (por defecto todos los .txt de la carpeta)
+        df_base: Consolidado previo al que se añaden los archivos; sus
+            registros tienen prioridad ante fechas duplicadas (ver
+            conflictos_prioridad() para cuándo equivale a reconstruir)
+        manifiesto: Si se indica, se registra en él cada archivo cargado,
+            también los que no tienen registros válidos
+        cargados: Diccionario {ruta: DataFrame} de archivos ya cargados
+        n_workers: Número de procesos para cargar los archivos
+
     Returns:
         DataFrame consolidado con todos los datos diarios
     """
@@ -80,16 +138,31 @@ def consolidar_datos_diarios():
     logger.info("="*80)
 
     # Buscar todos los archivos .txt en la carpeta
-    archivos = list(DATOS_DIARIOS_PATH.glob("*.txt"))
-    logger.info(f"📂 Archivos encontrados: {len(archivos)}")
+    if archivos is None:
+        archivos = list(DATOS_DIARIOS_PATH.glob("*.txt"))
+    logger.info(f"📂 Archivos a cargar: {len(archivos)}")
 
     # Lista para almacenar DataFrames
     dfs = []
-
-    # Cargar cada archivo
-    for archivo in sorted(archivos):
-        df = cargar_archivo_diario(archivo)
-        if df is not None and len(df) > 0:
+    if df_base is not None and len(df_base) > 0:
+        logger.info(f"📂 Consolidado previo: {len(df_base)} registros")
+        dfs.append(df_base)
+
+    # Cargar los archivos pendientes (en paralelo si hay varios procesos)
+    archivos = sorted(archivos)
+    cargados = dict(cargados or {})
+    pendientes = [archivo for archivo in archivos if archivo not in cargados]
+    cargados.update(zip(pendientes, cargar_archivos_diarios(pendientes, n_workers=n_workers)))
+
+    for archivo in archivos:
+        df = cargados[archivo]
+        # Un error de lectura no se registra: el archivo se reintenta
+        if df is None:
+            continue
+        if manifiesto is not None:
+            rango = _rango_fechas(df) or (None, None)
+            registrar_archivo(manifiesto, archivo, rango[0], rango[1], len(df))
+        if len(df) > 0:
             dfs.append(df)
 
     # Consolidar todos los DataFrames
@@ -109,6 +182,80 @@ def consolidar_datos_diarios():
 
     return df_consolidado
 
+def consolidar_incremental(n_workers=N_WORKERS):
+    """
+    Consolida solo los archivos nuevos usando el manifiesto de archivos brutos
+
+    - Sin cambios en la carpeta: no se hace nada
+    - Solo archivos nuevos: se cargan y se fusionan con el consolidado previo
+    - Archivos modificados/eliminados o sin consolidado previo: reconstrucción completa
+    - Un archivo nuevo que va antes (por nombre) que un archivo ya
+      consolidado con el que solapa: reconstrucción completa (keep='first')
+    - Archivos nuevos sin registros válidos: solo se registran en el manifiesto
+
+    Args:
+        n_workers: Número de procesos para cargar los archivos
+
+    Returns:
+        Tupla (DataFrame consolidado o None si no hay cambios, manifiesto actualizado)
+    """
+    archivos = sorted(DATOS_DIARIOS_PATH.glob("*.txt"))
+    manifiesto = cargar_manifiesto(MANIFIESTO_PATH)
+    cambios = clasificar_archivos(archivos, manifiesto)
+
+    consolidado_previo = OUTPUT_PATH / f"{NOMBRE_CONSOLIDADO}.csv"
+    reconstruir = (
+        len(cambios['modificados']) > 0 or
+        len(cambios['eliminados']) > 0 or
+        not consolidado_previo.exists()
+    )
+
+    if not reconstruir and len(cambios['nuevos']) == 0:
+        logger.info("✅ Sin archivos nuevos ni modificados: consolidado al día")
+        # Persistir los mtime actualizados de archivos con contenido idéntico
+        guardar_manifiesto(manifiesto, MANIFIESTO_PATH)
+        return None, manifiesto
+
+    if reconstruir:
+        logger.info("🔄 Reconstrucción completa del consolidado")
+        manifiesto = manifiesto_vacio()
+        df = consolidar_datos_diarios(archivos=archivos, manifiesto=manifiesto, n_workers=n_workers)
+        return df, manifiesto
+
+    logger.info(f"➕ Consolidación incremental: {len(cambios['nuevos'])} archivos nuevos")
+    nuevos = cambios['nuevos']
+    cargados = dict(zip(nuevos, cargar_archivos_diarios(nuevos, n_workers=n_workers)))
+
+    rangos = {archivo: _rango_fechas(df) for archivo, df in cargados.items() if df is not None}
+    conflictos = conflictos_prioridad(rangos, archivos, manifiesto)
+    if conflictos:
+        for nuevo, registrado in conflictos:
+            logger.info(f"🔄 {nuevo} va antes que {registrado} y solapa con él")
+        logger.info("🔄 Reconstrucción completa del consolidado (prioridad keep='first')")
+        manifiesto = manifiesto_vacio()
+        df = consolidar_datos_diarios(
+            archivos=archivos, manifiesto=manifiesto, cargados=cargados, n_workers=n_workers
+        )
+        return df, manifiesto
+
+    if all(rango is None for rango in rangos.values()):
+        # Ningún archivo nuevo aporta registros: el consolidado no cambia
+        for archivo, df in cargados.items():
+            if df is not None:
+                registrar_archivo(manifiesto, archivo, None, None, 0)
+        logger.info("✅ Archivos nuevos sin registros válidos: consolidado al día")
+        guardar_manifiesto(manifiesto, MANIFIESTO_PATH)
+        return None, manifiesto
+
+    df_base = pd.read_csv(consolidado_previo, parse_dates=['Date'])
+    df_base = df_base.drop(columns=['Valid'], errors='ignore')
+
+    df = consolidar_datos_diarios(
+        archivos=nuevos, df_base=df_base, manifiesto=manifiesto, cargados=cargados,
+        n_workers=n_workers
+    )
+    return df, manifiesto
+
 def validar_datos(df):
     """
     Valida que los datos cumplan con las reglas de mercado
@@ -192,18 +339,22 @@ def main():
     Función principal
     """
     try:
-        # 1. Consolidar datos
-        df = consolidar_datos_diarios()
+        # 1. Consolidar datos (solo archivos nuevos/modificados según el manifiesto)
+        df, manifiesto = consolidar_incremental()
 
         if df is None:
-            logger.error("❌ No se pudieron consolidar los datos")
+            if len(manifiesto['archivos']) == 0:
+                logger.error("❌ No se pudieron consolidar los datos")
             return
 
         # 2. Validar datos
         df = validar_datos(df)
 
         # 3. Exportar datos
-        df_limpio = exportar_datos(df, "NQ_Daily_2020-2025")
+        df_limpio = exportar_datos(df, NOMBRE_CONSOLIDADO)
+
+        # El manifiesto solo se guarda tras exportar
+        guardar_manifiesto(manifiesto, MANIFIESTO_PATH)
 
         logger.info("\n" + "="*80)
         logger.info("✅ CONSOLIDACIÓN COMPLETADA EXITOSAMENTE")
@@ -10,13 +10,30 @@ Descripción:
 
 Formato de entrada: YYYYMMDD HHMMSS;Open;High;Low;Close;Volume
 Formato de salida: DateTime,Open,High,Low,Close,Volume
+                   (+ copia date;time;o;h;l;c;volume con coma decimal para Excel)
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
+import io
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import timedelta
 
+from decodificador_timestamps import decodificar_fecha_hora
+from exportador_csv import (
+    exportar_por_bloques, formatear_bloque_iso, formatear_bloque_excel, ultimo_timestamp_csv
+)
+from fusion_contratos import fusionar_flujos
+from pipeline_ingestion import ejecutar_pipeline
+from manifiesto_datos import (
+    cargar_manifiesto, guardar_manifiesto, clasificar_archivos,
+    registrar_archivo, manifiesto_vacio, conflictos_prioridad
+)
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -33,13 +50,45 @@ logger = logging.getLogger(__name__)
 DATOS_MINUTOS_PATH = Path("..") / "datos brutos" / "datos ninjatrader" / "Minutos"
 OUTPUT_PATH = Path("..") / "Originales"
 PROCESSED_PATH = Path("..") / "Procesados"
-
-def cargar_archivo_minutos(filepath):
+NOMBRE_CONSOLIDADO = "NQ_1min_2020-2025"
+MANIFIESTO_PATH = OUTPUT_PATH / "manifiesto_minutos.json"
+
+# Procesos para el parseo en paralelo de contratos (1 = parseo secuencial),
+# en la carga en memoria y en los bloques de la ruta en streaming
+N_WORKERS = os.cpu_count() or 1
+
+# Consolidación en streaming: filas por bloque leído de cada contrato.
+# Con MODO_STREAMING=True (por defecto), main() consolida con memoria acotada
+# (~n_archivos x BLOQUES_EN_VUELO x TAMANO_BLOQUE filas) en una sola lectura
+# de cada archivo: los bloques de todos los contratos se parsean en paralelo
+# (pipeline_ingestion) mientras la fusión consume los anteriores. Las mismas
+# reglas y el mismo resultado que la ruta en memoria (concat + sort +
+# drop_duplicates), incluida la consolidación incremental por manifiesto.
+# False = ruta en memoria
+MODO_STREAMING = True
+TAMANO_BLOQUE = 100_000
+BLOQUES_EN_VUELO = 2
+
+# Gaps > 5 minutos durante trading
+MAX_GAP_MINUTOS_TRADING = 5
+
+# Copia adicional de los datos limpios en el formato Excel de
+# normalizaciondatos.md (';', coma decimal): Procesados/<nombre>_Excel.csv
+EXPORTAR_FORMATO_EXCEL = True
+COLUMNAS_NINJATRADER = ['DateTimeStr', 'Open', 'High', 'Low', 'Close', 'Volume']
+TIPOS_NINJATRADER = {
+    'DateTimeStr': str, 'Open': 'float64', 'High': 'float64',
+    'Low': 'float64', 'Close': 'float64', 'Volume': 'int64'
+}
+
+def cargar_archivo_minutos(filepath, contenido=None):
     """
     Carga un archivo de datos de minutos de NinjaTrader
 
     Args:
         filepath: Ruta al archivo .txt
+        contenido: Bytes del archivo ya leídos (etapa de lectura del
+            pipeline); si es None se lee de disco
 
     Returns:
         DataFrame con datos del archivo o None si hay error
@@ -47,28 +96,14 @@ def cargar_archivo_minutos(filepath):
     try:
         # Leer archivo sin headers, separador ';'
         df = pd.read_csv(
-            filepath,
+            filepath if contenido is None else io.BytesIO(contenido),
             sep=';',
             header=None,
-            names=['DateTimeStr', 'Open', 'High', 'Low', 'Close', 'Volume']
+            names=COLUMNAS_NINJATRADER,
+            dtype=TIPOS_NINJATRADER
         )
 
-        # Convertir 'YYYYMMDD HHMMSS' a datetime
-        df['DateTime'] = pd.to_datetime(
-            df['DateTimeStr'],
-            format='%Y%m%d %H%M%S',
-            errors='coerce'
-        )
-
-        # Eliminar columna temporal y reordenar
-        df = df.drop(columns=['DateTimeStr'])
-        df = df[['DateTime', 'Open', 'High', 'Low', 'Close', 'Volume']]
-
-        # Validar timestamps
-        invalid_timestamps = df['DateTime'].isna().sum()
-        if invalid_timestamps > 0:
-            logger.warning(f"⚠️  {filepath.name}: {invalid_timestamps} timestamps inválidos")
-            df = df.dropna(subset=['DateTime'])
+        df = preparar_bloque_minutos(df, filepath)
 
         logger.info(f"✅ Archivo cargado: {filepath.name} ({len(df)} registros)")
         if len(df) > 0:
@@ -80,10 +115,314 @@ def cargar_archivo_minutos(filepath):
         logger.error(f"❌ Error al cargar {filepath}: {str(e)}")
         return None
 
-def consolidar_datos_minutos():
+def preparar_bloque_minutos(df, filepath):
+    """
+    Convierte un bloque leído de NinjaTrader al formato DateTime,OHLCV
+
+    Args:
+        df: DataFrame con columnas COLUMNAS_NINJATRADER
+        filepath: Ruta del archivo de origen (para el log)
+
+    Returns:
+        DataFrame sin la columna de texto y sin timestamps inválidos
+    """
+    # Convertir 'YYYYMMDD HHMMSS' a datetime (decodificación vectorizada,
+    # los timestamps imposibles quedan como NaT)
+    df['DateTime'] = decodificar_fecha_hora(df['DateTimeStr'].to_numpy())
+
+    # Eliminar columna temporal y reordenar
+    df = df.drop(columns=['DateTimeStr'])
+    df = df[['DateTime', 'Open', 'High', 'Low', 'Close', 'Volume']]
+
+    # Validar timestamps
+    invalid_timestamps = df['DateTime'].isna().sum()
+    if invalid_timestamps > 0:
+        logger.warning(f"⚠️  {filepath.name}: {invalid_timestamps} timestamps inválidos")
+        df = df.dropna(subset=['DateTime'])
+
+    return df
+
+def leer_archivo_minutos_por_bloques(filepath, chunksize=TAMANO_BLOQUE, resumen=None):
+    """
+    Lee un archivo de minutos de NinjaTrader en bloques de `chunksize` filas
+
+    Args:
+        filepath: Ruta al archivo .txt
+        chunksize: Filas por bloque
+        resumen: Diccionario opcional donde se acumulan 'ts_min', 'ts_max'
+            y 'registros' del archivo (para el manifiesto)
+
+    Yields:
+        DataFrames DateTime,OHLCV en el orden del archivo
+    """
+    lector = pd.read_csv(
+        filepath,
+        sep=';',
+        header=None,
+        names=COLUMNAS_NINJATRADER,
+        dtype=TIPOS_NINJATRADER,
+        chunksize=chunksize
+    )
+
+    with lector:
+        for bloque in lector:
+            bloque = preparar_bloque_minutos(bloque, filepath)
+            if len(bloque) == 0:
+                continue
+
+            if resumen is not None:
+                _acumular_resumen(resumen, bloque)
+
+            yield bloque
+
+def _acumular_resumen(resumen, bloque):
+    """Añade un bloque leído al rango y recuento de su archivo (manifiesto)"""
+    ts_min = bloque['DateTime'].min()
+    ts_max = bloque['DateTime'].max()
+    resumen['ts_min'] = ts_min if resumen.get('ts_min') is None else min(resumen['ts_min'], ts_min)
+    resumen['ts_max'] = ts_max if resumen.get('ts_max') is None else max(resumen['ts_max'], ts_max)
+    resumen['registros'] = resumen.get('registros', 0) + len(bloque)
+
+class _ArchivoDesordenado(Exception):
+    """Un archivo leído en streaming retrocede entre bloques"""
+
+    def __init__(self, filepath):
+        super().__init__(f"{filepath.name}: timestamps desordenados entre bloques")
+        self.filepath = filepath
+
+def dividir_archivo_minutos(filepath, chunksize=TAMANO_BLOQUE):
+    """
+    Divide un archivo en rangos de bytes de unas `chunksize` líneas completas
+
+    El tamaño en bytes se estima con la longitud media de las primeras
+    líneas; cada corte se lleva al final de la línea en la que cae, así que
+    los rangos se pueden leer y parsear por separado.
+
+    Args:
+        filepath: Ruta al archivo .txt
+        chunksize: Filas aproximadas por rango
+
+    Returns:
+        Lista de tareas (filepath, inicio, fin) que cubren el archivo
+    """
+    tamano = filepath.stat().st_size
+    if tamano == 0:
+        return []
+
+    with open(filepath, 'rb') as f:
+        muestra = f.read(1 << 16)
+        bytes_bloque = max(len(muestra) // max(muestra.count(b'\n'), 1), 1) * chunksize
+
+        cortes = [0]
+        while cortes[-1] + bytes_bloque < tamano:
+            f.seek(cortes[-1] + bytes_bloque)
+            f.readline()
+            if f.tell() >= tamano:
+                break
+            cortes.append(f.tell())
+        cortes.append(tamano)
+
+    return [(filepath, inicio, fin) for inicio, fin in zip(cortes[:-1], cortes[1:])]
+
+def _leer_rango(tarea):
+    """Lee los bytes de un rango de archivo (etapa de I/O del pipeline)"""
+    filepath, inicio, fin = tarea
+    with open(filepath, 'rb') as f:
+        f.seek(inicio)
+        return f.read(fin - inicio)
+
+def _parsear_rango(tarea, contenido):
+    """Parsea un rango de líneas NinjaTrader (etapa de CPU del pipeline)"""
+    df = pd.read_csv(
+        io.BytesIO(contenido),
+        sep=';',
+        header=None,
+        names=COLUMNAS_NINJATRADER,
+        dtype=TIPOS_NINJATRADER
+    )
+    return preparar_bloque_minutos(df, tarea[0])
+
+def leer_archivo_minutos_en_paralelo(filepath, chunksize=TAMANO_BLOQUE, resumen=None,
+                                     executor=None, max_en_vuelo=BLOQUES_EN_VUELO):
+    """
+    Lee un archivo por bloques parseados en el pool de procesos
+
+    Un hilo lee los rangos de dividir_archivo_minutos() y el pool los parsea
+    por delante de la fusión (como mucho `max_en_vuelo` bloques pendientes);
+    los bloques se entregan en el orden del archivo. Al mismo tiempo se
+    comprueba que el archivo no retrocede entre bloques (una fila anterior a
+    un bloque ya entregado no se podría colocar en su sitio).
+
+    Args:
+        filepath: Ruta al archivo .txt
+        chunksize: Filas aproximadas por bloque
+        resumen: Diccionario opcional donde se acumulan 'ts_min', 'ts_max'
+            y 'registros' del archivo (para el manifiesto)
+        executor: Pool de procesos compartido (None = parseo en este proceso)
+        max_en_vuelo: Bloques leídos pendientes de entregar
+
+    Yields:
+        DataFrames DateTime,OHLCV en el orden del archivo
+
+    Raises:
+        ValueError: si un bloque no se puede leer o parsear
+        _ArchivoDesordenado: si un bloque empieza antes del final del anterior
+    """
+    bloques = ejecutar_pipeline(
+        dividir_archivo_minutos(filepath, chunksize), _parsear_rango, leer=_leer_rango,
+        n_lectores=1, n_procesos=1, max_en_vuelo=max_en_vuelo, executor=executor
+    )
+    ultimo = None
+    try:
+        for (_, inicio, _), bloque in bloques:
+            if bloque is None:
+                raise ValueError(f"{filepath.name}: bloque ilegible en el byte {inicio:,}")
+            if len(bloque) == 0:
+                continue
+            if ultimo is not None and bloque['DateTime'].min() < ultimo:
+                raise _ArchivoDesordenado(filepath)
+            ultimo = bloque['DateTime'].max()
+
+            if resumen is not None:
+                _acumular_resumen(resumen, bloque)
+            yield bloque
+    finally:
+        bloques.close()
+
+def inspeccionar_archivo_minutos(filepath, chunksize=TAMANO_BLOQUE):
+    """
+    Pasada ligera (solo la columna de timestamps) de un archivo nuevo
+
+    La consolidación incremental necesita el rango de los archivos nuevos
+    antes de fusionar, para decidir entre anexar y reconstruir (prioridad
+    keep='first'). La pasada también comprueba si el archivo está ordenado
+    de principio a fin, y así la fusión lo ordena en memoria desde el
+    principio en lugar de descubrirlo a mitad de la fusión.
+
+    Args:
+        filepath: Ruta al archivo .txt
+        chunksize: Filas por bloque
+
+    Returns:
+        Diccionario con 'ordenado', 'ts_min', 'ts_max' (None si no hay
+        registros válidos) y 'registros'
+    """
+    resumen = {'ordenado': True, 'ts_min': None, 'ts_max': None, 'registros': 0}
+    ultimo = None
+
+    lector = pd.read_csv(
+        filepath,
+        sep=';',
+        header=None,
+        names=COLUMNAS_NINJATRADER,
+        usecols=['DateTimeStr'],
+        dtype={'DateTimeStr': str},
+        chunksize=chunksize
+    )
+    with lector:
+        for bloque in lector:
+            fechas = decodificar_fecha_hora(bloque['DateTimeStr'].to_numpy())
+            fechas = fechas[~np.isnat(fechas)]
+            if len(fechas) == 0:
+                continue
+
+            if (ultimo is not None and fechas[0] < ultimo) or (np.diff(fechas) < np.timedelta64(0)).any():
+                resumen['ordenado'] = False
+            ultimo = fechas[-1]
+
+            ts_min, ts_max = pd.Timestamp(fechas.min()), pd.Timestamp(fechas.max())
+            resumen['ts_min'] = ts_min if resumen['ts_min'] is None else min(resumen['ts_min'], ts_min)
+            resumen['ts_max'] = ts_max if resumen['ts_max'] is None else max(resumen['ts_max'], ts_max)
+            resumen['registros'] += len(fechas)
+
+    return resumen
+
+def leer_archivo_minutos_ordenado(filepath, chunksize=TAMANO_BLOQUE, resumen=None):
+    """
+    Lee un archivo desordenado entero, lo ordena y lo entrega por bloques
+
+    Orden estable: ante timestamps repetidos queda primero la fila anterior
+    del archivo, igual que concat + sort estable en la ruta en memoria. Solo
+    este archivo se carga entero; el resto de la fusión sigue acotada.
+
+    Args:
+        filepath: Ruta al archivo .txt
+        chunksize: Filas por bloque entregado
+        resumen: Diccionario opcional con el rango y recuento del archivo
+
+    Yields:
+        DataFrames DateTime,OHLCV ordenados
+    """
+    bloques = list(leer_archivo_minutos_por_bloques(filepath, chunksize, resumen))
+    if not bloques:
+        return
+    df = pd.concat(bloques, ignore_index=True)
+    df = df.sort_values('DateTime', kind='stable').reset_index(drop=True)
+    for inicio in range(0, len(df), chunksize):
+        yield df.iloc[inicio:inicio + chunksize]
+
+def leer_consolidado_por_bloques(ruta, chunksize=TAMANO_BLOQUE):
+    """
+    Lee por bloques un consolidado DateTime,OHLCV(,Valid) ya ordenado
+
+    Args:
+        ruta: CSV consolidado (Originales/)
+        chunksize: Filas por bloque
+
+    Yields:
+        DataFrames DateTime,OHLCV
+    """
+    tipos = {columna: tipo for columna, tipo in TIPOS_NINJATRADER.items() if columna != 'DateTimeStr'}
+    with pd.read_csv(ruta, parse_dates=['DateTime'], dtype=tipos, chunksize=chunksize) as lector:
+        for bloque in lector:
+            yield bloque.drop(columns=['Valid'], errors='ignore')
+
+def cargar_archivos_minutos(archivos, n_workers=N_WORKERS):
+    """
+    Carga varios archivos de minutos, en paralelo si n_workers > 1
+
+    La carga usa el pipeline por etapas (pipeline_ingestion.py): hilos que
+    leen de disco mientras los procesos parsean los archivos ya leídos. Los
+    resultados se devuelven siempre en el orden de `archivos`, de modo que
+    la regla keep='first' de la consolidación no depende de qué proceso
+    acaba antes.
+
+    Args:
+        archivos: Lista de rutas a archivos .txt
+        n_workers: Número de procesos a usar (1 = parseo en este proceso)
+
+    Returns:
+        Lista de DataFrames (None si el archivo falló) en el orden de entrada
+    """
+    if n_workers > 1 and len(archivos) > 1:
+        logger.info(f"⚙️  Carga en paralelo con {min(n_workers, len(archivos))} procesos")
+
+    return [
+        df for _, df in ejecutar_pipeline(archivos, cargar_archivo_minutos, n_procesos=n_workers)
+    ]
+
+def _rango_timestamps(df):
+    """(primer, último) DateTime de un archivo cargado, None si no tiene registros"""
+    if df is None or len(df) == 0:
+        return None
+    return df['DateTime'].min(), df['DateTime'].max()
+
+def consolidar_datos_minutos(n_workers=N_WORKERS, archivos=None, df_base=None, manifiesto=None,
+                             cargados=None):
     """
     Consolida todos los archivos de datos de minutos en un solo DataFrame
 
+    Args:
+        n_workers: Número de procesos para cargar los archivos (1 = secuencial)
+        archivos: Archivos a cargar (por defecto todos los .txt de la carpeta)
+        df_base: Consolidado previo al que se añaden los archivos; sus
+            registros tienen prioridad ante timestamps duplicados (ver
+            conflictos_prioridad() para cuándo equivale a reconstruir)
+        manifiesto: Si se indica, se registra en él cada archivo cargado,
+            también los que no tienen registros válidos
+        cargados: Diccionario {ruta: DataFrame} de archivos ya cargados
+            (no se vuelven a leer)
+
     Returns:
         DataFrame consolidado con todos los datos de minutos
     """
@@ -92,18 +431,31 @@ def consolidar_datos_minutos():
     logger.info("="*80)
 
     # Buscar todos los archivos .txt en la carpeta
-    archivos = sorted(list(DATOS_MINUTOS_PATH.glob("*.txt")))
-    logger.info(f"📂 Archivos encontrados: {len(archivos)}")
+    if archivos is None:
+        archivos = sorted(list(DATOS_MINUTOS_PATH.glob("*.txt")))
+    logger.info(f"📂 Archivos a cargar: {len(archivos)}")
 
-    # Lista para almacenar DataFrames
-    dfs = []
+    # Cargar cada archivo (en paralelo si hay varios procesos disponibles)
+    cargados = dict(cargados or {})
+    pendientes = [archivo for archivo in archivos if archivo not in cargados]
+    cargados.update(zip(pendientes, cargar_archivos_minutos(pendientes, n_workers=n_workers)))
 
-    # Cargar cada archivo
+    dfs = []
     for archivo in archivos:
-        df = cargar_archivo_minutos(archivo)
-        if df is not None and len(df) > 0:
+        df = cargados[archivo]
+        # Un error de lectura no se registra: el archivo se reintenta
+        if df is None:
+            continue
+        if manifiesto is not None:
+            rango = _rango_timestamps(df) or (None, None)
+            registrar_archivo(manifiesto, archivo, rango[0], rango[1], len(df))
+        if len(df) > 0:
             dfs.append(df)
 
+    if df_base is not None and len(df_base) > 0:
+        logger.info(f"📂 Consolidado previo: {len(df_base):,} registros")
+        dfs.insert(0, df_base)
+
     # Consolidar todos los DataFrames
     if len(dfs) == 0:
         logger.error("❌ No se cargaron datos")
@@ -112,8 +464,9 @@ def consolidar_datos_minutos():
     df_consolidado = pd.concat(dfs, ignore_index=True)
     logger.info(f"\n📊 Total registros antes de limpieza: {len(df_consolidado):,}")
 
-    # Ordenar por DateTime
-    df_consolidado = df_consolidado.sort_values('DateTime').reset_index(drop=True)
+    # Ordenar por DateTime (orden estable: ante empates se conserva el orden
+    # de carga, así 'first' es siempre el consolidado previo o el primer archivo)
+    df_consolidado = df_consolidado.sort_values('DateTime', kind='stable').reset_index(drop=True)
     logger.info(f"✅ Datos ordenados cronológicamente")
 
     # Eliminar duplicados por DateTime (mantener el primero)
@@ -128,22 +481,368 @@ def consolidar_datos_minutos():
 
     return df_consolidado
 
-def validar_datos(df):
+def _planificar_incremental():
     """
-    Valida que los datos cumplan con las reglas de mercado
+    Estado de la carpeta frente al manifiesto (común a las dos rutas)
+
+    Returns:
+        Tupla (archivos, manifiesto, cambios, consolidado previo, reconstruir)
+    """
+    archivos = sorted(list(DATOS_MINUTOS_PATH.glob("*.txt")))
+    manifiesto = cargar_manifiesto(MANIFIESTO_PATH)
+    cambios = clasificar_archivos(archivos, manifiesto)
+
+    consolidado_previo = OUTPUT_PATH / f"{NOMBRE_CONSOLIDADO}.csv"
+    reconstruir = (
+        len(cambios['modificados']) > 0 or
+        len(cambios['eliminados']) > 0 or
+        not consolidado_previo.exists()
+    )
+    return archivos, manifiesto, cambios, consolidado_previo, reconstruir
+
+def _informar_conflictos(conflictos):
+    """Escribe en el log por qué se reconstruye en lugar de fusionar"""
+    for nuevo, registrado in conflictos:
+        logger.info(f"🔄 {nuevo} va antes que {registrado} y solapa con él")
+    logger.info("🔄 Reconstrucción completa del consolidado (prioridad keep='first')")
+
+def _registrar_vacios(manifiesto, archivos):
+    """Registra archivos nuevos sin registros válidos y guarda el manifiesto"""
+    for archivo in archivos:
+        registrar_archivo(manifiesto, archivo, None, None, 0)
+    logger.info("✅ Archivos nuevos sin registros válidos: consolidado al día")
+    guardar_manifiesto(manifiesto, MANIFIESTO_PATH)
+
+def consolidar_incremental(n_workers=N_WORKERS):
+    """
+    Consolida solo los archivos nuevos usando el manifiesto de archivos brutos
+
+    - Sin cambios en la carpeta: no se hace nada
+    - Solo archivos nuevos: se cargan y se fusionan con el consolidado previo
+    - Archivos modificados/eliminados o sin consolidado previo: reconstrucción
+      completa (los registros de un archivo modificado no se pueden separar
+      del consolidado)
+    - Un archivo nuevo que va antes (por nombre) que un archivo ya
+      consolidado con el que solapa: reconstrucción completa, para que
+      keep='first' dé el mismo resultado que una reconstrucción
+    - Archivos nuevos sin registros válidos: solo se registran en el manifiesto
 
     Args:
-        df: DataFrame con datos de minutos
+        n_workers: Número de procesos para cargar los archivos
 
     Returns:
-        DataFrame con columna 'Valid' indicando si cada registro es válido
+        Tupla (DataFrame consolidado o None si no hay cambios, manifiesto actualizado)
     """
-    logger.info("\n" + "="*80)
-    logger.info("VALIDANDO DATOS")
+    archivos, manifiesto, cambios, consolidado_previo, reconstruir = _planificar_incremental()
+
+    if not reconstruir and len(cambios['nuevos']) == 0:
+        logger.info("✅ Sin archivos nuevos ni modificados: consolidado al día")
+        # Persistir los mtime actualizados de archivos con contenido idéntico
+        guardar_manifiesto(manifiesto, MANIFIESTO_PATH)
+        return None, manifiesto
+
+    if reconstruir:
+        logger.info("🔄 Reconstrucción completa del consolidado")
+        manifiesto = manifiesto_vacio()
+        df = consolidar_datos_minutos(n_workers=n_workers, archivos=archivos, manifiesto=manifiesto)
+        return df, manifiesto
+
+    logger.info(f"➕ Consolidación incremental: {len(cambios['nuevos'])} archivos nuevos")
+    nuevos = cambios['nuevos']
+    cargados = dict(zip(nuevos, cargar_archivos_minutos(nuevos, n_workers=n_workers)))
+
+    rangos = {archivo: _rango_timestamps(df) for archivo, df in cargados.items() if df is not None}
+    conflictos = conflictos_prioridad(rangos, archivos, manifiesto)
+    if conflictos:
+        _informar_conflictos(conflictos)
+        manifiesto = manifiesto_vacio()
+        df = consolidar_datos_minutos(
+            n_workers=n_workers, archivos=archivos, manifiesto=manifiesto, cargados=cargados
+        )
+        return df, manifiesto
+
+    if all(rango is None for rango in rangos.values()):
+        # Ningún archivo nuevo aporta registros: el consolidado no cambia
+        _registrar_vacios(manifiesto, list(rangos))
+        return None, manifiesto
+
+    df_base = pd.read_csv(consolidado_previo, parse_dates=['DateTime'])
+    df_base = df_base.drop(columns=['Valid'], errors='ignore')
+
+    df = consolidar_datos_minutos(
+        n_workers=n_workers,
+        archivos=nuevos,
+        df_base=df_base,
+        manifiesto=manifiesto,
+        cargados=cargados
+    )
+    return df, manifiesto
+
+def _escribir_streaming(flujos, temporales, stats, gaps):
+    """
+    Fusiona los flujos y escribe las salidas en sus archivos temporales
+
+    Args:
+        flujos: Flujos de bloques DateTime,OHLCV en orden de prioridad
+        temporales: Diccionario {destino: temporal}; el primero es el
+            original, el segundo el limpio y el tercero (opcional) el Excel
+        stats: Diccionario de estadísticas (se actualiza)
+        gaps: Lista donde se añaden los gaps de cada bloque
+    """
+    rutas = list(temporales.values())
+    ultimo_ts = None
+
+    with open(rutas[0], 'w', newline='', encoding='utf-8') as f_orig, \
+         open(rutas[1], 'w', newline='', encoding='utf-8') as f_clean, \
+         (open(rutas[2], 'w', newline='', encoding='utf-8')
+          if len(rutas) > 2 else nullcontext()) as f_excel:
+
+        for bloque in fusionar_flujos(flujos):
+            bloque['Valid'] = calcular_validez(bloque)
+
+            # Gaps, incluido el salto entre el bloque anterior y este
+            diferencias = bloque['DateTime'].diff()
+            if ultimo_ts is not None:
+                diferencias.iat[0] = bloque['DateTime'].iat[0] - ultimo_ts
+            es_gap = diferencias > timedelta(minutes=MAX_GAP_MINUTOS_TRADING)
+            if es_gap.any():
+                gaps.append(pd.DataFrame({
+                    'DateTime': bloque.loc[es_gap, 'DateTime'],
+                    'TimeDiff': diferencias[es_gap]
+                }))
+            ultimo_ts = bloque['DateTime'].iat[-1]
+
+            primera = stats['registros'] == 0
+            formatear_bloque_iso(bloque, f_orig, cabecera=primera)
+
+            limpio = bloque[bloque['Valid']].drop(columns=['Valid'])
+            formatear_bloque_iso(limpio, f_clean, cabecera=primera)
+            if f_excel is not None:
+                formatear_bloque_excel(limpio, f_excel, cabecera=primera)
+
+            stats['registros'] += len(bloque)
+            stats['validos'] += len(limpio)
+            if len(limpio) > 0:
+                if stats['inicio'] is None:
+                    stats['inicio'] = limpio['DateTime'].iat[0]
+                stats['fin'] = limpio['DateTime'].iat[-1]
+                stats['minimo'] = min(stats['minimo'], limpio['Low'].min())
+                stats['maximo'] = max(stats['maximo'], limpio['High'].max())
+                stats['volumen'] += int(limpio['Volume'].sum())
+
+def _abrir_flujos(archivos, chunksize, consolidado_base, desordenados, resumenes, executor):
+    """Flujos de bloques en orden de prioridad para fusionar_flujos()"""
+    flujos = []
+    if consolidado_base is not None:
+        flujos.append(leer_consolidado_por_bloques(consolidado_base, chunksize))
+    for archivo in archivos:
+        if archivo in desordenados:
+            flujos.append(leer_archivo_minutos_ordenado(archivo, chunksize, resumenes[archivo]))
+        else:
+            flujos.append(leer_archivo_minutos_en_paralelo(
+                archivo, chunksize, resumenes[archivo], executor=executor
+            ))
+    return flujos
+
+def consolidar_datos_minutos_streaming(archivos=None, filename=NOMBRE_CONSOLIDADO,
+                                       chunksize=TAMANO_BLOQUE, manifiesto=None,
+                                       consolidado_base=None, inspecciones=None,
+                                       n_workers=N_WORKERS):
+    """
+    Consolida, valida y exporta los datos de minutos en una sola pasada
+
+    Cada contrato se lee por bloques y se fusiona con fusionar_flujos()
+    (k-way merge con regla keep='first' según el orden de los archivos), de
+    modo que la memoria depende del número de archivos y del tamaño de bloque,
+    no del total de registros. Los bloques se parsean en un pool de procesos
+    compartido por todos los contratos mientras la fusión consume los ya
+    listos (leer_archivo_minutos_en_paralelo()). La validación y la detección
+    de gaps se aplican bloque a bloque y las salidas se escriben a medida que
+    avanzan los bloques, en archivos temporales que solo sustituyen a los
+    anteriores al terminar (un fallo no deja consolidados truncados).
+
+    Cada archivo se lee una sola vez: el rango y el recuento del manifiesto
+    se acumulan durante la fusión. Si un archivo resulta retroceder entre
+    bloques, la fusión se repite con ese archivo ordenado entero en memoria,
+    como en la ruta en memoria.
+
+    Args:
+        archivos: Archivos a consolidar (por defecto todos los .txt de la carpeta)
+        filename: Nombre base de los archivos de salida
+        chunksize: Filas por bloque leído de cada archivo
+        manifiesto: Si se indica, se registra en él cada archivo consolidado
+        consolidado_base: CSV consolidado previo que se fusiona como primer
+            flujo (prioridad ante timestamps duplicados)
+        inspecciones: Resultados ya calculados de inspeccionar_archivo_minutos()
+            (los archivos desordenados se ordenan desde el principio)
+        n_workers: Procesos del pool de parseo (1 = parseo en este proceso)
+
+    Returns:
+        Diccionario con estadísticas de la consolidación o None si no hay datos
+    """
+    logger.info("="*80)
+    logger.info("CONSOLIDACIÓN EN STREAMING DE DATOS DE MINUTOS")
     logger.info("="*80)
 
-    # Crear columna de validación
-    df['Valid'] = (
+    if archivos is None:
+        archivos = sorted(list(DATOS_MINUTOS_PATH.glob("*.txt")))
+    logger.info(f"📂 Archivos a fusionar: {len(archivos)} (bloques de {chunksize:,} filas)")
+    if consolidado_base is not None:
+        logger.info(f"📂 Consolidado previo como primer flujo: {consolidado_base}")
+
+    desordenados = {
+        archivo for archivo, inspeccion in (inspecciones or {}).items() if not inspeccion['ordenado']
+    }
+
+    OUTPUT_PATH.mkdir(parents=True, exist_ok=True)
+    PROCESSED_PATH.mkdir(parents=True, exist_ok=True)
+    output_file_orig = OUTPUT_PATH / f"{filename}.csv"
+    output_file_clean = PROCESSED_PATH / f"{filename}_Limpio.csv"
+    output_file_excel = PROCESSED_PATH / f"{filename}_Excel.csv"
+
+    destinos = [output_file_orig, output_file_clean] + ([output_file_excel] if EXPORTAR_FORMATO_EXCEL else [])
+    temporales = {destino: destino.with_name(destino.name + '.tmp') for destino in destinos}
+
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 and archivos else None
+    if executor is not None:
+        logger.info(f"⚙️  Parseo de bloques en paralelo con {n_workers} procesos")
+
+    try:
+        while True:
+            stats = {
+                'registros': 0, 'validos': 0, 'inicio': None, 'fin': None,
+                'minimo': float('inf'), 'maximo': float('-inf'), 'volumen': 0
+            }
+            gaps = []
+            resumenes = {archivo: {'ts_min': None, 'ts_max': None, 'registros': 0} for archivo in archivos}
+            flujos = _abrir_flujos(archivos, chunksize, consolidado_base, desordenados, resumenes, executor)
+
+            try:
+                _escribir_streaming(flujos, temporales, stats, gaps)
+                break
+            except _ArchivoDesordenado as e:
+                # Las salidas temporales se reescriben desde el principio
+                logger.warning(f"⚠️  {e}: se ordena el archivo en memoria y se repite la fusión")
+                desordenados.add(e.filepath)
+            finally:
+                for flujo in flujos:
+                    flujo.close()
+    except BaseException:
+        for temporal in temporales.values():
+            temporal.unlink(missing_ok=True)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    if stats['registros'] == 0:
+        for temporal in temporales.values():
+            temporal.unlink(missing_ok=True)
+        logger.error("❌ No se cargaron datos")
+        return None
+
+    for destino, temporal in temporales.items():
+        os.replace(temporal, destino)
+
+    if manifiesto is not None:
+        for archivo in archivos:
+            resumen = resumenes[archivo]
+            registrar_archivo(
+                manifiesto, archivo, resumen['ts_min'], resumen['ts_max'], resumen['registros']
+            )
+
+    logger.info(f"✅ Archivo original guardado: {output_file_orig}")
+    logger.info(f"✅ Archivo limpio guardado: {output_file_clean}")
+    if EXPORTAR_FORMATO_EXCEL:
+        logger.info(f"✅ Archivo formato Excel guardado: {output_file_excel}")
+
+    logger.info(f"\n📊 ESTADÍSTICAS FINALES:")
+    logger.info(f"   Total registros: {stats['registros']:,}")
+    logger.info(f"   Registros válidos: {stats['validos']:,}")
+    logger.info(f"   Registros inválidos: {stats['registros'] - stats['validos']:,}")
+    logger.info(f"   Fecha/hora inicio: {stats['inicio']}")
+    logger.info(f"   Fecha/hora fin: {stats['fin']}")
+    logger.info(f"   Mínimo: {stats['minimo']:.2f}")
+    logger.info(f"   Máximo: {stats['maximo']:.2f}")
+    logger.info(f"   Volumen total: {stats['volumen']:,.0f}")
+
+    if gaps:
+        reportar_gaps(pd.concat(gaps, ignore_index=True))
+    else:
+        logger.info("✅ No se detectaron gaps significativos")
+
+    return stats
+
+def consolidar_incremental_streaming(chunksize=TAMANO_BLOQUE, n_workers=N_WORKERS):
+    """
+    consolidar_incremental() con la fusión en streaming
+
+    Mismas reglas que consolidar_incremental(); en la fusión incremental el
+    consolidado previo se lee por bloques como primer flujo, así que la
+    memoria sigue acotada y el resultado es el de una reconstrucción. Solo
+    los archivos nuevos se inspeccionan antes de fusionar: su rango decide
+    entre anexar y reconstruir.
+
+    Args:
+        chunksize: Filas por bloque leído de cada archivo
+        n_workers: Procesos del pool de parseo
+
+    Returns:
+        Tupla (estadísticas o None si no hay cambios, manifiesto actualizado)
+    """
+    archivos, manifiesto, cambios, consolidado_previo, reconstruir = _planificar_incremental()
+
+    if not reconstruir and len(cambios['nuevos']) == 0:
+        logger.info("✅ Sin archivos nuevos ni modificados: consolidado al día")
+        # Persistir los mtime actualizados de archivos con contenido idéntico
+        guardar_manifiesto(manifiesto, MANIFIESTO_PATH)
+        return None, manifiesto
+
+    inspecciones = {}
+    if not reconstruir:
+        nuevos = cambios['nuevos']
+        logger.info(f"➕ Consolidación incremental: {len(nuevos)} archivos nuevos")
+        inspecciones = {archivo: inspeccionar_archivo_minutos(archivo, chunksize) for archivo in nuevos}
+        rangos = {
+            archivo: (i['ts_min'], i['ts_max']) if i['registros'] > 0 else None
+            for archivo, i in inspecciones.items()
+        }
+
+        conflictos = conflictos_prioridad(rangos, archivos, manifiesto)
+        if conflictos:
+            _informar_conflictos(conflictos)
+            reconstruir = True
+        elif all(rango is None for rango in rangos.values()):
+            _registrar_vacios(manifiesto, nuevos)
+            return None, manifiesto
+    else:
+        logger.info("🔄 Reconstrucción completa del consolidado")
+
+    if reconstruir:
+        manifiesto = manifiesto_vacio()
+        stats = consolidar_datos_minutos_streaming(
+            archivos, chunksize=chunksize, manifiesto=manifiesto, inspecciones=inspecciones,
+            n_workers=n_workers
+        )
+    else:
+        stats = consolidar_datos_minutos_streaming(
+            cambios['nuevos'], chunksize=chunksize, manifiesto=manifiesto,
+            consolidado_base=consolidado_previo, inspecciones=inspecciones,
+            n_workers=n_workers
+        )
+    return stats, manifiesto
+
+def calcular_validez(df):
+    """
+    Evalúa las reglas de mercado OHLCV fila a fila (vectorizado)
+
+    Args:
+        df: DataFrame con columnas Open, High, Low, Close, Volume
+
+    Returns:
+        Serie booleana, True si el registro cumple todas las reglas
+    """
+    return (
         (df['High'] >= df['Low']) &
         (df['High'] >= df['Open']) &
         (df['High'] >= df['Close']) &
@@ -156,6 +855,23 @@ def validar_datos(df):
         (df['Close'] > 0)
     )
 
+def validar_datos(df):
+    """
+    Valida que los datos cumplan con las reglas de mercado
+
+    Args:
+        df: DataFrame con datos de minutos
+
+    Returns:
+        DataFrame con columna 'Valid' indicando si cada registro es válido
+    """
+    logger.info("\n" + "="*80)
+    logger.info("VALIDANDO DATOS")
+    logger.info("="*80)
+
+    # Crear columna de validación
+    df['Valid'] = calcular_validez(df)
+
     # Validación adicional: detectar saltos hacia atrás en el tiempo
     df['TimeDiff'] = df['DateTime'].diff()
     backward_jumps = (df['TimeDiff'] < timedelta(0)).sum()
@@ -203,38 +919,14 @@ def detectar_gaps(df, reportar_log=True):
     # Calcular diferencia entre timestamps consecutivos
     df['TimeDiff'] = df['DateTime'].diff()
 
-    # Gaps > 5 minutos durante trading
-    MAX_GAP_MINUTOS_TRADING = 5
+    # Gaps > MAX_GAP_MINUTOS_TRADING durante trading
     gaps = df[df['TimeDiff'] > timedelta(minutes=MAX_GAP_MINUTOS_TRADING)].copy()
 
     if len(gaps) > 0:
-        logger.info(f"⚠️  {len(gaps):,} gaps detectados (> {MAX_GAP_MINUTOS_TRADING} minutos)")
-
         if reportar_log:
-            # Convertir gaps a minutos
-            gaps['GapMinutos'] = gaps['TimeDiff'].dt.total_seconds() / 60
-
-            # Clasificar gaps
-            gaps['Clasificacion'] = gaps['GapMinutos'].apply(
-                lambda x: 'Cierre diario' if x <= 120  # 2 horas
-                else 'Fin de semana' if x <= 4320  # 72 horas
-                else 'Gap largo'
-            )
-
-            # Resumir por clasificación
-            clasificacion_counts = gaps['Clasificacion'].value_counts()
-            logger.info("\n📊 Clasificación de gaps:")
-            for clasificacion, count in clasificacion_counts.items():
-                logger.info(f"   {clasificacion}: {count:,}")
-
-            # Mostrar los 10 gaps más largos
-            logger.info("\n📋 Top 10 gaps más largos:")
-            top_gaps = gaps.nlargest(10, 'GapMinutos')
-            for idx, row in top_gaps.iterrows():
-                logger.info(
-                    f"   {row['DateTime']} - Gap: {row['GapMinutos']:.0f} min "
-                    f"({row['Clasificacion']})"
-                )
+            reportar_gaps(gaps)
+        else:
+            logger.info(f"⚠️  {len(gaps):,} gaps detectados (> {MAX_GAP_MINUTOS_TRADING} minutos)")
     else:
         logger.info("✅ No se detectaron gaps significativos")
 
@@ -243,13 +935,52 @@ def detectar_gaps(df, reportar_log=True):
 
     return gaps if len(gaps) > 0 else None
 
-def exportar_datos(df, filename):
+def reportar_gaps(gaps):
+    """
+    Clasifica los gaps y escribe el resumen en el log
+
+    Args:
+        gaps: DataFrame con columnas DateTime y TimeDiff (se le añaden
+            GapMinutos y Clasificacion)
+    """
+    logger.info(f"⚠️  {len(gaps):,} gaps detectados (> {MAX_GAP_MINUTOS_TRADING} minutos)")
+
+    # Convertir gaps a minutos
+    gaps['GapMinutos'] = gaps['TimeDiff'].dt.total_seconds() / 60
+
+    # Clasificar gaps
+    gaps['Clasificacion'] = gaps['GapMinutos'].apply(
+        lambda x: 'Cierre diario' if x <= 120  # 2 horas
+        else 'Fin de semana' if x <= 4320  # 72 horas
+        else 'Gap largo'
+    )
+
+    # Resumir por clasificación
+    clasificacion_counts = gaps['Clasificacion'].value_counts()
+    logger.info("\n📊 Clasificación de gaps:")
+    for clasificacion, count in clasificacion_counts.items():
+        logger.info(f"   {clasificacion}: {count:,}")
+
+    # Mostrar los 10 gaps más largos
+    logger.info("\n📋 Top 10 gaps más largos:")
+    top_gaps = gaps.nlargest(10, 'GapMinutos')
+    for idx, row in top_gaps.iterrows():
+        logger.info(
+            f"   {row['DateTime']} - Gap: {row['GapMinutos']:.0f} min "
+            f"({row['Clasificacion']})"
+        )
+
+def exportar_datos(df, filename, desde=None):
     """
     Exporta datos a archivos CSV
 
     Args:
         df: DataFrame a exportar
         filename: Nombre base del archivo (sin extensión)
+        desde: Último DateTime ya exportado cuando el cambio solo añade
+            registros posteriores (ver manifiesto_datos.fin_si_solo_anexa);
+            entonces solo se anexan las filas nuevas a los archivos
+            existentes. None = reescritura completa
     """
     logger.info("\n" + "="*80)
     logger.info("EXPORTANDO DATOS")
@@ -259,16 +990,30 @@ def exportar_datos(df, filename):
     OUTPUT_PATH.mkdir(parents=True, exist_ok=True)
     PROCESSED_PATH.mkdir(parents=True, exist_ok=True)
 
-    # Exportar versión original (con todos los datos incluidos inválidos)
     output_file_orig = OUTPUT_PATH / f"{filename}.csv"
-    df.to_csv(output_file_orig, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    output_file_clean = PROCESSED_PATH / f"{filename}_Limpio.csv"
+    output_file_excel = PROCESSED_PATH / f"{filename}_Excel.csv" if EXPORTAR_FORMATO_EXCEL else None
+
+    # Anexar solo si los archivos publicados terminan justo donde empieza el cambio
+    anexar = (
+        desde is not None and
+        all(r.exists() for r in (output_file_clean, output_file_excel) if r is not None) and
+        ultimo_timestamp_csv(output_file_orig) == pd.Timestamp(desde)
+    )
+    if desde is not None and not anexar:
+        logger.warning(f"⚠️  El consolidado publicado no termina en {desde}: reescritura completa")
+    df_exportar = df[df['DateTime'] > pd.Timestamp(desde)] if anexar else df
+
+    # Exportar versión original (con todos los datos incluidos inválidos)
+    exportar_por_bloques(df_exportar, ruta_iso=output_file_orig, anexar=anexar)
     logger.info(f"✅ Archivo original guardado: {output_file_orig}")
     logger.info(f"   ({len(df):,} registros, incluye columna 'Valid')")
 
     # Exportar versión limpia (solo datos válidos)
     df_limpio = df[df['Valid']].drop(columns=['Valid'])
-    output_file_clean = PROCESSED_PATH / f"{filename}_Limpio.csv"
-    df_limpio.to_csv(output_file_clean, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    limpio_exportar = df_exportar[df_exportar['Valid']].drop(columns=['Valid'])
+    exportar_por_bloques(limpio_exportar, ruta_iso=output_file_clean, ruta_excel=output_file_excel,
+                         anexar=anexar)
     logger.info(f"✅ Archivo limpio guardado: {output_file_clean}")
     logger.info(f"   ({len(df_limpio):,} registros)")
 
@@ -304,12 +1049,28 @@ def main():
     Función principal
     """
     try:
-        # 1. Consolidar datos
+        if MODO_STREAMING:
+            # Consolidación incremental en una pasada con memoria acotada
+            stats, manifiesto = consolidar_incremental_streaming()
+            if stats is None:
+                if len(manifiesto['archivos']) == 0:
+                    logger.error("❌ No se pudieron consolidar los datos")
+                return
+
+            # El manifiesto solo se guarda cuando las salidas ya están en su sitio
+            guardar_manifiesto(manifiesto, MANIFIESTO_PATH)
+            logger.info("\n" + "="*80)
+            logger.info("✅ CONSOLIDACIÓN COMPLETADA EXITOSAMENTE")
+            logger.info("="*80)
+            return
+
+        # 1. Consolidar datos (solo archivos nuevos/modificados según el manifiesto)
         logger.info("PASO 1/4: Consolidando archivos...")
-        df = consolidar_datos_minutos()
+        df, manifiesto = consolidar_incremental()
 
         if df is None:
-            logger.error("❌ No se pudieron consolidar los datos")
+            if len(manifiesto['archivos']) == 0:
+                logger.error("❌ No se pudieron consolidar los datos")
             return
 
         # 2. Validar datos
@@ -322,7 +1083,11 @@ def main():
 
         # 4. Exportar datos
         logger.info("\nPASO 4/4: Exportando datos...")
-        df_limpio = exportar_datos(df, "NQ_1min_2020-2025")
+        df_limpio = exportar_datos(df, NOMBRE_CONSOLIDADO)
+
+        # El manifiesto solo se guarda tras exportar, para que un fallo no
+        # marque como consolidados archivos que no llegaron a la salida
+        guardar_manifiesto(manifiesto, MANIFIESTO_PATH)
 
         logger.info("\n" + "="*80)
         logger.info("✅ CONSOLIDACIÓN COMPLETADA EXITOSAMENTE")
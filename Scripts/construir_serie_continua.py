@@ -0,0 +1,366 @@
+"""
+Script de Construcción de la Serie Continua NQ (Roll por Cruce de Volumen)
+Versión: 1.0
+Fecha: 2025-12-06
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Construye una serie continua de minutos "front month" a partir de los
+    contratos trimestrales individuales. En lugar de quedarse con el archivo
+    que se cargó primero cuando un minuto aparece en dos contratos
+    (drop_duplicates(keep='first')), la fecha de roll de cada trimestre se
+    determina por el cruce de volumen diario entre el contrato saliente y el
+    entrante:
+
+    1. Volumen diario por contrato (una sola agregación groupby)
+    2. Tabla de rolls: primer día en que el volumen del contrato entrante
+       supera al del saliente (o, sin solape, el inicio del entrante)
+    3. Selección O(n) con máscaras vectorizadas: cada fila se conserva si su
+       DateTime cae en la ventana [roll_entrada, roll_salida) de su contrato
+
+    Las ventanas son disjuntas, así que la serie resultante no necesita
+    deduplicarse.
+
+Fuentes admitidas (FUENTE):
+    'ninjatrader': un archivo por contrato en datos brutos/.../Minutos
+                   ('NQ 03-24.Last.txt' -> contrato 'NQ 03-24')
+    'databento':   Originales/NQ_1min_databento.csv (columna Symbol)
+
+Salida:
+    ../Originales/NQ_1min_2020-2025_Continuo.csv  (DateTime,OHLCV,Symbol)
+    ../Originales/NQ_1min_2020-2025_Rolls.csv     (log de rolls)
+    ../Originales/NQ_1min_2020-2025_Ajustes.csv   (tabla de back-adjustment,
+                                                   ver ajuste_rolls.py)
+    ../Procesados/multicontrato/NQ/               (todos los contratos, ver
+                                                   almacen_multicontrato.py)
+"""
+
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import logging
+
+from ajuste_rolls import calcular_tabla_ajustes, guardar_tabla_ajustes, AJUSTES_PATH
+from almacen_multicontrato import escribir_multicontrato
+from contratos_futuros import vencimiento_contrato
+from decodificador_timestamps import decodificar_fecha_hora
+from indice_sesiones import calcular_fechas_sesion, inicio_sesion_utc
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('../Logs/construir_serie_continua.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+DATOS_MINUTOS_PATH = Path("..") / "datos brutos" / "datos ninjatrader" / "Minutos"
+DATABENTO_FILE = Path("..") / "Originales" / "NQ_1min_databento.csv"
+OUTPUT_PATH = Path("..") / "Originales"
+NOMBRE_CONSOLIDADO = "NQ_1min_2020-2025"
+
+# 'ninjatrader' o 'databento'
+FUENTE = 'ninjatrader'
+
+# Almacén con todas las barras de todos los contratos (estudios de roll y
+# de estructura temporal sin releer los archivos brutos)
+PUBLICAR_MULTICONTRATO = True
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+COLUMNAS_SERIE = ['DateTime', 'Open', 'High', 'Low', 'Close', 'Volume', 'Symbol']
+
+def cargar_contratos_ninjatrader():
+    """
+    Carga los archivos de minutos de NinjaTrader, uno por contrato
+
+    Returns:
+        DataFrame con COLUMNAS_SERIE (Symbol tomado del nombre del archivo)
+        o None si no hay datos
+    """
+    archivos = sorted(DATOS_MINUTOS_PATH.glob("*.txt"))
+    logger.info(f"📂 Archivos de contrato encontrados: {len(archivos)}")
+
+    dfs = []
+    for filepath in archivos:
+        df = pd.read_csv(
+            filepath,
+            sep=';',
+            header=None,
+            names=['DateTimeStr', 'Open', 'High', 'Low', 'Close', 'Volume'],
+            dtype={'DateTimeStr': str}
+        )
+        df['DateTime'] = decodificar_fecha_hora(df['DateTimeStr'].to_numpy())
+
+        invalid_timestamps = df['DateTime'].isna().sum()
+        if invalid_timestamps > 0:
+            logger.warning(f"⚠️  {filepath.name}: {invalid_timestamps} timestamps inválidos")
+            df = df.dropna(subset=['DateTime'])
+
+        # 'NQ 03-24.Last.txt' -> 'NQ 03-24'
+        df['Symbol'] = filepath.name.split('.')[0]
+        dfs.append(df[COLUMNAS_SERIE])
+        logger.info(f"✅ {filepath.name}: {len(df):,} registros")
+
+    if len(dfs) == 0:
+        return None
+
+    return pd.concat(dfs, ignore_index=True)
+
+def cargar_contratos_databento():
+    """
+    Carga el consolidado de Databento generado por ingestar_databento_ohlcv.py
+
+    Returns:
+        DataFrame con COLUMNAS_SERIE o None si no existe
+    """
+    if not DATABENTO_FILE.exists():
+        logger.error(f"❌ No existe {DATABENTO_FILE}")
+        return None
+
+    df = pd.read_csv(DATABENTO_FILE, parse_dates=['DateTime'])
+    logger.info(f"✅ {DATABENTO_FILE.name}: {len(df):,} registros, "
+                f"{df['Symbol'].nunique()} contratos")
+    return df[COLUMNAS_SERIE]
+
+def calcular_volumen_diario(df):
+    """
+    Volumen diario por contrato (se calcula una sola vez)
+
+    Los días son sesiones CME (18:00-17:00 hora de Nueva York, ver
+    indice_sesiones.py), no días naturales UTC: así el cruce compara
+    sesiones completas y el roll cae en una apertura de sesión.
+
+    Args:
+        df: DataFrame con DateTime, Volume y Symbol
+
+    Returns:
+        DataFrame índice=fecha de sesión, columnas=contratos en orden de
+        vencimiento, con 0 en las sesiones sin negociación
+    """
+    sesion = pd.Series(
+        pd.DatetimeIndex(calcular_fechas_sesion(df['DateTime'])), index=df.index, name='Sesion'
+    )
+    volumen = (
+        df.groupby([sesion, 'Symbol'])['Volume']
+        .sum()
+        .unstack('Symbol', fill_value=0)
+    )
+    contratos = sorted(volumen.columns, key=vencimiento_contrato)
+    return volumen[contratos]
+
+def calcular_tabla_rolls(df, volumen_diario):
+    """
+    Determina la fecha de roll entre cada par de contratos consecutivos
+
+    El roll se produce la primera sesión (con negociación en ambos contratos)
+    en que el volumen del entrante supera al del saliente. Si no llega a
+    haber cruce, o los contratos no se solapan, el roll se sitúa en la
+    primera sesión del entrante posterior a la última del saliente. Fecha_Roll
+    es la fecha de sesión e Inicio su primera barra (18:01 de Nueva York del
+    día anterior, en UTC), de modo que ninguna sesión queda partida entre
+    dos contratos.
+
+    Args:
+        df: DataFrame con DateTime y Symbol
+        volumen_diario: Resultado de calcular_volumen_diario()
+
+    Returns:
+        DataFrame con una fila por contrato en orden de vencimiento:
+        Symbol, Inicio, Fin (ventana [Inicio, Fin) de la serie continua),
+        Fecha_Roll, Contrato_Anterior, Volumen_Saliente, Volumen_Entrante, Metodo
+    """
+    contratos = list(volumen_diario.columns)
+    ultima_barra = df.groupby('Symbol')['DateTime'].max()
+
+    filas = [{
+        'Symbol': contratos[0],
+        'Inicio': pd.NaT,
+        'Fecha_Roll': pd.NaT,
+        'Contrato_Anterior': None,
+        'Volumen_Saliente': np.nan,
+        'Volumen_Entrante': np.nan,
+        'Metodo': 'inicio_serie'
+    }]
+
+    for saliente, entrante in zip(contratos[:-1], contratos[1:]):
+        vol_sal = volumen_diario[saliente]
+        vol_ent = volumen_diario[entrante]
+
+        cruce = (vol_sal > 0) & (vol_ent > 0) & (vol_ent > vol_sal)
+        if cruce.any():
+            fecha_roll = cruce.idxmax()
+            metodo = 'cruce_volumen'
+        else:
+            fin_saliente = pd.Timestamp(calcular_fechas_sesion([ultima_barra[saliente]])[0])
+            posteriores = vol_ent[(vol_ent.index > fin_saliente) & (vol_ent > 0)]
+            if len(posteriores) == 0:
+                fecha_roll = vol_ent[vol_ent > 0].index[0]
+            else:
+                fecha_roll = posteriores.index[0]
+            solape = ((vol_sal > 0) & (vol_ent > 0)).any()
+            metodo = 'sin_cruce' if solape else 'sin_solape'
+
+        filas.append({
+            'Symbol': entrante,
+            'Inicio': inicio_sesion_utc([fecha_roll])[0],
+            'Fecha_Roll': fecha_roll,
+            'Contrato_Anterior': saliente,
+            'Volumen_Saliente': int(vol_sal.get(fecha_roll, 0)),
+            'Volumen_Entrante': int(vol_ent.get(fecha_roll, 0)),
+            'Metodo': metodo
+        })
+
+    tabla = pd.DataFrame(filas)
+    tabla[['Volumen_Saliente', 'Volumen_Entrante']] = (
+        tabla[['Volumen_Saliente', 'Volumen_Entrante']].astype('Int64')
+    )
+
+    # Los inicios deben ser crecientes: un roll que retrocede respecto al
+    # anterior deja al contrato intermedio sin ventana
+    tabla['Inicio'] = tabla['Inicio'].cummax()
+    tabla['Fin'] = tabla['Inicio'].shift(-1)
+
+    sin_ventana = tabla['Fin'].notna() & tabla['Inicio'].notna() & (tabla['Fin'] <= tabla['Inicio'])
+    for symbol in tabla.loc[sin_ventana, 'Symbol']:
+        logger.warning(f"⚠️  {symbol}: el roll siguiente no es posterior, el contrato queda sin ventana")
+
+    return tabla[['Symbol', 'Inicio', 'Fin', 'Fecha_Roll', 'Contrato_Anterior',
+                  'Volumen_Saliente', 'Volumen_Entrante', 'Metodo']]
+
+def seleccionar_front_month(df, tabla_rolls):
+    """
+    Selecciona las filas del contrato activo con máscaras vectorizadas
+
+    Cada fila obtiene la ventana de su contrato mediante los códigos
+    categóricos de Symbol (búsqueda por índice, sin joins), y se conserva
+    si Inicio <= DateTime < Fin.
+
+    Args:
+        df: DataFrame con COLUMNAS_SERIE
+        tabla_rolls: Resultado de calcular_tabla_rolls()
+
+    Returns:
+        DataFrame continuo ordenado por DateTime
+    """
+    contratos = tabla_rolls['Symbol'].tolist()
+    codigos = pd.Categorical(df['Symbol'], categories=contratos).codes
+
+    # Límites de cada contrato; los extremos abiertos se sustituyen por los
+    # valores mínimo/máximo de datetime64 para comparar sin casos especiales
+    minimo = np.datetime64(pd.Timestamp.min.ceil('s'), 'ns')
+    maximo = np.datetime64(pd.Timestamp.max.floor('s'), 'ns')
+    inicios = tabla_rolls['Inicio'].to_numpy(dtype='datetime64[ns]').copy()
+    fines = tabla_rolls['Fin'].to_numpy(dtype='datetime64[ns]').copy()
+    inicios[np.isnat(inicios)] = minimo
+    fines[np.isnat(fines)] = maximo
+
+    timestamps = df['DateTime'].to_numpy(dtype='datetime64[ns]')
+    conocido = codigos >= 0
+    codigos_seguros = np.where(conocido, codigos, 0)
+
+    mascara = (
+        conocido &
+        (timestamps >= inicios[codigos_seguros]) &
+        (timestamps < fines[codigos_seguros])
+    )
+
+    serie = df[mascara].sort_values('DateTime', kind='stable').reset_index(drop=True)
+
+    if not serie['DateTime'].is_unique:
+        logger.warning("⚠️  Timestamps repetidos dentro de un mismo contrato en la serie continua")
+
+    logger.info(f"📊 Registros seleccionados: {len(serie):,} de {len(df):,} "
+                f"({len(df) - len(serie):,} de contratos no activos)")
+    return serie
+
+def exportar_serie(serie, tabla_rolls, filename=NOMBRE_CONSOLIDADO):
+    """
+    Exporta la serie continua y el log de rolls junto al consolidado NQ_1min
+
+    Args:
+        serie: DataFrame continuo
+        tabla_rolls: Tabla de rolls
+        filename: Nombre base del consolidado de minutos
+    """
+    OUTPUT_PATH.mkdir(parents=True, exist_ok=True)
+
+    output_serie = OUTPUT_PATH / f"{filename}_Continuo.csv"
+    serie.to_csv(output_serie, index=False, date_format=FORMATO_FECHA)
+    logger.info(f"✅ Serie continua guardada: {output_serie}")
+
+    output_rolls = OUTPUT_PATH / f"{filename}_Rolls.csv"
+    registros = serie.groupby('Symbol').size()
+    log_rolls = tabla_rolls.assign(Registros=tabla_rolls['Symbol'].map(registros).fillna(0).astype(int))
+    log_rolls.to_csv(output_rolls, index=False, date_format=FORMATO_FECHA)
+    logger.info(f"✅ Log de rolls guardado: {output_rolls}")
+
+def construir_serie_continua(df):
+    """
+    Construye la serie continua front-month a partir de todos los contratos
+
+    Args:
+        df: DataFrame con COLUMNAS_SERIE (varios contratos)
+
+    Returns:
+        Tupla (serie, tabla_rolls)
+    """
+    volumen_diario = calcular_volumen_diario(df)
+    logger.info(f"📊 Contratos: {', '.join(volumen_diario.columns)}")
+
+    tabla_rolls = calcular_tabla_rolls(df, volumen_diario)
+
+    logger.info("\n📋 Tabla de rolls:")
+    for _, roll in tabla_rolls.iloc[1:].iterrows():
+        logger.info(
+            f"   {roll['Contrato_Anterior']} -> {roll['Symbol']}: "
+            f"{roll['Fecha_Roll'].date()} ({roll['Metodo']})"
+        )
+
+    serie = seleccionar_front_month(df, tabla_rolls)
+    return serie, tabla_rolls
+
+def main():
+    """
+    Función principal
+    """
+    try:
+        logger.info("="*80)
+        logger.info("CONSTRUCCIÓN DE LA SERIE CONTINUA NQ")
+        logger.info("="*80)
+        logger.info(f"Fuente: {FUENTE}")
+
+        if FUENTE == 'databento':
+            df = cargar_contratos_databento()
+        else:
+            df = cargar_contratos_ninjatrader()
+
+        if df is None:
+            logger.error("❌ No se cargaron datos")
+            return
+
+        serie, tabla_rolls = construir_serie_continua(df)
+        exportar_serie(serie, tabla_rolls)
+
+        # Los precios se guardan sin ajustar: el back-adjustment se aplica al leer
+        guardar_tabla_ajustes(calcular_tabla_ajustes(df, tabla_rolls), AJUSTES_PATH)
+
+        if PUBLICAR_MULTICONTRATO:
+            escribir_multicontrato(df)
+
+        logger.info("\n" + "="*80)
+        logger.info("✅ SERIE CONTINUA COMPLETADA EXITOSAMENTE")
+        logger.info("="*80)
+
+    except Exception as e:
+        logger.error(f"❌ Error en ejecución principal: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Etiquetas y Vencimientos de los Contratos Trimestrales
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Funciones comunes a la ingesta de Databento, la serie continua y el
+    almacén multicontrato para nombrar y ordenar contratos:
+
+    - Etiqueta NinjaTrader 'NQ 03-21' (la que usa todo el sistema)
+    - Símbolo CME/Databento 'NQH1' (raíz + código de mes + dígito de año)
+
+    Los scripts que las usaban configuran el logging a archivo al
+    importarse; este módulo no tiene efectos secundarios y se puede
+    importar desde cualquier otro.
+"""
+
+import re
+
+# Meses de vencimiento trimestrales del NQ (normalizaciondatos.md)
+CODIGOS_MES = {'H': 3, 'M': 6, 'U': 9, 'Z': 12}
+
+# Etiqueta NinjaTrader: raíz + 'MM-AA'
+PATRON_ETIQUETA = re.compile(r'^(?P<raiz>[A-Z]+) (?P<mes>\d{2})-(?P<anio>\d{2})$')
+
+# Símbolo outright: raíz + código de mes + dígito de año (NQH1, MNQZ0)
+PATRON_CONTRATO = re.compile(r'^([A-Z]+?)([HMUZ])(\d)$')
+
+def vencimiento_contrato(symbol):
+    """
+    Clave de orden cronológico de un contrato 'NQ MM-AA'
+
+    Args:
+        symbol: Etiqueta del contrato, p.ej. 'NQ 03-24'
+
+    Returns:
+        Tupla (año, mes), p.ej. (2024, 3)
+
+    Raises:
+        ValueError: si la etiqueta no tiene el formato 'RAIZ MM-AA'
+    """
+    coincidencia = PATRON_ETIQUETA.match(symbol)
+    if coincidencia is None:
+        raise ValueError(f"Etiqueta de contrato no reconocida: '{symbol}' (formato 'NQ MM-AA')")
+    return 2000 + int(coincidencia['anio']), int(coincidencia['mes'])
+
+def etiqueta_contrato(symbol, anio_referencia):
+    """
+    Traduce un símbolo Databento a la etiqueta de contrato NinjaTrader
+
+    El símbolo solo trae el último dígito del año; la década se toma de la
+    fecha de los datos: es el primer año >= anio_referencia con ese dígito
+    (un contrato nunca vence antes de cotizar).
+
+    Args:
+        symbol: Símbolo outright, p.ej. 'NQH1'
+        anio_referencia: Año de la fecha de los datos, p.ej. 2020
+
+    Returns:
+        Etiqueta 'NQ 03-21' o None si el símbolo no es un contrato trimestral
+    """
+    match = PATRON_CONTRATO.match(symbol)
+    if match is None:
+        return None
+
+    raiz, codigo_mes, digito_anio = match.groups()
+    anio = anio_referencia - anio_referencia % 10 + int(digito_anio)
+    if anio < anio_referencia:
+        anio += 10
+
+    return f"{raiz} {CODIGOS_MES[codigo_mes]:02d}-{anio % 100:02d}"
@@ -0,0 +1,192 @@
+"""
+Decodificador Vectorizado de Timestamps (NinjaTrader y Databento)
+Versión: 1.0
+Fecha: 2025-12-05
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Convierte los campos de fecha/hora de las exportaciones de NinjaTrader
+    ('YYYYMMDD HHMMSS' en minutos, YYYYMMDD en diarios) y de Databento
+    (ts_event ISO 8601 con nanosegundos) a arrays datetime64 sin parsear
+    fila a fila: los dígitos se leen como enteros y la fecha se construye
+    con aritmética de NumPy.
+
+    Las fechas imposibles (mes 13, 30 de febrero, hora 25...) se devuelven
+    como NaT, de modo que los consolidadores las cuentan y eliminan en su
+    ruta habitual de "timestamps inválidos".
+"""
+
+import numpy as np
+
+# Rango de años admitido (datetime64[ns] desborda fuera de ~1678-2262)
+ANIO_MIN = 1900
+ANIO_MAX = 2200
+
+_CERO = ord('0')
+_ESPACIO = ord(' ')
+
+# Plantilla ISO de Databento: 2020-10-09T03:15:00.000000000Z
+_ISO_SEPARADORES = {4: '-', 7: '-', 10: 'T', 13: ':', 16: ':', 19: '.', 29: 'Z'}
+_ISO_DIGITOS = [i for i in range(29) if i not in _ISO_SEPARADORES]
+
+def enteros_a_datetime64(yyyymmdd, hhmmss=None):
+    """
+    Construye un array datetime64[ns] a partir de enteros YYYYMMDD y HHMMSS
+
+    Args:
+        yyyymmdd: Array de enteros con la fecha (p.ej. 20231217)
+        hhmmss: Array de enteros con la hora (p.ej. 214600) o None
+
+    Returns:
+        Array datetime64[ns] con NaT en las posiciones inválidas
+    """
+    yyyymmdd = np.asarray(yyyymmdd, dtype=np.int64)
+
+    anio = yyyymmdd // 10000
+    mes = (yyyymmdd // 100) % 100
+    dia = yyyymmdd % 100
+
+    validos = (
+        (anio >= ANIO_MIN) & (anio <= ANIO_MAX) &
+        (mes >= 1) & (mes <= 12) &
+        (dia >= 1)
+    )
+
+    # Meses desde 1970-01 (se usa 0 en las filas inválidas para no desbordar)
+    meses = np.where(validos, (anio - 1970) * 12 + (mes - 1), 0)
+    inicio_mes = meses.astype('datetime64[M]').astype('datetime64[D]')
+    fin_mes = (meses + 1).astype('datetime64[M]').astype('datetime64[D]')
+    dias_en_mes = (fin_mes - inicio_mes).astype(np.int64)
+    validos &= dia <= dias_en_mes
+
+    fechas = (inicio_mes + np.where(validos, dia - 1, 0)).astype('datetime64[ns]')
+
+    if hhmmss is not None:
+        hhmmss = np.asarray(hhmmss, dtype=np.int64)
+        hora = hhmmss // 10000
+        minuto = (hhmmss // 100) % 100
+        segundo = hhmmss % 100
+
+        validos &= (
+            (hhmmss >= 0) &
+            (hora <= 23) & (minuto <= 59) & (segundo <= 59)
+        )
+
+        segundos_dia = np.where(validos, hora * 3600 + minuto * 60 + segundo, 0)
+        fechas = fechas + segundos_dia.astype('timedelta64[s]')
+
+    fechas[~validos] = np.datetime64('NaT')
+    return fechas
+
+def _matriz_bytes(valores, ancho):
+    """
+    Convierte una secuencia de textos en una matriz (n, ancho) de bytes ASCII
+
+    Los textos más cortos quedan rellenos con ceros y los no ASCII con '?',
+    así cualquier campo mal formado falla la validación de formato.
+    """
+    try:
+        texto = np.asarray(valores, dtype=object).astype(f'S{ancho}')
+    except UnicodeEncodeError:
+        texto = np.array(
+            [str(v).encode('ascii', errors='replace') for v in valores],
+            dtype=f'S{ancho}'
+        )
+    return texto.view(np.uint8).reshape(-1, ancho)
+
+def _combinar_digitos(digitos):
+    """Combina columnas de dígitos (n, k) en un entero por fila"""
+    pesos = 10 ** np.arange(digitos.shape[1] - 1, -1, -1, dtype=np.int64)
+    return digitos @ pesos
+
+def decodificar_fecha_hora(valores):
+    """
+    Decodifica campos 'YYYYMMDD HHMMSS' de los archivos de minutos
+
+    Los textos se reinterpretan como una matriz de bytes de ancho fijo y los
+    dígitos se combinan con un producto matricial, sin strptime por fila.
+
+    Args:
+        valores: Secuencia de textos 'YYYYMMDD HHMMSS'
+
+    Returns:
+        Array datetime64[ns] con NaT en los campos mal formados o imposibles
+    """
+    # 15 caracteres + 1 byte extra para detectar textos demasiado largos
+    bytes_ = _matriz_bytes(valores, 16)
+    digitos = bytes_.astype(np.int64) - _CERO
+
+    posiciones_digitos = np.r_[0:8, 9:15]
+    formato_ok = (
+        ((digitos[:, posiciones_digitos] >= 0) &
+         (digitos[:, posiciones_digitos] <= 9)).all(axis=1) &
+        (bytes_[:, 8] == _ESPACIO) &
+        (bytes_[:, 15] == 0)
+    )
+
+    yyyymmdd = _combinar_digitos(digitos[:, 0:8])
+    hhmmss = _combinar_digitos(digitos[:, 9:15])
+
+    # Un campo mal formado se convierte en una fecha imposible (-> NaT)
+    yyyymmdd = np.where(formato_ok, yyyymmdd, 0)
+
+    return enteros_a_datetime64(yyyymmdd, hhmmss)
+
+def decodificar_fecha(valores):
+    """
+    Decodifica campos YYYYMMDD de los archivos diarios
+
+    Args:
+        valores: Secuencia de enteros (o textos numéricos) YYYYMMDD
+
+    Returns:
+        Array datetime64[ns] con NaT en las fechas imposibles o no numéricas
+    """
+    numeros = np.asarray(valores)
+
+    if numeros.dtype.kind == 'f':
+        # Una columna entera con algún NaN se lee como float (20230101.0):
+        # los valores finitos y enteros se conservan, el resto -> 0 (NaT)
+        with np.errstate(invalid='ignore'):
+            enteros = (np.abs(numeros) < 2**53) & (numeros == np.floor(numeros))
+        numeros = np.where(enteros, numeros, 0).astype(np.int64)
+    elif numeros.dtype.kind not in 'iu':
+        # Columna no entera (textos, NaN...): lo que no sea un entero -> 0
+        numeros = np.array([
+            int(v) if str(v).isdigit() else 0 for v in numeros
+        ], dtype=np.int64)
+
+    return enteros_a_datetime64(numeros)
+
+def decodificar_iso_ns(valores):
+    """
+    Decodifica timestamps ISO 8601 UTC con nanosegundos de Databento
+
+    Formato esperado: '2020-10-09T03:15:00.000000000Z'. El resultado es
+    datetime64[ns] sin zona horaria (UTC), igual que el resto de salidas.
+
+    Args:
+        valores: Secuencia de textos ts_event
+
+    Returns:
+        Array datetime64[ns] con NaT en los campos mal formados o imposibles
+    """
+    # 30 caracteres + 1 byte extra para detectar textos demasiado largos
+    bytes_ = _matriz_bytes(valores, 31)
+    digitos = bytes_.astype(np.int64) - _CERO
+
+    formato_ok = (
+        ((digitos[:, _ISO_DIGITOS] >= 0) & (digitos[:, _ISO_DIGITOS] <= 9)).all(axis=1) &
+        (bytes_[:, 30] == 0)
+    )
+    for posicion, separador in _ISO_SEPARADORES.items():
+        formato_ok &= bytes_[:, posicion] == ord(separador)
+
+    yyyymmdd = _combinar_digitos(digitos[:, np.r_[0:4, 5:7, 8:10]])
+    hhmmss = _combinar_digitos(digitos[:, np.r_[11:13, 14:16, 17:19]])
+    nanosegundos = _combinar_digitos(digitos[:, 20:29])
+
+    yyyymmdd = np.where(formato_ok, yyyymmdd, 0)
+
+    fechas = enteros_a_datetime64(yyyymmdd, hhmmss)
+    return fechas + np.where(formato_ok, nanosegundos, 0).astype('timedelta64[ns]')
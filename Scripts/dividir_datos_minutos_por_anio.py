@@ -5,17 +5,24 @@ Fecha: 2025-12-04
 Autor: Sistema Backtesting NASDAQ
 
 Descripción:
-    Divide el archivo consolidado de datos de minutos en archivos separados
-    por año para facilitar el manejo y reducir el tamaño de los archivos.
+    Divide el archivo consolidado de datos de minutos por año en CSV
+    anuales y lo publica también en el almacén Parquet particionado por
+    instrumento/año/mes (almacen_barras.py, se lee con cargar_barras()) y
+    en binario por columnas (barras_memmap.py) para abrirlo con np.memmap.
 
 Entrada: ../Procesados/NQ_1min_2020-2025_Limpio.csv
-Salida: ../Procesados/YYYY/NQ_1min_YYYY.csv (un archivo por año)
+Salida: ../Procesados/almacen/instrument=NQ/year=YYYY/month=M/*.parquet
+        ../Procesados/memmap/NQ/gNNNNNN/*.int64|*.int32 (PUBLICAR_MEMMAP)
+        ../Procesados/YYYY/NQ_1min_YYYY.csv (GENERAR_CSV_ANUALES)
 """
 
-import pandas as pd
 from pathlib import Path
 import logging
 
+from almacen_barras import escribir_almacen, ALMACEN_PATH
+from barras_memmap import escribir_barras_memmap
+from lector_minutos import leer_minutos
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,6 +39,11 @@ logger = logging.getLogger(__name__)
 ARCHIVO_CONSOLIDADO = Path("..") / "Procesados" / "NQ_1min_2020-2025_Limpio.csv"
 OUTPUT_BASE_PATH = Path("..") / "Procesados"
 
+# CSV anuales Procesados/YYYY/NQ_1min_YYYY.csv (False = solo almacén y memmap)
+GENERAR_CSV_ANUALES = True
+# Histórico completo en binario por columnas (np.memmap)
+PUBLICAR_MEMMAP = True
+
 def cargar_datos_consolidados():
     """
     Carga el archivo consolidado de datos de minutos
@@ -46,11 +58,8 @@ def cargar_datos_consolidados():
     try:
         logger.info(f"Leyendo archivo: {ARCHIVO_CONSOLIDADO}")
 
-        # Leer CSV con parsing de datetime
-        df = pd.read_csv(
-            ARCHIVO_CONSOLIDADO,
-            parse_dates=['DateTime']
-        )
+        # Lectura por bloques con tipos reducidos (float32/int32)
+        df = leer_minutos(ARCHIVO_CONSOLIDADO)
 
         logger.info(f"Archivo cargado exitosamente: {len(df):,} registros")
         logger.info(f"Rango temporal: {df['DateTime'].min()} a {df['DateTime'].max()}")
@@ -61,12 +70,14 @@ def cargar_datos_consolidados():
         logger.error(f"Error al cargar archivo: {str(e)}")
         return None
 
-def dividir_por_anios(df):
+def dividir_por_anios(df, anios=None):
     """
-    Divide el DataFrame por años y guarda cada año en un archivo separado
+    Divide el DataFrame por años y publica cada año en el almacén Parquet
+    y en su CSV anual (GENERAR_CSV_ANUALES)
 
     Args:
         df: DataFrame con todos los datos de minutos
+        anios: Años a regenerar (None = todos); el resto de archivos no se toca
     """
     logger.info("\n" + "="*80)
     logger.info("DIVIDIENDO DATOS POR AÑOS")
@@ -79,6 +90,20 @@ def dividir_por_anios(df):
     years = sorted(df['Year'].unique())
     logger.info(f"Años encontrados: {years}")
 
+    if anios is not None:
+        years = [year for year in years if year in set(anios)]
+        logger.info(f"Años a regenerar: {years}")
+
+    # Publicar en el almacén columnar (un año se reescribe completo)
+    escribir_almacen(df.drop(columns=['Year']), anios=years)
+
+    # El binario siempre contiene el histórico completo
+    if PUBLICAR_MEMMAP:
+        escribir_barras_memmap(df.drop(columns=['Year']))
+
+    if not GENERAR_CSV_ANUALES:
+        return
+
     # Procesar cada año
     for year in years:
         logger.info(f"\nProcesando año {year}...")
@@ -166,10 +191,12 @@ def main():
         logger.info("\n" + "="*80)
         logger.info("DIVISIÓN COMPLETADA EXITOSAMENTE")
         logger.info("="*80)
-        logger.info("\nArchivos generados en:")
-        for year in sorted(df['Year'].unique()):
-            output_file = OUTPUT_BASE_PATH / str(year) / f"NQ_1min_{year}.csv"
-            logger.info(f"  {output_file}")
+        logger.info(f"\nAlmacén actualizado en: {ALMACEN_PATH}")
+        if GENERAR_CSV_ANUALES:
+            logger.info("\nArchivos generados en:")
+            for year in sorted(df['Year'].unique()):
+                output_file = OUTPUT_BASE_PATH / str(year) / f"NQ_1min_{year}.csv"
+                logger.info(f"  {output_file}")
 
     except Exception as e:
         logger.error(f"Error en ejecución principal: {str(e)}")
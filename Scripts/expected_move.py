@@ -0,0 +1,227 @@
+"""
+Promedios de Rango Alcista/Bajista y Expected Move en O(n)
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Cálculo compartido por fase1_calcular_niveles.py y
+    fase1_agregar_expected_move_excel.py de los promedios de la fórmula
+    RyFEM.cs (EMH/EML se evalúan con la familia 'expected_move' de
+    registro_niveles.py):
+
+        BullishAvg = media de Range de los días alcistas de los N anteriores
+        BearishAvg = media de Range de los días bajistas de los N anteriores
+        EMH = Open + BullishAvg * RANGE_MULTIPLIER
+        EML = Open - BearishAvg * RANGE_MULTIPLIER
+
+    En lugar de recortar la ventana con iloc y filtrarla en cada día
+    (O(días x lookback)), se acumulan una sola vez los rangos enmascarados
+    (alcistas / bajistas) y sus conteos; la suma de la ventana de cada día
+    es la diferencia de dos sumas acumuladas (O(días)).
+
+    Exactitud:
+    - Los rangos del NQ son múltiplos de 0.25: se acumulan como enteros de
+      ticks (int64), así que cada suma de ventana es exacta y la media
+      (suma / conteo) es idéntica bit a bit a la de pandas sobre el slice
+    - Con rangos fuera de la rejilla (p.ej. back-adjustment por ratio) se
+      acumulan en float64 y la media puede diferir en el último bit
+
+    barrido_expected_move() reutiliza las mismas sumas acumuladas para una
+    rejilla completa de lookbacks x multiplicadores (p.ej. 2-100 x varios
+    RANGE_MULTIPLIER) y devuelve EMH/EML apilados y las tasas de toque y de
+    cierre más allá de cada combinación, en lugar de ejecutar el pipeline
+    una vez por configuración (EM9, EM21, ...).
+
+Uso:
+    from expected_move import promedios_rangos
+    from registro_niveles import aplicar_familias
+    promedios = promedios_rangos(df['Range'], df['IsBullish'], lookback=21)
+    df = df.assign(**promedios)
+    df = aplicar_familias(df, ['expected_move'], {'Multiplicador': 0.682})
+
+    barrido = barrido_expected_move(df, lookbacks=range(2, 101),
+                                    multiplicadores=[0.5, 0.682, 1.0])
+    barrido['tasas'].pivot(index='Lookback', columns='Multiplicador', values='Toca_EMH')
+"""
+
+import numpy as np
+import pandas as pd
+
+from precios_tick import TICKS_POR_PUNTO
+from registro_niveles import evaluar_familias
+
+RANGE_MULTIPLIER = 0.682
+LOOKBACK_DEFECTO = 21
+
+# Por encima de este valor los ticks acumulados dejarían de ser exactos en float64
+_MAXIMO_TICKS_EXACTO = 2**52
+
+def _sumas_acumuladas(valores):
+    """Suma acumulada con un cero inicial: suma(a:b) = acumulada[b] - acumulada[a]"""
+    return np.concatenate([np.zeros(1, dtype=valores.dtype), np.cumsum(valores)])
+
+def _suma_ventanas(acumulada, lookbacks, filas):
+    """
+    Suma de los L valores anteriores a cada fila, para varios L a la vez
+
+    Returns:
+        Array (lookbacks x filas) con 0 en las filas sin ventana completa
+    """
+    fin = np.arange(filas)
+    inicio = fin[None, :] - np.asarray(lookbacks, dtype=np.int64)[:, None]
+    suma = acumulada[fin][None, :] - acumulada[np.maximum(inicio, 0)]
+    return np.where(inicio >= 0, suma, 0)
+
+def _promedios_ventanas(rangos, alcistas, lookbacks):
+    """
+    Medias y conteos alcistas/bajistas para cada lookback (lookbacks x filas)
+
+    Ver promedios_rangos() para la semántica de cada columna.
+    """
+    rangos = np.asarray(rangos, dtype=np.float64)
+    alcistas = np.asarray(alcistas, dtype=bool)
+    filas = len(rangos)
+
+    # Los conteos incluyen días con Range NaN (como len() del slice); las
+    # medias los ignoran (como mean())
+    validos = ~np.isnan(rangos)
+    ticks = np.where(validos, rangos, 0.0) * TICKS_POR_PUNTO
+    exacto = (
+        np.array_equal(ticks, np.floor(ticks))
+        and np.abs(ticks).sum() < _MAXIMO_TICKS_EXACTO
+    )
+    if exacto:
+        ticks = ticks.astype(np.int64)
+
+    resultado = {}
+    for nombre, mascara in (('Bullish', alcistas), ('Bearish', ~alcistas)):
+        conteo = _suma_ventanas(_sumas_acumuladas(mascara.astype(np.int64)), lookbacks, filas)
+        conteo_validos = _suma_ventanas(_sumas_acumuladas((mascara & validos).astype(np.int64)), lookbacks, filas)
+        suma = _suma_ventanas(_sumas_acumuladas(np.where(mascara, ticks, 0)), lookbacks, filas)
+
+        # Ticks -> puntos es exacto (división por 4)
+        suma = suma.astype(np.float64) / TICKS_POR_PUNTO
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = np.where(conteo_validos > 0, suma / conteo_validos, np.nan)
+        media = np.where(conteo > 0, media, 0.0)
+
+        resultado[f'{nombre}Avg'] = media
+        resultado[f'{nombre}Count'] = conteo
+    return resultado
+
+def promedios_rangos(rangos, alcistas, lookback=LOOKBACK_DEFECTO):
+    """
+    Media de rangos alcistas y bajistas de los `lookback` días anteriores
+
+    Args:
+        rangos: Array/Series con el Range (High - Low) de cada día
+        alcistas: Array/Series booleano (Close > Open)
+        lookback: Número de días anteriores de la ventana (sin el día actual)
+
+    Returns:
+        Diccionario con BullishAvg y BearishAvg (float64, 0.0 sin días del
+        tipo o sin ventana completa) y BullishCount y BearishCount (int64)
+    """
+    return {columna: valores[0] for columna, valores in _promedios_ventanas(rangos, alcistas, [lookback]).items()}
+
+def barrido_expected_move(df, lookbacks=range(2, 101), multiplicadores=(RANGE_MULTIPLIER,),
+                          redondear=True, dias_comunes=True):
+    """
+    EMH/EML para todas las combinaciones lookback x multiplicador en una llamada
+
+    Las sumas acumuladas se calculan una sola vez y sirven a todos los
+    lookbacks; EMH/EML se obtienen con un broadcast (lookbacks x
+    multiplicadores x días). Para una combinación dada los valores son
+    idénticos a los de fase1_calcular_niveles.py con ese lookback y
+    RANGE_MULTIPLIER.
+
+    Tasas por combinación (sobre los días evaluados):
+        Toca_EMH: High >= EMH          Toca_EML: Low <= EML
+        Toca_Ambos: las dos anteriores
+        Cierre_Sobre_EMH: Close > EMH  Cierre_Bajo_EML: Close < EML
+
+    Args:
+        df: DataFrame diario con Open, High, Low y Close (en orden cronológico)
+        lookbacks: Lookbacks a evaluar (días)
+        multiplicadores: Valores de RANGE_MULTIPLIER a evaluar
+        redondear: Redondear EMH/EML al cuarto superior (como RyFEM.cs)
+        dias_comunes: Evaluar todas las combinaciones sobre los mismos días
+            (los que tienen ventana completa para el mayor lookback), para
+            que las tasas sean comparables; si es False cada lookback usa
+            todos sus días con ventana completa
+
+    Returns:
+        Diccionario con:
+            'lookbacks', 'multiplicadores': ejes (arrays)
+            'EMH', 'EML': arrays (lookbacks x multiplicadores x días), NaN en
+                los días sin ventana completa
+            'tasas': DataFrame con Lookback, Multiplicador, Dias y las tasas
+                (fracción 0-1) de cada combinación
+    """
+    lookbacks = np.asarray(list(lookbacks), dtype=np.int64)
+    multiplicadores = np.asarray(list(multiplicadores), dtype=np.float64)
+    if len(lookbacks) == 0 or len(multiplicadores) == 0:
+        raise ValueError("Se necesita al menos un lookback y un multiplicador")
+    if lookbacks.min() < 1:
+        raise ValueError(f"Lookback no válido: {lookbacks.min()} (mínimo 1 día)")
+
+    aperturas = df['Open'].to_numpy(dtype=np.float64)
+    maximos = df['High'].to_numpy(dtype=np.float64)
+    minimos = df['Low'].to_numpy(dtype=np.float64)
+    cierres = df['Close'].to_numpy(dtype=np.float64)
+    filas = len(df)
+
+    promedios = _promedios_ventanas(maximos - minimos, cierres > aperturas, lookbacks)
+
+    # Familia 'expected_move' con broadcast:
+    # (lookbacks x 1 x días) * (1 x multiplicadores x 1)
+    niveles = evaluar_familias({
+        'Open': aperturas[None, None, :],
+        'BullishAvg': promedios['BullishAvg'][:, None, :],
+        'BearishAvg': promedios['BearishAvg'][:, None, :],
+        'Multiplicador': multiplicadores[None, :, None],
+    }, ['expected_move'])
+    if redondear:
+        emh, eml = niveles['EMH'], niveles['EML']
+    else:
+        emh, eml = niveles['EMH_Raw'], niveles['EML_Raw']
+
+    dia = np.arange(filas)
+    con_ventana = dia[None, :] >= lookbacks[:, None]
+    emh = np.where(con_ventana[:, None, :], emh, np.nan)
+    eml = np.where(con_ventana[:, None, :], eml, np.nan)
+
+    if dias_comunes:
+        evaluados = np.broadcast_to(dia >= lookbacks.max(), con_ventana.shape)
+    else:
+        evaluados = con_ventana
+    evaluados = evaluados[:, None, :]
+    dias = np.broadcast_to(evaluados.sum(axis=2), (len(lookbacks), len(multiplicadores)))
+
+    toca_emh = (maximos >= emh) & evaluados
+    toca_eml = (minimos <= eml) & evaluados
+    indicadores = {
+        'Toca_EMH': toca_emh,
+        'Toca_EML': toca_eml,
+        'Toca_Ambos': toca_emh & toca_eml,
+        'Cierre_Sobre_EMH': (cierres > emh) & evaluados,
+        'Cierre_Bajo_EML': (cierres < eml) & evaluados,
+    }
+
+    tasas = {
+        'Lookback': np.repeat(lookbacks, len(multiplicadores)),
+        'Multiplicador': np.tile(multiplicadores, len(lookbacks)),
+        'Dias': dias.ravel(),
+    }
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for nombre, indicador in indicadores.items():
+            tasas[nombre] = (indicador.sum(axis=2) / dias).ravel()
+
+    return {
+        'lookbacks': lookbacks,
+        'multiplicadores': multiplicadores,
+        'EMH': emh,
+        'EML': eml,
+        'tasas': pd.DataFrame(tasas),
+    }
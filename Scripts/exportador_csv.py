@@ -0,0 +1,235 @@
+"""
+Exportador CSV por Bloques (formato ISO y formato Excel)
+Versión: 1.0
+Fecha: 2025-12-06
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Escribe barras OHLCV en CSV bloque a bloque, con memoria constante, en
+    los dos formatos que usa el proyecto:
+
+    - ISO (el de to_csv con date_format='%Y-%m-%d %H:%M:%S'):
+        DateTime,Open,High,Low,Close,Volume[,Valid]
+        2023-12-17 21:46:00,17180.0,17180.25,17179.5,17180.0,12
+    - Excel regional (normalizaciondatos.md): separador ';', coma decimal,
+      sin separador de miles y fecha dd/mm/aaaa:
+        date;time;open;high;low;close;volume[;symbol]
+        09/10/2020;3:15:00;11587,25;11587,25;11587,25;11587,25;3;NQ 03-20
+
+    El formateo evita strftime y el formateo de números fila a fila:
+    - Las horas salen de tablas precalculadas de 86.400 textos (una por
+      segundo del día) y las fechas se formatean una vez por día distinto
+    - Precios y volúmenes se formatean una vez por valor distinto del bloque
+      (unos pocos miles frente a cientos de miles de filas); los precios
+      múltiplos de 0.25 (tick del NQ) como parte entera + sufijo fijo
+"""
+
+import logging
+import os
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE_EXPORTACION = 200_000
+COLUMNAS_PRECIO = ['Open', 'High', 'Low', 'Close']
+CABECERA_EXCEL = ['date', 'time', 'open', 'high', 'low', 'close', 'volume']
+
+# Sufijos de las fracciones de tick (0, .25, .50, .75) en cada formato.
+# ISO reproduce la representación de to_csv (repr de float: 17180.0, 17180.5)
+_SUFIJOS_ISO = ['.0', '.25', '.5', '.75']
+_SUFIJOS_EXCEL = [',00', ',25', ',50', ',75']
+
+# Texto de cada segundo del día: '03:15:00' (ISO) y '3:15:00' (Excel).
+# Arrays de objetos (str de Python) para unir las líneas sin conversiones
+_HORAS_ISO = np.array(
+    [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)], dtype=object
+)
+_HORAS_EXCEL = np.array(
+    [f"{s // 3600}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)], dtype=object
+)
+
+def _partir_fecha_hora(valores):
+    """
+    Separa timestamps en día y segundo del día
+
+    Returns:
+        Tupla (dias datetime64[D], segundos int64)
+    """
+    valores = np.asarray(valores, dtype='datetime64[ns]')
+    dias = valores.astype('datetime64[D]')
+    segundos = ((valores - dias) // np.timedelta64(1, 's')).astype(np.int64)
+    return dias, segundos
+
+def _formatear_dias(dias, formato):
+    """Formatea cada día distinto una sola vez y lo expande a todas las filas"""
+    unicos, inversa = np.unique(dias, return_inverse=True)
+    textos = pd.DatetimeIndex(unicos).strftime(formato).to_numpy(dtype=object)
+    return textos[inversa]
+
+def _formatear_unicos(valores, formato):
+    """Aplica `formato` una vez por valor distinto y lo expande a todas las filas"""
+    unicos, inversa = np.unique(valores, return_inverse=True)
+    textos = np.array([formato(v) for v in unicos.tolist()], dtype=object)
+    return textos[inversa]
+
+def _formatear_precios(precios, sufijos, decimal):
+    """
+    Formatea precios con la ruta rápida de ticks de 0.25
+
+    Args:
+        precios: Array de precios
+        sufijos: Sufijos de las cuatro fracciones de tick
+        decimal: Separador decimal para la ruta genérica ('.' o ',')
+
+    Returns:
+        Array de textos
+    """
+    precios = np.asarray(precios, dtype=np.float64)
+    ticks = np.rint(precios * 4)
+
+    if np.all(ticks == precios * 4) and np.all(precios >= 0):
+        return _formatear_unicos(ticks.astype(np.int64), lambda t: f"{t // 4}{sufijos[t % 4]}")
+
+    # Precios fuera de la rejilla de ticks (p.ej. back-adjustment por ratio)
+    if decimal == '.':
+        return _formatear_unicos(precios, str)
+    return _formatear_unicos(precios, lambda p: f"{p:.2f}".replace('.', ','))
+
+def _escribir_lineas(f, columnas, separador):
+    """Une columnas de textos en líneas y las escribe en el archivo"""
+    lineas = map(separador.join, zip(*(c.tolist() for c in columnas)))
+    f.write(os.linesep.join(lineas))
+    f.write(os.linesep)
+
+def formatear_bloque_iso(df, f, cabecera=False):
+    """
+    Escribe un bloque en formato ISO (idéntico a to_csv)
+
+    Args:
+        df: DataFrame con DateTime, OHLC, Volume y opcionalmente Valid/Symbol
+        f: Archivo de texto abierto
+        cabecera: Si se escribe la fila de cabecera
+    """
+    if cabecera:
+        f.write(','.join(df.columns) + os.linesep)
+    if len(df) == 0:
+        return
+
+    columnas = []
+    for columna in df.columns:
+        if columna == 'DateTime':
+            dias, segundos = _partir_fecha_hora(df['DateTime'].to_numpy())
+            fecha = _formatear_dias(dias, '%Y-%m-%d')
+            columnas.append(fecha + ' ' + _HORAS_ISO[segundos])
+        elif columna in COLUMNAS_PRECIO:
+            columnas.append(_formatear_precios(df[columna].to_numpy(), _SUFIJOS_ISO, '.'))
+        elif columna == 'Valid':
+            columnas.append(np.where(df['Valid'].to_numpy(), 'True', 'False').astype(object))
+        else:
+            columnas.append(_formatear_unicos(df[columna].to_numpy(), str))
+
+    _escribir_lineas(f, columnas, ',')
+
+def formatear_bloque_excel(df, f, cabecera=False):
+    """
+    Escribe un bloque en el formato Excel regional de normalizaciondatos.md
+
+    Args:
+        df: DataFrame con DateTime, OHLC, Volume y opcionalmente Symbol
+        f: Archivo de texto abierto
+        cabecera: Si se escribe la fila de cabecera
+    """
+    con_symbol = 'Symbol' in df.columns
+    if cabecera:
+        f.write(';'.join(CABECERA_EXCEL + (['symbol'] if con_symbol else [])) + os.linesep)
+    if len(df) == 0:
+        return
+
+    dias, segundos = _partir_fecha_hora(df['DateTime'].to_numpy())
+    columnas = [_formatear_dias(dias, '%d/%m/%Y'), _HORAS_EXCEL[segundos]]
+    columnas += [_formatear_precios(df[c].to_numpy(), _SUFIJOS_EXCEL, ',') for c in COLUMNAS_PRECIO]
+    columnas.append(_formatear_unicos(df['Volume'].to_numpy(dtype=np.int64), str))
+    if con_symbol:
+        columnas.append(df['Symbol'].astype(str).to_numpy(dtype=object))
+
+    _escribir_lineas(f, columnas, ';')
+
+def _bloques(datos, tamano):
+    """Convierte un DataFrame o un iterador de DataFrames en bloques"""
+    if isinstance(datos, pd.DataFrame):
+        for inicio in range(0, len(datos), tamano):
+            yield datos.iloc[inicio:inicio + tamano]
+    else:
+        yield from datos
+
+def exportar_por_bloques(datos, ruta_iso=None, ruta_excel=None, tamano=TAMANO_BLOQUE_EXPORTACION,
+                         anexar=False):
+    """
+    Exporta barras a los formatos ISO y/o Excel bloque a bloque
+
+    Args:
+        datos: DataFrame completo o iterador de DataFrames (p.ej. read_csv
+            con chunksize o los bloques de la consolidación en streaming)
+        ruta_iso: Archivo de salida ISO (None = no se genera)
+        ruta_excel: Archivo de salida Excel (None = no se genera)
+        tamano: Filas por bloque cuando `datos` es un DataFrame
+        anexar: Añadir las filas al final de archivos existentes (sin cabecera)
+
+    Returns:
+        Número de registros escritos
+    """
+    modo = 'a' if anexar else 'w'
+    with ExitStack() as pila:
+        f_iso = pila.enter_context(open(ruta_iso, modo, newline='', encoding='utf-8')) if ruta_iso else None
+        f_excel = pila.enter_context(open(ruta_excel, modo, newline='', encoding='utf-8')) if ruta_excel else None
+
+        registros = 0
+        primera = not anexar
+        for bloque in _bloques(datos, tamano):
+            if f_iso is not None:
+                formatear_bloque_iso(bloque, f_iso, cabecera=primera)
+            if f_excel is not None:
+                formatear_bloque_excel(bloque, f_excel, cabecera=primera)
+            registros += len(bloque)
+            primera = False
+
+    for ruta in (ruta_iso, ruta_excel):
+        if ruta:
+            accion = 'Anexados' if anexar else 'Exportado'
+            logger.info(f"✅ {accion}: {Path(ruta)} ({registros:,} registros)")
+
+    return registros
+
+def ultimo_timestamp_csv(ruta, bytes_cola=4096):
+    """
+    DateTime de la última fila de un CSV ISO leyendo solo el final del archivo
+
+    Args:
+        ruta: Archivo CSV con DateTime en la primera columna
+        bytes_cola: Bytes leídos desde el final
+
+    Returns:
+        pd.Timestamp o None si el archivo no existe o no tiene filas
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+
+    with open(ruta, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - bytes_cola))
+        lineas = [l for l in f.read().splitlines() if l.strip()]
+
+    if not lineas:
+        return None
+    ultima = lineas[-1].decode('utf-8', errors='replace').split(',')[0]
+    if ultima == 'DateTime':
+        return None
+    try:
+        return pd.Timestamp(ultima)
+    except ValueError:
+        return None
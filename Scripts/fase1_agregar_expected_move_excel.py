@@ -26,6 +26,10 @@ from openpyxl import load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from datetime import datetime
 
+from expected_move import promedios_rangos
+from precios_tick import convertir_a_ticks, convertir_a_puntos
+from registro_niveles import aplicar_familias
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -42,6 +46,16 @@ DATA_PATH = Path("..") / "Procesados" / "NQ_Daily_2020-2025_Limpio.csv"
 RANGE_MULTIPLIER = 0.682
 DEFAULT_LOOKBACK = 21
 
+# Cargar OHLC como ticks int32 (precio * 4) y calcular en ticks; EMH/EML/
+# ExpRange se devuelven a puntos antes de escribir el Excel
+PRECIOS_EN_TICKS = False
+
+# Columnas con unidades de precio (se convierten de vuelta a puntos)
+COLUMNAS_EN_PRECIO = [
+    'Open', 'High', 'Low', 'Close', 'Range', 'BullishAvg', 'BearishAvg',
+    'EMH_Raw', 'EML_Raw', 'EMH', 'EML', 'EM_Range', 'ExpRange'
+]
+
 def cargar_datos():
     logger.info("="*80)
     logger.info("CARGANDO DATOS")
@@ -50,6 +64,10 @@ def cargar_datos():
     try:
         df = pd.read_csv(DATA_PATH)
         df['Date'] = pd.to_datetime(df['Date'])
+
+        if PRECIOS_EN_TICKS:
+            convertir_a_ticks(df)
+            logger.info("OK Precios cargados en ticks int32")
         
         logger.info(f"OK Datos cargados: {len(df)} registros")
         logger.info(f"Período: {df['Date'].min()} a {df['Date'].max()}")
@@ -70,36 +88,24 @@ def calcular_expected_move(df, lookback=DEFAULT_LOOKBACK):
     df['IsBullish'] = df['Close'] > df['Open']
     df['Range'] = df['High'] - df['Low']
     
-    df['BullishAvg'] = 0.0
-    df['BearishAvg'] = 0.0
-    df['EMH'] = 0.0
-    df['EML'] = 0.0
-    df['ExpRange'] = 0.0
-    
-    for i in range(len(df)):
-        if i < lookback:
-            continue
-        
-        start_idx = i - lookback
-        end_idx = i
-        
-        historical_window = df.iloc[start_idx:end_idx]
-        
-        bullish_days = historical_window[historical_window['IsBullish']]
-        bearish_days = historical_window[~historical_window['IsBullish']]
-        
-        if len(bullish_days) > 0:
-            df.loc[df.index[i], 'BullishAvg'] = bullish_days['Range'].mean()
-        
-        if len(bearish_days) > 0:
-            df.loc[df.index[i], 'BearishAvg'] = bearish_days['Range'].mean()
-        
-        emh_raw = df.loc[df.index[i], 'Open'] + (df.loc[df.index[i], 'BullishAvg'] * RANGE_MULTIPLIER)
-        eml_raw = df.loc[df.index[i], 'Open'] - (df.loc[df.index[i], 'BearishAvg'] * RANGE_MULTIPLIER)
-        
-        df.loc[df.index[i], 'EMH'] = round_to_nearest_quarter(emh_raw)
-        df.loc[df.index[i], 'EML'] = round_to_nearest_quarter(eml_raw)
-        df.loc[df.index[i], 'ExpRange'] = df.loc[df.index[i], 'EMH'] - df.loc[df.index[i], 'EML']
+    # Ventana de los N días anteriores con sumas acumuladas (O(n))
+    promedios = promedios_rangos(df['Range'], df['IsBullish'], lookback)
+    df['BullishAvg'] = promedios['BullishAvg']
+    df['BearishAvg'] = promedios['BearishAvg']
+
+    # Solo los días con ventana completa tienen Expected Move (el resto 0)
+    con_ventana = np.arange(len(df)) >= lookback
+
+    # EMH_Raw/EML_Raw, redondeo a cuartos (como en RyFEM.cs) y EM_Range:
+    # familia 'expected_move' de registro_niveles.py (en ticks el cuarto es la unidad)
+    familia = 'expected_move_ticks' if PRECIOS_EN_TICKS else 'expected_move'
+    df = aplicar_familias(df, [familia], {'Multiplicador': RANGE_MULTIPLIER})
+    df['EMH'] = np.where(con_ventana, df['EMH'], 0.0)
+    df['EML'] = np.where(con_ventana, df['EML'], 0.0)
+    df['ExpRange'] = np.where(con_ventana, df['EM_Range'], 0.0)
+
+    if PRECIOS_EN_TICKS:
+        convertir_a_puntos(df, COLUMNAS_EN_PRECIO)
     
     valid_em = df[df['EMH'] > 0]
     logger.info(f"\nEstadísticas Expected Move:")
@@ -110,13 +116,6 @@ def calcular_expected_move(df, lookback=DEFAULT_LOOKBACK):
     
     return df
 
-def round_to_nearest_quarter(price):
-    if price <= 0:
-        return price
-    
-    quarters = np.ceil(price * 4)
-    return quarters / 4
-
 def actualizar_excel(df):
     logger.info("\n" + "="*80)
     logger.info("ACTUALIZANDO ARCHIVO EXCEL")
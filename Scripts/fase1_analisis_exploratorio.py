@@ -24,6 +24,8 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from precios_tick import fuera_de_rejilla
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -153,14 +155,13 @@ def validacion_estructural(df):
         logger.warning("WARN Fechas NO están en orden cronológico")
 
     # 6. Verificar formato de decimales (deben ser .00, .25, .50, .75)
-    def verificar_decimales(precio):
-        """Verifica que el decimal sea múltiplo de 0.25"""
-        decimal = round((precio % 1) * 100) / 100
-        return decimal in [0.00, 0.25, 0.50, 0.75]
+    def verificar_decimales(precios):
+        """Máscara de precios múltiplos de 0.25 (módulo entero, vectorizado)"""
+        return ~fuera_de_rejilla(precios)
 
     precios_invalidos = []
     for col in ['Open', 'High', 'Low', 'Close']:
-        invalidos = df[~df[col].apply(verificar_decimales)]
+        invalidos = df[~verificar_decimales(df[col])]
         if len(invalidos) > 0:
             precios_invalidos.append({
                 'columna': col,
@@ -30,11 +30,18 @@ Fórmula RyFEM (Expected Move):
 """
 
 import pandas as pd
-import numpy as np
 from pathlib import Path
 import logging
 from datetime import datetime
 
+from ajuste_rolls import cargar_diario_ajustado, AJUSTES_PATH, CONTINUO_PATH
+from cache_artefactos import ejecutar_con_cache
+from expected_move import promedios_rangos
+from registro_niveles import aplicar_familias
+from precios_tick import (
+    TICKS_POR_PUNTO, convertir_a_ticks, convertir_a_puntos, fuera_de_rejilla
+)
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -56,6 +63,32 @@ OUTPUT_PATH_EXCEL = Path("..") / "Calculados" / "Niveles_Diarios.xlsx"
 RANGE_MULTIPLIER = 0.682  # 68.2% para desviación estándar
 DEFAULT_LENGTH = 21        # Período de lookback por defecto
 
+# Back-adjustment de rolls al cargar: None (sin ajuste), 'diferencia' o 'ratio'
+# El consolidado diario elige contrato por orden de archivo y no lleva Symbol;
+# con ajuste se usa el diario por sesión de la serie continua (Continuo.csv +
+# Ajustes.csv de construir_serie_continua.py, ver ajuste_rolls)
+MODO_AJUSTE = None
+
+# Cargar OHLC como ticks int32 (precio * 4) y calcular en ticks; los
+# resultados se devuelven a puntos antes de validar y exportar
+PRECIOS_EN_TICKS = False
+
+# Columnas con unidades de precio (se convierten de vuelta a puntos)
+COLUMNAS_EN_PRECIO = [
+    'Open', 'High', 'Low', 'Close', 'Range', 'BullishAvg', 'BearishAvg',
+    'EMH_Raw', 'EML_Raw', 'EMH', 'EML', 'EM_Range'
+]
+
+# Scripts cuyo código determina el resultado (parte de la clave de caché)
+CODIGO_NIVELES = [Path(__file__)] + [
+    Path(__file__).with_name(modulo) for modulo in ('precios_tick.py', 'ajuste_rolls.py', 'indice_sesiones.py', 'lector_minutos.py',
+                   'expected_move.py', 'registro_niveles.py')
+]
+
+def _en_puntos(valor):
+    """Valor en puntos para los logs, calcule el script en ticks o en puntos"""
+    return valor / TICKS_POR_PUNTO if PRECIOS_EN_TICKS else valor
+
 def cargar_datos():
     """
     Carga los datos diarios limpios
@@ -68,8 +101,15 @@ def cargar_datos():
     logger.info("="*80)
 
     try:
-        df = pd.read_csv(DATA_PATH)
-        df['Date'] = pd.to_datetime(df['Date'])
+        if MODO_AJUSTE is not None:
+            df = cargar_diario_ajustado(MODO_AJUSTE)
+        else:
+            df = pd.read_csv(DATA_PATH)
+            df['Date'] = pd.to_datetime(df['Date'])
+
+        if PRECIOS_EN_TICKS:
+            convertir_a_ticks(df)
+            logger.info("OK Precios cargados en ticks int32")
 
         logger.info(f"OK Datos cargados: {len(df)} registros")
         logger.info(f"Período: {df['Date'].min()} a {df['Date'].max()}")
@@ -111,8 +151,8 @@ def clasificar_dias(df):
     logger.info(f"Total días: {len(df)}")
     logger.info(f"Días alcistas: {bullish_count} ({bullish_count/len(df)*100:.1f}%)")
     logger.info(f"Días bajistas: {bearish_count} ({bearish_count/len(df)*100:.1f}%)")
-    logger.info(f"Rango promedio alcista: {df[df['IsBullish']]['Range'].mean():.2f}")
-    logger.info(f"Rango promedio bajista: {df[~df['IsBullish']]['Range'].mean():.2f}")
+    logger.info(f"Rango promedio alcista: {_en_puntos(df[df['IsBullish']]['Range'].mean()):.2f}")
+    logger.info(f"Rango promedio bajista: {_en_puntos(df[~df['IsBullish']]['Range'].mean()):.2f}")
 
     return df
 
@@ -135,36 +175,10 @@ def calcular_promedios_historicos(df, lookback=DEFAULT_LENGTH):
     logger.info(f"CALCULANDO PROMEDIOS HISTORICOS (Lookback={lookback})")
     logger.info("="*80)
 
-    # Inicializar columnas
-    df['BullishAvg'] = 0.0
-    df['BearishAvg'] = 0.0
-    df['BullishCount'] = 0
-    df['BearishCount'] = 0
-
-    # Calcular para cada día
-    for i in range(len(df)):
-        # Necesitamos al menos 'lookback' días históricos
-        if i < lookback:
-            continue
-
-        # Obtener ventana histórica (días anteriores)
-        start_idx = i - lookback
-        end_idx = i  # No incluye el día actual
-
-        historical_window = df.iloc[start_idx:end_idx]
-
-        # Separar días alcistas y bajistas
-        bullish_days = historical_window[historical_window['IsBullish']]
-        bearish_days = historical_window[~historical_window['IsBullish']]
-
-        # Calcular promedios
-        if len(bullish_days) > 0:
-            df.loc[df.index[i], 'BullishAvg'] = bullish_days['Range'].mean()
-            df.loc[df.index[i], 'BullishCount'] = len(bullish_days)
-
-        if len(bearish_days) > 0:
-            df.loc[df.index[i], 'BearishAvg'] = bearish_days['Range'].mean()
-            df.loc[df.index[i], 'BearishCount'] = len(bearish_days)
+    # Ventana de los N días anteriores con sumas acumuladas (O(n))
+    promedios = promedios_rangos(df['Range'], df['IsBullish'], lookback)
+    for columna in ('BullishAvg', 'BearishAvg', 'BullishCount', 'BearishCount'):
+        df[columna] = promedios[columna]
 
     logger.info(f"OK Promedios calculados para {len(df[df['BullishAvg'] > 0])} días")
 
@@ -190,49 +204,23 @@ def calcular_expected_move(df):
     logger.info("="*80)
     logger.info(f"Multiplicador de rango: {RANGE_MULTIPLIER} (68.2%)")
 
-    # Calcular Expected Move High
-    df['EMH_Raw'] = df['Open'] + (df['BullishAvg'] * RANGE_MULTIPLIER)
-
-    # Calcular Expected Move Low
-    df['EML_Raw'] = df['Open'] - (df['BearishAvg'] * RANGE_MULTIPLIER)
-
-    # Redondear a cuartos (como en RyFEM.cs)
-    df['EMH'] = df['EMH_Raw'].apply(round_to_nearest_quarter)
-    df['EML'] = df['EML_Raw'].apply(round_to_nearest_quarter)
-
-    # Calcular rango total
-    df['EM_Range'] = df['EMH'] - df['EML']
+    # EMH_Raw/EML_Raw, redondeo a cuartos (como en RyFEM.cs) y EM_Range:
+    # familia 'expected_move' de registro_niveles.py (en ticks el cuarto es la unidad)
+    familia = 'expected_move_ticks' if PRECIOS_EN_TICKS else 'expected_move'
+    df = aplicar_familias(df, [familia], {'Multiplicador': RANGE_MULTIPLIER})
 
     # Estadísticas
     valid_em = df[df['EMH'] > 0]
     logger.info(f"\nEstadísticas Expected Move:")
     logger.info(f"  Días con EM válido: {len(valid_em)} de {len(df)}")
-    logger.info(f"  EMH promedio: {valid_em['EMH'].mean():.2f}")
-    logger.info(f"  EML promedio: {valid_em['EML'].mean():.2f}")
-    logger.info(f"  EM_Range promedio: {valid_em['EM_Range'].mean():.2f}")
-    logger.info(f"  EM_Range mínimo: {valid_em['EM_Range'].min():.2f}")
-    logger.info(f"  EM_Range máximo: {valid_em['EM_Range'].max():.2f}")
+    logger.info(f"  EMH promedio: {_en_puntos(valid_em['EMH'].mean()):.2f}")
+    logger.info(f"  EML promedio: {_en_puntos(valid_em['EML'].mean()):.2f}")
+    logger.info(f"  EM_Range promedio: {_en_puntos(valid_em['EM_Range'].mean()):.2f}")
+    logger.info(f"  EM_Range mínimo: {_en_puntos(valid_em['EM_Range'].min()):.2f}")
+    logger.info(f"  EM_Range máximo: {_en_puntos(valid_em['EM_Range'].max()):.2f}")
 
     return df
 
-def round_to_nearest_quarter(price):
-    """
-    Redondea precio al cuarto más cercano (.00, .25, .50, .75)
-    Redondeo hacia arriba (ceiling) como en RyFEM.cs
-
-    Args:
-        price: Precio a redondear
-
-    Returns:
-        Precio redondeado al cuarto más cercano
-    """
-    if price <= 0:
-        return price
-
-    # Multiplicar por 4, ceiling, dividir por 4
-    quarters = np.ceil(price * 4)
-    return quarters / 4
-
 def validar_calculos(df):
     """
     Valida que los cálculos sean correctos
@@ -254,16 +242,9 @@ def validar_calculos(df):
     else:
         logger.info("OK Todos los cálculos tienen EMH > EML")
 
-    # Verificar redondeo a cuartos
-    def check_quarter_multiple(value):
-        """Verifica que el decimal sea múltiplo de 0.25"""
-        if value <= 0:
-            return True
-        decimal = round((value % 1) * 100) / 100
-        return decimal in [0.00, 0.25, 0.50, 0.75]
-
-    emh_invalid = df[df['EMH'] > 0][~df[df['EMH'] > 0]['EMH'].apply(check_quarter_multiple)]
-    eml_invalid = df[df['EML'] > 0][~df[df['EML'] > 0]['EML'].apply(check_quarter_multiple)]
+    # Verificar redondeo a cuartos (módulo entero sobre centésimas)
+    emh_invalid = df[(df['EMH'] > 0) & fuera_de_rejilla(df['EMH'])]
+    eml_invalid = df[(df['EML'] > 0) & fuera_de_rejilla(df['EML'])]
 
     if len(emh_invalid) > 0 or len(eml_invalid) > 0:
         logger.warning(f"WARN Valores sin redondeo correcto:")
@@ -377,23 +358,41 @@ def main():
         logger.info(f"Range Multiplier: {RANGE_MULTIPLIER} (68.2%)")
         logger.info(f"Lookback Period: {DEFAULT_LENGTH} días")
 
-        # 1. Cargar datos
-        df = cargar_datos()
+        def generar():
+            # 1. Cargar datos
+            df = cargar_datos()
 
-        # 2. Clasificar días alcistas/bajistas
-        df = clasificar_dias(df)
+            # 2. Clasificar días alcistas/bajistas
+            df = clasificar_dias(df)
 
-        # 3. Calcular promedios históricos
-        df = calcular_promedios_historicos(df, lookback=DEFAULT_LENGTH)
+            # 3. Calcular promedios históricos
+            df = calcular_promedios_historicos(df, lookback=DEFAULT_LENGTH)
 
-        # 4. Calcular Expected Move
-        df = calcular_expected_move(df)
+            # 4. Calcular Expected Move
+            df = calcular_expected_move(df)
 
-        # 5. Validar cálculos
-        validar_calculos(df)
+            if PRECIOS_EN_TICKS:
+                convertir_a_puntos(df, COLUMNAS_EN_PRECIO)
 
-        # 6. Exportar resultados
-        exportar_resultados(df, lookback=DEFAULT_LENGTH)
+            # 5. Validar cálculos
+            validar_calculos(df)
+
+            # 6. Exportar resultados
+            exportar_resultados(df, lookback=DEFAULT_LENGTH)
+
+        # Sin cambios en datos, código ni parámetros: se publica la versión en caché
+        ejecutar_con_cache(
+            'niveles_diarios',
+            entradas=[CONTINUO_PATH, AJUSTES_PATH] if MODO_AJUSTE is not None else [DATA_PATH],
+            salidas=[OUTPUT_PATH_CSV, OUTPUT_PATH_EXCEL],
+            generar=generar,
+            parametros={
+                'lookback': DEFAULT_LENGTH,
+                'RANGE_MULTIPLIER': RANGE_MULTIPLIER,
+                'MODO_AJUSTE': MODO_AJUSTE,
+            },
+            codigo=CODIGO_NIVELES,
+        )
 
         logger.info("\n" + "="*80)
         logger.info("TAREA 1.3 COMPLETADA EXITOSAMENTE")
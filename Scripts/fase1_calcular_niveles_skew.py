@@ -17,11 +17,14 @@ Niveles calculados:
     - Q2, Q3
 """
 
-import pandas as pd
-import numpy as np
 from pathlib import Path
 import logging
 
+from cache_artefactos import ejecutar_con_cache
+from cache_excel import leer_hoja_excel
+from precios_tick import convertir_a_ticks, convertir_a_puntos
+from registro_niveles import aplicar_familias
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -33,9 +36,23 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def round_to_quarter(value):
-    """Redondea al 0.25 más cercano"""
-    return round(value * 4) / 4
+# Calcular en ticks int32 (precio * 4) con la familia 'skew_ticks'; los
+# niveles se devuelven a puntos antes de exportar (resultados idénticos)
+PRECIOS_EN_TICKS = False
+
+# Columnas de entrada con unidades de precio (múltiplos del tick)
+COLUMNAS_ENTRADA_PRECIO = ['Open', 'High', 'Low', 'Close', 'Range', 'EMH', 'EML', 'ExpRange']
+
+# Columnas con unidades de precio tras el cálculo (se convierten de vuelta a puntos)
+COLUMNAS_EN_PRECIO = COLUMNAS_ENTRADA_PRECIO + [
+    'Q1', 'Q4', 'NR2', 'RangoTotal', 'TCH', 'TCL', 'TVH', 'TVL',
+    'Z2H', 'Z2L', 'Z3H', 'Z3L', 'Q2', 'Q3'
+]
+
+# Scripts cuyo código determina el resultado (parte de la clave de caché)
+CODIGO_SKEW = [Path(__file__)] + [
+    Path(__file__).with_name(modulo) for modulo in ('precios_tick.py', 'registro_niveles.py')
+]
 
 def calcular_niveles_skew(df):
     """
@@ -51,38 +68,15 @@ def calcular_niveles_skew(df):
     logger.info("CALCULANDO NIVELES CON SKEW")
     logger.info("="*80)
     
+    # Fórmulas declaradas en la familia 'skew' de registro_niveles.py
+    # (Z2H/Z2L/Z3H/Z3L redondeados al 0.25 antes de calcular Q2/Q3)
     df = df.copy()
-    
-    df['Q1'] = df['EMH']
-    df['Q4'] = df['EML']
-    df['NR2'] = df['Open']
-    
-    df['RangoTotal'] = df['Q1'] - df['Q4']
-    
-    df['PctAboveNR2'] = ((df['Q1'] - df['NR2']) / df['RangoTotal']) * 100
-    df['PctBelowNR2'] = ((df['NR2'] - df['Q4']) / df['RangoTotal']) * 100
-    
-    df['SkewMayor'] = df[['PctAboveNR2', 'PctBelowNR2']].max(axis=1)
-    df['DiferenciaSkew'] = abs(df['SkewMayor'] - 50.0)
-    
-    df['TCH'] = df['Q1'] - (0.125 * df['RangoTotal'])
-    df['TCL'] = df['Q1'] - (0.159 * df['RangoTotal'])
-    df['TVH'] = df['Q1'] - (0.875 * df['RangoTotal'])
-    df['TVL'] = df['Q1'] - (0.9375 * df['RangoTotal'])
-    
-    df['Z2H'] = df['Q1'] - ((34.1 + df['DiferenciaSkew']) / 100 * df['RangoTotal'])
-    df['Z2L'] = df['Q1'] - ((37.5 + df['DiferenciaSkew']) / 100 * df['RangoTotal'])
-    
-    df['Z3H'] = df['Q4'] + ((37.5 + df['DiferenciaSkew']) / 100 * df['RangoTotal'])
-    df['Z3L'] = df['Q4'] + ((34.1 + df['DiferenciaSkew']) / 100 * df['RangoTotal'])
-    
-    df['Z2H'] = df['Z2H'].apply(round_to_quarter)
-    df['Z2L'] = df['Z2L'].apply(round_to_quarter)
-    df['Z3H'] = df['Z3H'].apply(round_to_quarter)
-    df['Z3L'] = df['Z3L'].apply(round_to_quarter)
-    
-    df['Q2'] = (df['TCL'] + df['Z2H']) / 2
-    df['Q3'] = (df['TVH'] + df['Z3L']) / 2
+    if PRECIOS_EN_TICKS:
+        convertir_a_ticks(df, COLUMNAS_ENTRADA_PRECIO)
+        df = aplicar_familias(df, ['skew_ticks'])
+        convertir_a_puntos(df, COLUMNAS_EN_PRECIO)
+    else:
+        df = aplicar_familias(df, ['skew'])
     
     logger.info(f"Niveles calculados para {len(df)} días")
     logger.info(f"Rango Total promedio: {df['RangoTotal'].mean():.2f}")
@@ -105,7 +99,7 @@ def procesar_archivo(input_path, output_excel, output_csv, nombre):
     logger.info(f"{'='*80}")
     
     try:
-        df = pd.read_excel(input_path)
+        df = leer_hoja_excel(input_path)
         logger.info(f"Datos cargados: {len(df)} registros")
         
         df = calcular_niveles_skew(df)
@@ -153,12 +147,19 @@ def main():
         }
     ]
     
+    # Cada archivo de entrada (EM21, EM9) tiene su propia entrada de caché
     for archivo in archivos:
-        procesar_archivo(
-            archivo['input'],
-            archivo['output_excel'],
-            archivo['output_csv'],
-            archivo['nombre']
+        ejecutar_con_cache(
+            'niveles_skew',
+            entradas=[archivo['input']],
+            salidas=[archivo['output_excel'], archivo['output_csv']],
+            generar=lambda archivo=archivo: procesar_archivo(
+                archivo['input'],
+                archivo['output_excel'],
+                archivo['output_csv'],
+                archivo['nombre']
+            ),
+            codigo=CODIGO_SKEW,
         )
     
     logger.info("\n" + "="*80)
@@ -9,6 +9,8 @@ import numpy as np
 from pathlib import Path
 import logging
 
+from cache_excel import leer_hojas_excel
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -226,7 +228,9 @@ def main():
 
     # Leer archivo completo
     logger.info(f"Leyendo archivo: {INPUT_FILE}")
-    df = pd.read_excel(INPUT_FILE, sheet_name='Datos_Completos')
+    # Todas las hojas a través de la caché columnar (se reescriben más abajo)
+    hojas_existentes = leer_hojas_excel(INPUT_FILE)
+    df = hojas_existentes['Datos_Completos'].copy()
 
     # Convertir Date a datetime
     df['Date'] = pd.to_datetime(df['Date'])
@@ -240,11 +244,6 @@ def main():
     logger.info("Calculando estadísticas para 2025...")
     estadisticas_2025 = crear_estadisticas_2025(df_2025)
 
-    # Leer todas las hojas existentes
-    logger.info("Leyendo hojas existentes...")
-    with pd.ExcelFile(INPUT_FILE) as xls:
-        hojas_existentes = {sheet: pd.read_excel(xls, sheet) for sheet in xls.sheet_names}
-
     # Agregar nuevas hojas con datos del 2025
     hojas_existentes['Datos_2025'] = df_2025
     hojas_existentes.update(estadisticas_2025)
@@ -0,0 +1,123 @@
+"""
+Fusión en Streaming de Contratos Ordenados (k-way merge)
+Versión: 1.0
+Fecha: 2025-12-05
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Fusiona k flujos de bloques ya ordenados por tiempo (uno por archivo de
+    contrato) en una única serie ordenada, aplicando la regla de solape
+    keep='first' sobre la marcha y sin concatenar nunca el histórico completo.
+
+    La fusión avanza por bloques con una "marca de agua": en cada paso se
+    emiten de una vez (de forma vectorizada) todas las filas pendientes con
+    timestamp <= al menor último timestamp de los buffers activos. Ningún
+    flujo puede aportar después una fila anterior a esa marca, así que lo
+    emitido es definitivo. La memoria máxima es ~k bloques, no el dataset.
+
+Regla de solape:
+    Ante timestamps repetidos gana el flujo con menor índice (el primero en
+    la lista), igual que concat + sort estable + drop_duplicates(keep='first').
+"""
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+def _siguiente_bloque(flujo, columna):
+    """Devuelve el siguiente bloque no vacío de un flujo o None si se agotó"""
+    for bloque in flujo:
+        if len(bloque) > 0:
+            if not bloque[columna].is_monotonic_increasing:
+                logger.warning(f"⚠️  Bloque desordenado en la entrada ({len(bloque):,} filas), se ordena")
+                bloque = bloque.sort_values(columna, kind='stable')
+            return bloque.reset_index(drop=True)
+    return None
+
+def fusionar_flujos(flujos, columna='DateTime'):
+    """
+    Fusiona flujos de bloques ordenados en bloques ordenados sin duplicados
+
+    Args:
+        flujos: Lista de iteradores de DataFrames, cada uno ordenado por
+            `columna` dentro del flujo; el orden de la lista fija la prioridad
+        columna: Columna temporal por la que se fusiona
+
+    Yields:
+        DataFrames ordenados, sin timestamps repetidos ni solapes entre bloques
+    """
+    flujos = [iter(f) for f in flujos]
+    buffers = [None] * len(flujos)
+    agotados = [False] * len(flujos)
+    ultimo_emitido = None
+    duplicados = 0
+    descartados_retroceso = 0
+
+    while True:
+        # 1. Rellenar los buffers vacíos de los flujos activos
+        for i, flujo in enumerate(flujos):
+            if not agotados[i] and (buffers[i] is None or len(buffers[i]) == 0):
+                buffers[i] = _siguiente_bloque(flujo, columna)
+                if buffers[i] is None:
+                    agotados[i] = True
+
+        pendientes = [i for i, b in enumerate(buffers) if b is not None and len(b) > 0]
+        if not pendientes:
+            break
+
+        # 2. Marca de agua: menor último timestamp entre los flujos que aún
+        #    pueden aportar filas (un flujo agotado ya no limita)
+        activos = [i for i in pendientes if not agotados[i]]
+        if activos:
+            marca = min(buffers[i][columna].iat[-1] for i in activos)
+        else:
+            marca = None
+
+        # 3. Extraer de cada buffer las filas <= marca (en orden de prioridad)
+        piezas = []
+        for i in pendientes:
+            buffer = buffers[i]
+            if marca is None:
+                corte = len(buffer)
+            else:
+                corte = buffer[columna].searchsorted(marca, side='right')
+            if corte > 0:
+                piezas.append(buffer.iloc[:corte])
+                buffers[i] = buffer.iloc[corte:]
+
+        # 4. Fusionar lo extraído: sort estable + keep='first' por prioridad
+        bloque = pd.concat(piezas, ignore_index=True) if len(piezas) > 1 else piezas[0]
+        bloque = bloque.sort_values(columna, kind='stable')
+        filas_extraidas = len(bloque)
+        bloque = bloque.drop_duplicates(subset=[columna], keep='first')
+
+        if ultimo_emitido is not None:
+            # Mismo timestamp que la última fila emitida: duplicado (keep='first')
+            bloque = bloque[bloque[columna] != ultimo_emitido]
+
+            # Filas que retroceden respecto a lo ya emitido (archivo desordenado
+            # entre bloques): no se pueden insertar en la salida ya escrita
+            retroceso = bloque[columna] < ultimo_emitido
+            if retroceso.any():
+                descartados_retroceso += int(retroceso.sum())
+                bloque = bloque[~retroceso]
+
+        duplicados += filas_extraidas - len(bloque)
+
+        if len(bloque) == 0:
+            continue
+
+        ultimo_emitido = bloque[columna].iat[-1]
+        yield bloque.reset_index(drop=True)
+
+    duplicados -= descartados_retroceso
+    if duplicados > 0:
+        logger.warning(f"⚠️  {duplicados:,} timestamps duplicados eliminados (keep='first')")
+
+    if descartados_retroceso > 0:
+        logger.warning(
+            f"⚠️  {descartados_retroceso:,} filas descartadas por retroceder en el tiempo "
+            f"respecto a bloques ya emitidos"
+        )
@@ -0,0 +1,214 @@
+"""
+Índice de Sesiones CME (fecha de sesión -> filas del histórico de minutos)
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Filtrar un día con df_1min[df_1min['Date'] == fecha] recorre todas las
+    filas en cada día (O(días x filas)). Como el histórico está ordenado por
+    DateTime, cada sesión ocupa un bloque contiguo de filas: este módulo
+    guarda para cada fecha de sesión su rango [Inicio, Fin) y devuelve las
+    barras del día como un slice sin copia.
+
+    Fecha de sesión CME:
+    - Las barras de minutos están en UTC y marcadas al cierre (23:01 es la
+      barra de 23:00 a 23:01)
+    - La sesión del NQ abre a las 18:00 hora de Nueva York y cierra a las
+      17:00 del día siguiente; la fecha de sesión es la del día de cierre
+    - Se pasa a hora de Nueva York (horario de verano incluido), se resta un
+      minuto (inicio de la barra) y se suman 6 horas: 18:00 -> 00:00 del día
+      siguiente. Las sesiones del domingo quedan con fecha del lunes
+
+    El índice se construye al publicar los minutos (barras_memmap.py lo
+    guarda junto a las columnas binarias) y es válido para cualquier copia
+    del histórico en el mismo orden (memmap, _Limpio.csv, cargar_barras()).
+
+Uso:
+    from barras_memmap import abrir_barras_memmap, cargar_sesiones_memmap
+    from indice_sesiones import posiciones_por_sesion, barras_sesion
+    barras = abrir_barras_memmap()
+    posiciones = posiciones_por_sesion(cargar_sesiones_memmap())
+    dia = barras_sesion(barras, posiciones, '2024-01-03')
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ZONA_MERCADO = 'America/New_York'
+# 18:00 (apertura de la sesión) + 6 h = 00:00 del día de la sesión
+DESPLAZAMIENTO_SESION = pd.Timedelta(hours=6)
+# Las barras están marcadas al cierre: el minuto que representan empieza antes
+DURACION_BARRA = pd.Timedelta(minutes=1)
+ARCHIVO_SESIONES = 'sesiones.csv'
+
+def calcular_fechas_sesion(timestamps):
+    """
+    Fecha de sesión CME de cada barra
+
+    Args:
+        timestamps: Array/Series de DateTime en UTC (naive) marcados al cierre
+
+    Returns:
+        Array datetime64[D] con la fecha de sesión de cada barra
+    """
+    hora_mercado = (
+        pd.DatetimeIndex(timestamps)
+        .tz_localize('UTC')
+        .tz_convert(ZONA_MERCADO)
+        .tz_localize(None)
+    )
+    return (hora_mercado - DURACION_BARRA + DESPLAZAMIENTO_SESION).to_numpy().astype('datetime64[D]')
+
+def inicio_sesion_utc(fechas):
+    """
+    Primer DateTime (UTC, marcado al cierre) que pertenece a cada sesión
+
+    Es la inversa de calcular_fechas_sesion(): una barra pertenece a la
+    sesión F si y solo si inicio_sesion_utc(F) <= DateTime <
+    inicio_sesion_utc(F + 1 día).
+
+    Args:
+        fechas: Array/Series de fechas de sesión
+
+    Returns:
+        DatetimeIndex en UTC (naive)
+    """
+    apertura = pd.DatetimeIndex(fechas).normalize() - DESPLAZAMIENTO_SESION + DURACION_BARRA
+    return apertura.tz_localize(ZONA_MERCADO).tz_convert('UTC').tz_localize(None)
+
+def construir_indice_sesiones(timestamps):
+    """
+    Construye el índice fecha de sesión -> rango de filas
+
+    Args:
+        timestamps: DateTime del histórico, ordenados de forma creciente
+
+    Returns:
+        DataFrame con Sesion, Inicio, Fin (fila excluida) y Barras
+
+    Raises:
+        ValueError: si los timestamps no están ordenados
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+    if not timestamps.is_monotonic_increasing:
+        raise ValueError("El histórico debe estar ordenado por DateTime para indexar sesiones")
+
+    sesiones = calcular_fechas_sesion(timestamps)
+    if len(sesiones) == 0:
+        return pd.DataFrame({
+            'Sesion': pd.Series(dtype='datetime64[ns]'),
+            'Inicio': pd.Series(dtype=np.int64),
+            'Fin': pd.Series(dtype=np.int64),
+            'Barras': pd.Series(dtype=np.int64),
+        })
+
+    # Las fechas de sesión son crecientes: cada cambio abre un bloque nuevo
+    inicios = np.concatenate([[0], np.flatnonzero(sesiones[1:] != sesiones[:-1]) + 1])
+    fines = np.append(inicios[1:], len(sesiones))
+
+    return pd.DataFrame({
+        'Sesion': sesiones[inicios].astype('datetime64[ns]'),
+        'Inicio': inicios.astype(np.int64),
+        'Fin': fines.astype(np.int64),
+        'Barras': (fines - inicios).astype(np.int64),
+    })
+
+def guardar_indice_sesiones(indice, ruta):
+    """
+    Guarda el índice de sesiones en CSV
+
+    Args:
+        indice: Resultado de construir_indice_sesiones()
+        ruta: Ruta del archivo de salida
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    indice.to_csv(ruta, index=False, date_format='%Y-%m-%d')
+
+def cargar_indice_sesiones(ruta):
+    """
+    Carga un índice de sesiones guardado
+
+    Args:
+        ruta: Ruta del archivo de índice
+
+    Returns:
+        DataFrame con Sesion, Inicio, Fin y Barras
+    """
+    return pd.read_csv(ruta, parse_dates=['Sesion'])
+
+def posiciones_por_sesion(indice):
+    """
+    Diccionario de acceso O(1): fecha de sesión -> (inicio, fin)
+
+    Args:
+        indice: DataFrame de índice de sesiones
+
+    Returns:
+        Diccionario {pd.Timestamp: (inicio, fin)}
+    """
+    return {
+        pd.Timestamp(sesion): (int(inicio), int(fin))
+        for sesion, inicio, fin in zip(indice['Sesion'], indice['Inicio'], indice['Fin'])
+    }
+
+def barras_sesion(datos, posiciones, fecha):
+    """
+    Barras de una sesión como slice sin copia
+
+    Args:
+        datos: DataFrame, array o diccionario {columna: array/memmap} del
+            histórico en el mismo orden con el que se construyó el índice
+        posiciones: Resultado de posiciones_por_sesion()
+        fecha: Fecha de sesión (str, date o Timestamp)
+
+    Returns:
+        Mismo tipo que `datos` con solo las barras de la sesión (vacío si
+        la sesión no existe)
+    """
+    inicio, fin = posiciones.get(pd.Timestamp(fecha).normalize(), (0, 0))
+
+    if isinstance(datos, pd.DataFrame):
+        return datos.iloc[inicio:fin]
+    if isinstance(datos, dict):
+        return {columna: valores[inicio:fin] for columna, valores in datos.items()}
+    return datos[inicio:fin]
+
+def resumen_por_sesion(barras, indice):
+    """
+    OHLCV de cada sesión a partir de los minutos (conciliación con el diario)
+
+    Usa reduceat sobre los inicios de sesión: una sola pasada por columna.
+
+    Args:
+        barras: Diccionario {columna: array} o DataFrame con Open, High, Low,
+            Close y Volume en el orden del índice
+        indice: DataFrame de índice de sesiones
+
+    Returns:
+        DataFrame con Date, Open, High, Low, Close, Volume por sesión
+    """
+    inicios = indice['Inicio'].to_numpy()
+    fines = indice['Fin'].to_numpy()
+
+    if len(inicios) == 0:
+        return pd.DataFrame(columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+
+    def columna(nombre):
+        valores = barras[nombre]
+        return valores.to_numpy() if isinstance(valores, pd.Series) else np.asarray(valores)
+
+    return pd.DataFrame({
+        'Date': indice['Sesion'].to_numpy(),
+        'Open': columna('Open')[inicios],
+        'High': np.maximum.reduceat(columna('High'), inicios),
+        'Low': np.minimum.reduceat(columna('Low'), inicios),
+        'Close': columna('Close')[fines - 1],
+        'Volume': np.add.reduceat(columna('Volume').astype(np.int64), inicios),
+    })
@@ -0,0 +1,365 @@
+"""
+Script de Ingesta de Datos OHLCV-1m de Databento (NQ y MNQ)
+Versión: 1.0
+Fecha: 2025-12-05
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Lee en paralelo los ~7.300 archivos diarios glbx-mdp3-*.ohlcv-1m.*.csv de
+    "datos brutos/base de datos a corregir" y genera un único archivo
+    consolidado y ordenado por instrumento (NQ, MNQ).
+
+    - Los spreads de calendario (p.ej. MNQZ0-MNQH1) se descartan o se envían
+      a su propio archivo según SEPARAR_SPREADS
+    - ts_event (ISO con nanosegundos, UTC) se decodifica de forma vectorizada
+    - El código de contrato (H/M/U/Z + dígito de año) se traduce a la
+      etiqueta NinjaTrader 'NQ MM-AA' según normalizaciondatos.md
+
+Formato de entrada:
+    ts_event,rtype,publisher_id,instrument_id,open,high,low,close,volume,symbol
+    2020-10-09T03:15:00.000000000Z,33,1,4378,11587.25,...,3,NQH1
+
+Formato de salida:
+    DateTime,Open,High,Low,Close,Volume,Symbol
+    2020-10-09 03:15:00,11587.25,11587.25,11587.25,11587.25,3,NQ 03-21
+"""
+
+import pandas as pd
+from pathlib import Path
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from contratos_futuros import etiqueta_contrato
+from decodificador_timestamps import decodificar_iso_ns
+from exportador_csv import formatear_bloque_iso
+from pipeline_ingestion import ejecutar_pipeline
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('../Logs/ingestar_databento_ohlcv.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Constantes
+DATABENTO_PATH = Path("..") / "datos brutos" / "base de datos a corregir"
+OUTPUT_PATH = Path("..") / "Originales"
+INSTRUMENTOS = ['NQ', 'MNQ']
+PATRON_ARCHIVOS = "glbx-mdp3-*.ohlcv-1m.*.csv"
+
+# True: los spreads se guardan en <instrumento>_1min_databento_spreads.csv
+# False: se descartan sin leerlos
+SEPARAR_SPREADS = True
+
+# Procesos para la lectura en paralelo y archivos por tarea enviada al pool
+N_WORKERS = os.cpu_count() or 1
+ARCHIVOS_POR_TAREA = 32
+
+# True: pipeline por etapas (lectura/parseo/escritura solapadas) que escribe
+# el consolidado día a día con memoria constante. False: carga completa en
+# memoria, concatenación y ordenación global
+MODO_PIPELINE = True
+
+COLUMNAS_SALIDA = ['DateTime', 'Open', 'High', 'Low', 'Close', 'Volume', 'Symbol']
+
+def es_spread(symbol):
+    """Un símbolo con guion (MNQZ0-MNQH1) es un spread de calendario"""
+    return '-' in symbol
+
+def simbolo_desde_archivo(filepath):
+    """
+    Extrae el símbolo del nombre de archivo Databento
+
+    'glbx-mdp3-20201009.ohlcv-1m.MNQH1.csv' -> 'MNQH1'
+    """
+    return Path(filepath).name.split('.ohlcv-1m.')[-1][:-len('.csv')]
+
+def cargar_archivo_databento(filepath, contenido=None):
+    """
+    Carga un archivo diario OHLCV-1m de Databento
+
+    Args:
+        filepath: Ruta al archivo .csv
+        contenido: Bytes del archivo ya leídos (etapa de lectura del
+            pipeline); si es None se lee de disco
+
+    Returns:
+        DataFrame con COLUMNAS_SALIDA o None si hay error o está vacío
+    """
+    try:
+        df = pd.read_csv(
+            filepath if contenido is None else io.BytesIO(contenido),
+            usecols=['ts_event', 'open', 'high', 'low', 'close', 'volume', 'symbol'],
+            dtype={'ts_event': str, 'symbol': str}
+        )
+
+        if len(df) == 0:
+            return None
+
+        df['DateTime'] = decodificar_iso_ns(df['ts_event'].to_numpy())
+
+        invalid_timestamps = df['DateTime'].isna().sum()
+        if invalid_timestamps > 0:
+            logger.warning(f"⚠️  {Path(filepath).name}: {invalid_timestamps} timestamps inválidos")
+            df = df.dropna(subset=['DateTime'])
+            if len(df) == 0:
+                return None
+
+        df = df.rename(columns={
+            'open': 'Open', 'high': 'High', 'low': 'Low',
+            'close': 'Close', 'volume': 'Volume', 'symbol': 'Symbol'
+        })
+
+        # Cada archivo contiene un único símbolo y un único día: la etiqueta
+        # del contrato se calcula una vez por archivo, no por fila
+        symbol = df['Symbol'].iloc[0]
+        if not es_spread(symbol):
+            etiqueta = etiqueta_contrato(symbol, int(df['DateTime'].iloc[0].year))
+            if etiqueta is None:
+                logger.warning(f"⚠️  {Path(filepath).name}: símbolo no reconocido '{symbol}'")
+                return None
+            df['Symbol'] = etiqueta
+
+        return df[COLUMNAS_SALIDA]
+
+    except Exception as e:
+        logger.error(f"❌ Error al cargar {filepath}: {str(e)}")
+        return None
+
+def listar_archivos(instrumento):
+    """
+    Lista los archivos de un instrumento separando outrights y spreads
+
+    Args:
+        instrumento: 'NQ' o 'MNQ'
+
+    Returns:
+        Tupla (archivos_outright, archivos_spread) ordenadas por nombre
+    """
+    archivos = sorted((DATABENTO_PATH / instrumento).glob(PATRON_ARCHIVOS))
+    outrights = [a for a in archivos if not es_spread(simbolo_desde_archivo(a))]
+    spreads = [a for a in archivos if es_spread(simbolo_desde_archivo(a))]
+    return outrights, spreads
+
+def cargar_archivos_paralelo(archivos, n_workers=N_WORKERS):
+    """
+    Carga en streaming una lista de archivos Databento
+
+    Los resultados se consumen a medida que el pool los termina (en el orden
+    de entrada), sin esperar a que se hayan leído todos los archivos.
+
+    Args:
+        archivos: Lista de rutas
+        n_workers: Número de procesos (1 = carga secuencial)
+
+    Returns:
+        Lista de DataFrames no vacíos en el orden de `archivos`
+    """
+    n_workers = max(1, min(n_workers, len(archivos)))
+
+    if n_workers == 1:
+        return [df for df in map(cargar_archivo_databento, archivos) if df is not None]
+
+    dfs = []
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        resultados = executor.map(cargar_archivo_databento, archivos, chunksize=ARCHIVOS_POR_TAREA)
+        for i, df in enumerate(resultados, start=1):
+            if df is not None:
+                dfs.append(df)
+            if i % 1000 == 0:
+                logger.info(f"   {i:,}/{len(archivos):,} archivos leídos")
+
+    return dfs
+
+def consolidar_instrumento(archivos, n_workers=N_WORKERS):
+    """
+    Carga y consolida los archivos de un instrumento en un DataFrame ordenado
+
+    Args:
+        archivos: Lista de rutas del instrumento
+        n_workers: Número de procesos para la lectura
+
+    Returns:
+        DataFrame ordenado por DateTime y Symbol, o None si no hay datos
+    """
+    dfs = cargar_archivos_paralelo(archivos, n_workers=n_workers)
+
+    if len(dfs) == 0:
+        return None
+
+    df = pd.concat(dfs, ignore_index=True)
+
+    # Varios contratos cotizan en el mismo minuto: se conservan todos y
+    # solo se eliminan barras repetidas del mismo contrato
+    registros_antes = len(df)
+    df = _ordenar_y_deduplicar(df)
+    duplicados = registros_antes - len(df)
+    if duplicados > 0:
+        logger.warning(f"⚠️  {duplicados:,} barras duplicadas eliminadas (mismo DateTime y Symbol)")
+
+    return df
+
+def fecha_desde_archivo(filepath):
+    """
+    Extrae la fecha del nombre de archivo Databento
+
+    'glbx-mdp3-20201009.ohlcv-1m.MNQH1.csv' -> '20201009'
+    """
+    return Path(filepath).name.split('.')[0].split('-')[-1]
+
+def _ordenar_y_deduplicar(df):
+    """Ordena por DateTime y Symbol y elimina barras repetidas del mismo contrato"""
+    df = df.sort_values(['DateTime', 'Symbol'], kind='stable')
+    return df.drop_duplicates(subset=['DateTime', 'Symbol'], keep='first').reset_index(drop=True)
+
+def consolidar_instrumento_pipeline(archivos, output_file, n_workers=N_WORKERS):
+    """
+    Consolida y exporta un instrumento con el pipeline por etapas
+
+    Los archivos Databento son diarios y la lista está ordenada por fecha,
+    así que el escritor solo necesita ordenar los archivos de un mismo día:
+    cada día se ordena, se deduplica y se escribe en cuanto llega el primer
+    archivo del día siguiente. La memoria es la de un día, no la del histórico.
+
+    Args:
+        archivos: Lista de rutas del instrumento (ordenadas por nombre)
+        output_file: Archivo CSV de salida
+        n_workers: Procesos de parseo
+
+    Returns:
+        Diccionario con registros, rango y contratos, o None si no hay datos
+    """
+    OUTPUT_PATH.mkdir(parents=True, exist_ok=True)
+
+    stats = {'registros': 0, 'duplicados': 0, 'inicio': None, 'fin': None, 'contratos': set()}
+    dia_actual = None
+    bloque_dia = []
+
+    def escribir_dia(f):
+        df = pd.concat(bloque_dia, ignore_index=True)
+        registros_antes = len(df)
+        df = _ordenar_y_deduplicar(df)
+        stats['duplicados'] += registros_antes - len(df)
+
+        if stats['fin'] is not None and df['DateTime'].iat[0] < stats['fin']:
+            logger.warning(f"⚠️  Día {dia_actual}: barras anteriores a lo ya escrito, "
+                           f"el consolidado puede no quedar ordenado")
+
+        formatear_bloque_iso(df, f, cabecera=stats['registros'] == 0)
+        stats['registros'] += len(df)
+        stats['inicio'] = df['DateTime'].iat[0] if stats['inicio'] is None else stats['inicio']
+        stats['fin'] = df['DateTime'].iat[-1]
+        stats['contratos'].update(df['Symbol'].unique())
+
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        for i, (archivo, df) in enumerate(
+                ejecutar_pipeline(archivos, cargar_archivo_databento, n_procesos=n_workers), start=1):
+            if i % 1000 == 0:
+                logger.info(f"   {i:,}/{len(archivos):,} archivos procesados")
+            if df is None:
+                continue
+
+            dia = fecha_desde_archivo(archivo)
+            if dia != dia_actual and bloque_dia:
+                escribir_dia(f)
+                bloque_dia = []
+            dia_actual = dia
+            bloque_dia.append(df)
+
+        if bloque_dia:
+            escribir_dia(f)
+
+    if stats['registros'] == 0:
+        output_file.unlink()
+        return None
+
+    if stats['duplicados'] > 0:
+        logger.warning(f"⚠️  {stats['duplicados']:,} barras duplicadas eliminadas (mismo DateTime y Symbol)")
+
+    logger.info(f"✅ Archivo guardado: {output_file}")
+    logger.info(f"   Registros: {stats['registros']:,}")
+    logger.info(f"   Rango: {stats['inicio']} a {stats['fin']}")
+    logger.info(f"   Contratos: {len(stats['contratos'])}")
+
+    return stats
+
+def exportar_instrumento(df, output_file):
+    """
+    Exporta el consolidado de un instrumento a CSV
+
+    Args:
+        df: DataFrame consolidado
+        output_file: Ruta del archivo de salida
+    """
+    OUTPUT_PATH.mkdir(parents=True, exist_ok=True)
+    df.to_csv(output_file, index=False, date_format='%Y-%m-%d %H:%M:%S')
+
+    logger.info(f"✅ Archivo guardado: {output_file}")
+    logger.info(f"   Registros: {len(df):,}")
+    logger.info(f"   Rango: {df['DateTime'].min()} a {df['DateTime'].max()}")
+    logger.info(f"   Contratos: {df['Symbol'].nunique()}")
+
+def ingestar_instrumento(instrumento, n_workers=N_WORKERS):
+    """
+    Ingesta completa de un instrumento: outrights y (opcionalmente) spreads
+
+    Args:
+        instrumento: 'NQ' o 'MNQ'
+        n_workers: Número de procesos para la lectura
+    """
+    logger.info("\n" + "="*80)
+    logger.info(f"INGESTANDO {instrumento}")
+    logger.info("="*80)
+
+    outrights, spreads = listar_archivos(instrumento)
+    logger.info(f"📂 Archivos outright: {len(outrights):,}")
+    logger.info(f"📂 Archivos spread: {len(spreads):,} "
+                f"({'archivo propio' if SEPARAR_SPREADS else 'descartados'})")
+
+    grupos = [(outrights, OUTPUT_PATH / f"{instrumento}_1min_databento.csv")]
+    if SEPARAR_SPREADS and len(spreads) > 0:
+        grupos.append((spreads, OUTPUT_PATH / f"{instrumento}_1min_databento_spreads.csv"))
+
+    for archivos, output_file in grupos:
+        if MODO_PIPELINE:
+            resultado = consolidar_instrumento_pipeline(archivos, output_file, n_workers=n_workers)
+        else:
+            resultado = consolidar_instrumento(archivos, n_workers=n_workers)
+            if resultado is not None:
+                exportar_instrumento(resultado, output_file)
+
+        if resultado is None:
+            logger.error(f"❌ No se cargaron datos de {instrumento} ({output_file.name})")
+
+def main():
+    """
+    Función principal
+    """
+    try:
+        logger.info("="*80)
+        logger.info("INGESTA DE DATOS DATABENTO OHLCV-1m")
+        logger.info("="*80)
+        logger.info(f"Procesos: {N_WORKERS}")
+
+        for instrumento in INSTRUMENTOS:
+            ingestar_instrumento(instrumento)
+
+        logger.info("\n" + "="*80)
+        logger.info("✅ INGESTA COMPLETADA EXITOSAMENTE")
+        logger.info("="*80)
+
+    except Exception as e:
+        logger.error(f"❌ Error en ejecución principal: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Lector por Bloques y con Tipos de los Minutos de Procesados
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Lee los CSV de minutos de Procesados (NQ_1min_2020-2025_Limpio.csv y
+    compatibles) en bloques con memoria acotada (tarea 1.4.1 del plan):
+
+    - Esquema de tipos explícito: precios float32 (exactos para múltiplos
+      de 0.25 por debajo de 4 millones de puntos) y Volume int32; la mitad
+      de memoria que los float64/int64 por defecto
+    - Filtro por rango de fechas: como el archivo está ordenado por
+      DateTime, la lectura se detiene en cuanto un bloque supera el final
+      del rango y los bloques anteriores al inicio se descartan enteros
+    - Agrupación por días: leer_minutos_por_dias() entrega cada día
+      completo aunque caiga entre dos bloques (por fecha de sesión CME o
+      por fecha natural)
+
+    Estos lectores leen las fuentes de la publicación (_Limpio.csv, del que
+    se escriben el almacén Parquet y el binario memmap, y _Continuo.csv,
+    que lleva Symbol y no se publica en el almacén), así que no pueden leer
+    del almacén. Los minutos ya publicados se leen con
+    almacen_barras.cargar_barras().
+
+Uso:
+    from lector_minutos import leer_minutos_por_bloques, leer_minutos_por_dias
+    for bloque in leer_minutos_por_bloques(ruta, inicio='2024-01-01'):
+        ...
+    for fecha, df_dia in leer_minutos_por_dias(ruta, agrupacion='sesion'):
+        ...
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from indice_sesiones import calcular_fechas_sesion
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE_LECTURA = 200_000
+FORMATO_DATETIME = '%Y-%m-%d %H:%M:%S'
+
+ESQUEMA_MINUTOS = {
+    'Open': 'float32',
+    'High': 'float32',
+    'Low': 'float32',
+    'Close': 'float32',
+    'Volume': 'int32',
+    'Valid': 'bool',
+}
+
+AGRUPACIONES = ('sesion', 'calendario')
+
+def _tipar_bloque(bloque):
+    """Convierte la columna DateTime del bloque (texto ISO) a datetime64"""
+    bloque['DateTime'] = pd.to_datetime(bloque['DateTime'], format=FORMATO_DATETIME)
+    return bloque
+
+def leer_minutos_por_bloques(ruta, esquema=ESQUEMA_MINUTOS, inicio=None, fin=None,
+                             columnas=None, tamano=TAMANO_BLOQUE_LECTURA):
+    """
+    Lee un CSV de minutos en bloques tipados, opcionalmente filtrados por fecha
+
+    Args:
+        ruta: Archivo CSV con columna DateTime (ordenado de forma creciente)
+        esquema: Diccionario {columna: dtype} (las columnas ausentes se ignoran)
+        inicio: Fecha/hora inicial incluida (None = desde el principio)
+        fin: Fecha/hora final excluida (None = hasta el final)
+        columnas: Columnas a leer además de DateTime (None = todas)
+        tamano: Filas por bloque
+
+    Yields:
+        DataFrames con DateTime en datetime64 y el resto según el esquema
+    """
+    ruta = Path(ruta)
+    inicio = pd.Timestamp(inicio) if inicio is not None else None
+    fin = pd.Timestamp(fin) if fin is not None else None
+
+    cabecera = pd.read_csv(ruta, nrows=0).columns
+    if columnas is not None:
+        usecols = ['DateTime'] + [c for c in columnas if c != 'DateTime']
+    else:
+        usecols = list(cabecera)
+    tipos = {c: t for c, t in esquema.items() if c in usecols}
+
+    with pd.read_csv(ruta, usecols=usecols, dtype=tipos, chunksize=tamano) as lector:
+        for bloque in lector:
+            bloque = _tipar_bloque(bloque)[usecols]
+            if len(bloque) == 0:
+                continue
+
+            ultimo = bloque['DateTime'].iloc[-1]
+            if inicio is not None and ultimo < inicio:
+                continue
+
+            if inicio is not None or fin is not None:
+                mascara = np.ones(len(bloque), dtype=bool)
+                if inicio is not None:
+                    mascara &= (bloque['DateTime'] >= inicio).to_numpy()
+                if fin is not None:
+                    mascara &= (bloque['DateTime'] < fin).to_numpy()
+                bloque = bloque[mascara]
+
+            if len(bloque) > 0:
+                yield bloque.reset_index(drop=True)
+
+            # El archivo está ordenado: nada de lo que queda entra en el rango
+            if fin is not None and ultimo >= fin:
+                break
+
+def _fechas_grupo(timestamps, agrupacion):
+    """Fecha de agrupación (sesión CME o día natural) de cada barra"""
+    if agrupacion == 'sesion':
+        return calcular_fechas_sesion(timestamps)
+    return np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[D]')
+
+def leer_minutos_por_dias(ruta, esquema=ESQUEMA_MINUTOS, inicio=None, fin=None,
+                          columnas=None, agrupacion='sesion', tamano=TAMANO_BLOQUE_LECTURA):
+    """
+    Lee un CSV de minutos y entrega un día completo cada vez
+
+    Args:
+        ruta: Archivo CSV con columna DateTime (ordenado de forma creciente)
+        esquema: Diccionario {columna: dtype}
+        inicio: Fecha/hora inicial incluida (None = desde el principio)
+        fin: Fecha/hora final excluida (None = hasta el final)
+        columnas: Columnas a leer además de DateTime (None = todas)
+        agrupacion: 'sesion' (fecha de sesión CME) o 'calendario' (fecha natural)
+        tamano: Filas por bloque de lectura
+
+    Yields:
+        Tuplas (fecha pd.Timestamp, DataFrame del día)
+    """
+    if agrupacion not in AGRUPACIONES:
+        raise ValueError(f"Agrupación no válida: {agrupacion} (opciones: {AGRUPACIONES})")
+
+    pendiente = None
+    for bloque in leer_minutos_por_bloques(ruta, esquema, inicio, fin, columnas, tamano):
+        if pendiente is not None:
+            bloque = pd.concat([pendiente, bloque], ignore_index=True)
+
+        fechas = _fechas_grupo(bloque['DateTime'], agrupacion)
+        cortes = np.flatnonzero(fechas[1:] != fechas[:-1]) + 1
+        inicios = np.concatenate([[0], cortes])
+
+        # El último día del bloque puede continuar en el siguiente
+        for desde, hasta in zip(inicios[:-1], cortes):
+            yield pd.Timestamp(fechas[desde]), bloque.iloc[desde:hasta].reset_index(drop=True)
+        pendiente = bloque.iloc[inicios[-1]:].reset_index(drop=True)
+
+    if pendiente is not None and len(pendiente) > 0:
+        fecha = _fechas_grupo(pendiente['DateTime'].iloc[:1], agrupacion)[0]
+        yield pd.Timestamp(fecha), pendiente
+
+def leer_minutos(ruta, esquema=ESQUEMA_MINUTOS, inicio=None, fin=None,
+                 columnas=None, tamano=TAMANO_BLOQUE_LECTURA):
+    """
+    Lee un CSV de minutos completo (o un rango) con tipos reducidos
+
+    Args:
+        ruta: Archivo CSV con columna DateTime
+        esquema: Diccionario {columna: dtype}
+        inicio: Fecha/hora inicial incluida (None = desde el principio)
+        fin: Fecha/hora final excluida (None = hasta el final)
+        columnas: Columnas a leer además de DateTime (None = todas)
+        tamano: Filas por bloque de lectura
+
+    Returns:
+        DataFrame tipado
+    """
+    bloques = list(leer_minutos_por_bloques(ruta, esquema, inicio, fin, columnas, tamano))
+    if not bloques:
+        vacio = pd.read_csv(ruta, nrows=0)
+        if columnas is not None:
+            vacio = vacio[['DateTime'] + [c for c in columnas if c != 'DateTime']]
+        return _tipar_bloque(vacio).astype({c: t for c, t in esquema.items() if c in vacio.columns})
+    return pd.concat(bloques, ignore_index=True)
@@ -0,0 +1,287 @@
+"""
+Manifiesto de Archivos Brutos para Consolidación Incremental
+Versión: 1.0
+Fecha: 2025-12-05
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Mantiene un manifiesto JSON con la huella de cada archivo bruto ya
+    consolidado (ruta, tamaño, mtime, hash SHA-256 y rango de timestamps).
+    Los consolidadores lo usan para parsear solo los archivos nuevos o
+    modificados en lugar de releer toda la carpeta en cada ejecución.
+
+Formato del manifiesto:
+    {
+        "version": 1,
+        "archivos": {
+            "NQ 03-24.Last.txt": {
+                "path": "...", "size": 123, "mtime": 1733400000.0,
+                "sha256": "...", "ts_min": "2023-12-17 21:46:00",
+                "ts_max": "2024-03-15 16:59:00", "registros": 79565
+            }
+        }
+    }
+
+    Los archivos sin registros válidos también se registran (ts_min/ts_max
+    null, registros 0) para que no se vuelvan a leer en cada ejecución.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+VERSION_MANIFIESTO = 1
+TAMANO_BLOQUE_HASH = 1024 * 1024  # 1 MB
+
+def manifiesto_vacio():
+    """Devuelve un manifiesto sin archivos registrados"""
+    return {'version': VERSION_MANIFIESTO, 'archivos': {}}
+
+def calcular_hash_archivo(filepath):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo
+
+    Args:
+        filepath: Ruta al archivo
+
+    Returns:
+        Hash en hexadecimal
+    """
+    sha = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+def cargar_manifiesto(ruta):
+    """
+    Carga el manifiesto desde disco
+
+    Args:
+        ruta: Ruta al archivo JSON del manifiesto
+
+    Returns:
+        Diccionario del manifiesto (vacío si no existe o no es válido)
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        logger.info(f"📄 Sin manifiesto previo: {ruta}")
+        return manifiesto_vacio()
+
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            manifiesto = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️  Manifiesto ilegible ({e}), se reconstruirá: {ruta}")
+        return manifiesto_vacio()
+
+    if manifiesto.get('version') != VERSION_MANIFIESTO:
+        logger.warning(f"⚠️  Versión de manifiesto no soportada, se reconstruirá: {ruta}")
+        return manifiesto_vacio()
+
+    logger.info(f"📄 Manifiesto cargado: {len(manifiesto['archivos'])} archivos registrados")
+    return manifiesto
+
+def guardar_manifiesto(manifiesto, ruta):
+    """
+    Guarda el manifiesto de forma atómica (archivo temporal + reemplazo)
+
+    Args:
+        manifiesto: Diccionario del manifiesto
+        ruta: Ruta al archivo JSON del manifiesto
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+
+    ruta_tmp = ruta.with_suffix(ruta.suffix + '.tmp')
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(ruta_tmp, ruta)
+
+    logger.info(f"✅ Manifiesto guardado: {ruta} ({len(manifiesto['archivos'])} archivos)")
+
+def clasificar_archivos(archivos, manifiesto):
+    """
+    Compara los archivos de la carpeta con el manifiesto
+
+    Si tamaño y mtime coinciden el archivo se da por no modificado sin leerlo;
+    en caso contrario se calcula el hash para confirmar si cambió su contenido.
+
+    Args:
+        archivos: Lista de rutas a los archivos brutos actuales
+        manifiesto: Diccionario del manifiesto
+
+    Returns:
+        Diccionario con listas 'nuevos', 'modificados', 'sin_cambios'
+        (rutas) y 'eliminados' (nombres de archivo)
+    """
+    registrados = manifiesto['archivos']
+    cambios = {'nuevos': [], 'modificados': [], 'sin_cambios': [], 'eliminados': []}
+
+    for archivo in archivos:
+        archivo = Path(archivo)
+        entrada = registrados.get(archivo.name)
+
+        if entrada is None:
+            cambios['nuevos'].append(archivo)
+            continue
+
+        stat = archivo.stat()
+        if stat.st_size == entrada['size'] and stat.st_mtime == entrada['mtime']:
+            cambios['sin_cambios'].append(archivo)
+            continue
+
+        if calcular_hash_archivo(archivo) == entrada['sha256']:
+            # Solo cambió el mtime (copia, touch...): contenido idéntico
+            entrada['mtime'] = stat.st_mtime
+            cambios['sin_cambios'].append(archivo)
+        else:
+            cambios['modificados'].append(archivo)
+
+    nombres_actuales = {Path(a).name for a in archivos}
+    cambios['eliminados'] = sorted(set(registrados) - nombres_actuales)
+
+    logger.info(
+        f"📄 Manifiesto: {len(cambios['nuevos'])} nuevos, "
+        f"{len(cambios['modificados'])} modificados, "
+        f"{len(cambios['sin_cambios'])} sin cambios, "
+        f"{len(cambios['eliminados'])} eliminados"
+    )
+
+    return cambios
+
+def registrar_archivo(manifiesto, filepath, ts_min, ts_max, registros):
+    """
+    Registra (o actualiza) un archivo en el manifiesto
+
+    Args:
+        manifiesto: Diccionario del manifiesto
+        filepath: Ruta al archivo bruto
+        ts_min: Primer timestamp del archivo (None si no tiene registros)
+        ts_max: Último timestamp del archivo (None si no tiene registros)
+        registros: Número de registros válidos cargados
+    """
+    filepath = Path(filepath)
+    stat = filepath.stat()
+
+    manifiesto['archivos'][filepath.name] = {
+        'path': str(filepath),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': calcular_hash_archivo(filepath),
+        'ts_min': None if ts_min is None else str(ts_min),
+        'ts_max': None if ts_max is None else str(ts_max),
+        'registros': int(registros)
+    }
+
+def anios_modificados(manifiesto_previo, manifiesto_nuevo):
+    """
+    Años cubiertos por los archivos que cambiaron entre dos manifiestos
+
+    Un archivo nuevo, eliminado o con distinto contenido afecta a todos los
+    años de su rango de timestamps (el anterior y el nuevo).
+
+    Args:
+        manifiesto_previo: Manifiesto antes de la consolidación
+        manifiesto_nuevo: Manifiesto después de la consolidación
+
+    Returns:
+        Conjunto de años (int)
+    """
+    previos = manifiesto_previo['archivos']
+    nuevos = manifiesto_nuevo['archivos']
+    anios = set()
+
+    for nombre in set(previos) | set(nuevos):
+        entrada_previa = previos.get(nombre)
+        entrada_nueva = nuevos.get(nombre)
+        if (entrada_previa is not None and entrada_nueva is not None and
+                entrada_previa['sha256'] == entrada_nueva['sha256']):
+            continue
+
+        for entrada in (entrada_previa, entrada_nueva):
+            if entrada is not None and entrada['ts_min'] is not None:
+                anio_min = int(entrada['ts_min'][:4])
+                anio_max = int(entrada['ts_max'][:4])
+                anios.update(range(anio_min, anio_max + 1))
+
+    return anios
+
+def fin_si_solo_anexa(manifiesto_previo, manifiesto_nuevo):
+    """
+    Último timestamp consolidado si el cambio solo añade registros posteriores
+
+    Es el caso habitual de la vigilancia de carpetas: aparece el archivo de un
+    contrato nuevo que empieza después de todo lo consolidado. Ningún archivo
+    registrado cambia ni desaparece y ningún archivo nuevo tiene registros
+    anteriores o iguales al último timestamp previo, así que el consolidado
+    anterior es un prefijo exacto del nuevo.
+
+    Args:
+        manifiesto_previo: Manifiesto antes de la consolidación
+        manifiesto_nuevo: Manifiesto después de la consolidación
+
+    Returns:
+        pd.Timestamp del último registro previo, o None si hay que reescribir
+    """
+    previos = manifiesto_previo['archivos']
+    nuevos = manifiesto_nuevo['archivos']
+
+    for nombre, entrada in previos.items():
+        entrada_nueva = nuevos.get(nombre)
+        if entrada_nueva is None or entrada_nueva['sha256'] != entrada['sha256']:
+            return None
+
+    finales = [pd.Timestamp(e['ts_max']) for e in previos.values() if e['ts_min'] is not None]
+    if not finales:
+        return None
+    fin = max(finales)
+
+    for nombre in set(nuevos) - set(previos):
+        entrada = nuevos[nombre]
+        if entrada['ts_min'] is not None and pd.Timestamp(entrada['ts_min']) <= fin:
+            return None
+
+    return fin
+
+def conflictos_prioridad(rangos_nuevos, archivos, manifiesto):
+    """
+    Archivos nuevos que no se pueden fusionar con el consolidado previo
+
+    En una reconstrucción completa, ante un timestamp repetido gana el
+    archivo que va antes en `archivos` (keep='first'). En una fusión
+    incremental gana el consolidado previo, así que ambas coinciden solo si
+    ningún archivo nuevo va antes que un archivo registrado cuyo rango de
+    timestamps solapa con el suyo (p.ej. 'NQ 03-26' frente a 'NQ 06-25').
+
+    Args:
+        rangos_nuevos: Diccionario {ruta: (ts_min, ts_max)} de los archivos
+            nuevos ya cargados (None si el archivo no tiene registros)
+        archivos: Todos los archivos de la carpeta, en el orden de prioridad
+        manifiesto: Manifiesto con los archivos ya consolidados
+
+    Returns:
+        Lista de tuplas (nombre nuevo, nombre registrado) en conflicto
+    """
+    posicion = {Path(a).name: i for i, a in enumerate(archivos)}
+    conflictos = []
+
+    for archivo, rango in rangos_nuevos.items():
+        if rango is None:
+            continue
+        nombre = Path(archivo).name
+        ts_min, ts_max = pd.Timestamp(rango[0]), pd.Timestamp(rango[1])
+
+        for registrado, entrada in manifiesto['archivos'].items():
+            if entrada['ts_min'] is None or posicion.get(registrado, -1) < posicion[nombre]:
+                continue
+            if pd.Timestamp(entrada['ts_min']) <= ts_max and ts_min <= pd.Timestamp(entrada['ts_max']):
+                conflictos.append((nombre, registrado))
+
+    return conflictos
@@ -0,0 +1,207 @@
+"""
+Pipeline de Ingesta por Etapas con Colas Acotadas
+Versión: 1.0
+Fecha: 2025-12-06
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Encadena las tres etapas de la ingesta de archivos brutos para que la
+    lectura de disco se solape con el trabajo de CPU:
+
+        [hilos lectores] --cola acotada--> [procesos parser/validador]
+                         --futuros--> [escritor único y ordenado]
+
+    - Lectores (hilos): leen el contenido bruto de cada archivo (I/O, libera
+      el GIL)
+    - Parsers (procesos): convierten los bytes en DataFrame y validan
+    - Escritor: el consumidor del generador recibe los resultados en el
+      mismo orden que la lista de tareas, sin importar qué proceso acaba antes
+
+    Contrapresión: un semáforo limita las tareas "en vuelo" (leídas y aún no
+    terminadas por el escritor: el permiso vuelve cuando pide la siguiente)
+    a MAX_EN_VUELO, lo que también acota la cola de leídos. Los lectores toman el permiso antes de sacar la siguiente tarea,
+    así que las tareas en vuelo son siempre las de menor índice pendientes y
+    el escritor nunca espera una tarea bloqueada. La memoria depende de
+    MAX_EN_VUELO, no del número de archivos.
+
+    Cada tarea leída se envía al pool en cuanto llega; el hilo principal
+    solo se bloquea cuando no hay nada nuevo que enviar ni la siguiente
+    tarea en orden ha terminado, y despierta con la próxima lectura o con
+    el aviso de un futuro terminado (los dos llegan por la misma cola).
+
+    Varios pipelines pueden compartir un mismo pool de procesos (p.ej. un
+    flujo de bloques por contrato que se consumen intercalados en una
+    fusión): cada uno conserva su orden y su límite de tareas en vuelo.
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+N_LECTORES = 4
+N_PROCESOS = os.cpu_count() or 1
+MAX_EN_VUELO = 64
+
+_FIN = object()
+_TERMINADO = object()
+
+def leer_bytes(filepath):
+    """Lee el contenido completo de un archivo (etapa de I/O)"""
+    return Path(filepath).read_bytes()
+
+def _lector(tareas, leer, semaforo, parada, cola_leidos):
+    """Hilo lector: toma un permiso, saca la siguiente tarea y la lee"""
+    while not parada.is_set():
+        semaforo.acquire()
+        try:
+            indice, tarea = tareas.get_nowait()
+        except queue.Empty:
+            semaforo.release()
+            break
+
+        try:
+            datos = leer(tarea)
+            error = None
+        except Exception as e:
+            datos, error = None, e
+        cola_leidos.put((indice, tarea, datos, error))
+
+    cola_leidos.put(_FIN)
+
+def ejecutar_pipeline(tareas, procesar, leer=leer_bytes, n_lectores=N_LECTORES,
+                      n_procesos=N_PROCESOS, max_en_vuelo=MAX_EN_VUELO, executor=None):
+    """
+    Ejecuta lectura, procesado y entrega ordenada de una lista de tareas
+
+    Args:
+        tareas: Lista de tareas (normalmente rutas de archivo)
+        procesar: Función (tarea, datos) -> resultado; se ejecuta en un
+            proceso aparte, debe ser importable (nivel de módulo)
+        leer: Función tarea -> datos que se ejecuta en los hilos lectores
+        n_lectores: Hilos de lectura
+        n_procesos: Procesos de parseo (1 = en el propio proceso)
+        max_en_vuelo: Máximo de tareas leídas pendientes de entregar
+        executor: Pool de procesos compartido (no se cierra al terminar);
+            None = un pool propio de n_procesos
+
+    Yields:
+        Tuplas (tarea, resultado) en el orden de `tareas`; resultado es None
+        si la lectura o el procesado fallaron (el error queda en el log)
+    """
+    tareas = list(tareas)
+    if len(tareas) == 0:
+        return
+
+    n_lectores = max(1, min(n_lectores, len(tareas)))
+    n_procesos = max(1, min(n_procesos, len(tareas)))
+
+    cola_tareas = queue.Queue()
+    for indice, tarea in enumerate(tareas):
+        cola_tareas.put((indice, tarea))
+
+    semaforo = threading.Semaphore(max_en_vuelo)
+    parada = threading.Event()
+    # Sin maxsize: el semáforo ya limita las lecturas y los avisos de los
+    # futuros terminados no deben bloquear el hilo de gestión del pool
+    cola_leidos = queue.Queue()
+
+    lectores = [
+        threading.Thread(
+            target=_lector,
+            args=(cola_tareas, leer, semaforo, parada, cola_leidos),
+            daemon=True
+        )
+        for _ in range(n_lectores)
+    ]
+    for hilo in lectores:
+        hilo.start()
+
+    propio = executor is None and n_procesos > 1
+    if propio:
+        executor = ProcessPoolExecutor(max_workers=n_procesos)
+    pendientes = {}
+    siguiente = 0
+    lectores_activos = n_lectores
+
+    def avisar(_futuro):
+        cola_leidos.put(_TERMINADO)
+
+    def recibir(elemento):
+        """Envía al pool una tarea leída (o anota el fin de un lector)"""
+        nonlocal lectores_activos
+        if elemento is _TERMINADO:
+            return
+        if elemento is _FIN:
+            lectores_activos -= 1
+            return
+
+        indice, tarea, datos, error = elemento
+        if error is not None:
+            pendientes[indice] = (tarea, None, error)
+        elif executor is not None:
+            futuro = executor.submit(procesar, tarea, datos)
+            futuro.add_done_callback(avisar)
+            pendientes[indice] = (tarea, futuro, None)
+        else:
+            try:
+                pendientes[indice] = (tarea, procesar(tarea, datos), None)
+            except Exception as e:
+                pendientes[indice] = (tarea, None, e)
+
+    def lista(entrada):
+        tarea, futuro, error = entrada
+        return error is not None or executor is None or futuro.done()
+
+    try:
+        while siguiente < len(tareas):
+            # Enviar al pool todo lo que ya han leído los lectores
+            while True:
+                try:
+                    recibir(cola_leidos.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Entregar en orden si la siguiente tarea ya terminó
+            if siguiente in pendientes and lista(pendientes[siguiente]):
+                tarea, futuro, error = pendientes.pop(siguiente)
+                resultado = None
+                if error is not None:
+                    logger.error(f"❌ Error en {tarea}: {str(error)}")
+                else:
+                    try:
+                        resultado = futuro.result() if executor is not None else futuro
+                    except Exception as e:
+                        logger.error(f"❌ Error al procesar {tarea}: {str(e)}")
+                siguiente += 1
+                yield tarea, resultado
+                semaforo.release()
+                continue
+
+            if lectores_activos == 0 and siguiente not in pendientes:
+                raise RuntimeError(f"Pipeline detenido sin entregar la tarea {siguiente}")
+
+            # Nada que enviar ni entregar: esperar una lectura o un futuro terminado
+            recibir(cola_leidos.get())
+
+    finally:
+        # Cierre ordenado también si el consumidor abandona el generador
+        parada.set()
+        for _ in range(n_lectores):
+            semaforo.release()
+        while any(hilo.is_alive() for hilo in lectores):
+            try:
+                cola_leidos.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        if propio:
+            executor.shutdown(wait=True, cancel_futures=True)
+        elif executor is not None:
+            # Pool compartido: solo se cancela lo pendiente de este pipeline
+            for _, futuro, _ in pendientes.values():
+                if futuro is not None:
+                    futuro.cancel()
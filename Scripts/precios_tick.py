@@ -0,0 +1,145 @@
+"""
+Representación de Precios en Ticks Enteros
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    El NQ cotiza en múltiplos de 0.25 puntos, así que cualquier precio se
+    puede guardar como un entero de ticks (precio * 4) en int32:
+
+        17180.25 -> 68721        68721 / 4 -> 17180.25
+
+    - La mitad de memoria que float64 por columna de precio
+    - La comprobación de rejilla es un módulo entero, no un `% 1` en float
+    - El redondeo a cuartos devuelve ticks enteros: volver a puntos (/ 4)
+      es exacto, sin deriva de coma flotante
+    - Multiplicar por 4 es exacto en float64, así que los cálculos lineales
+      (rangos, medias, Open + media * k) hechos en ticks dan exactamente 4
+      veces el resultado en puntos
+
+    Todas las funciones son vectorizadas (arrays de NumPy o Series).
+"""
+
+import numpy as np
+
+TAMANO_TICK = 0.25
+TICKS_POR_PUNTO = 4
+COLUMNAS_PRECIO = ['Open', 'High', 'Low', 'Close']
+
+# Rejilla de ticks en centésimas de punto (0.25 -> 25)
+_CENTESIMAS_POR_TICK = 25
+
+def fuera_de_rejilla(precios):
+    """
+    Máscara de precios que no son múltiplo del tick
+
+    El precio se lleva a centésimas enteras (igual que el redondeo a dos
+    decimales de la validación original) y se comprueba con módulo entero.
+
+    Args:
+        precios: Array o Series de precios en puntos
+
+    Returns:
+        Array booleano (True = precio inválido)
+    """
+    precios = np.asarray(precios)
+    if np.issubdtype(precios.dtype, np.integer):
+        return np.zeros(precios.shape, dtype=bool)
+
+    centesimas = np.rint(precios * 100)
+    invalidos = np.isnan(centesimas)
+    centesimas = np.where(invalidos, 0, centesimas).astype(np.int64)
+    return invalidos | (centesimas % _CENTESIMAS_POR_TICK != 0)
+
+def a_ticks(precios, columna='precio'):
+    """
+    Convierte precios en puntos a ticks int32
+
+    Args:
+        precios: Array o Series de precios en puntos
+        columna: Nombre para el mensaje de error
+
+    Returns:
+        Array int32 de ticks
+
+    Raises:
+        ValueError: si hay precios fuera de la rejilla (p.ej. back-adjustment por ratio)
+    """
+    precios = np.asarray(precios, dtype=np.float64)
+    ticks = precios * TICKS_POR_PUNTO
+    redondeados = np.rint(ticks)
+    if not np.array_equal(redondeados, ticks):
+        raise ValueError(f"{columna}: hay precios fuera de la rejilla de {TAMANO_TICK} puntos")
+    return redondeados.astype(np.int32)
+
+def a_puntos(ticks):
+    """
+    Convierte ticks a precios en puntos (float64, exacto)
+
+    Args:
+        ticks: Array o Series de ticks (enteros o fraccionarios)
+
+    Returns:
+        Array float64 de precios
+    """
+    return np.asarray(ticks, dtype=np.float64) / TICKS_POR_PUNTO
+
+def redondear_ticks(precios):
+    """
+    Redondea precios al tick más cercano (empates al par, como round())
+
+    Args:
+        precios: Array o Series de precios en puntos
+
+    Returns:
+        Array de ticks (float64 con valores enteros; NaN se conserva)
+    """
+    return np.rint(np.asarray(precios, dtype=np.float64) * TICKS_POR_PUNTO)
+
+def redondear_ticks_arriba(precios):
+    """
+    Redondea precios positivos al tick superior (ceiling, como RyFEM.cs)
+
+    Los precios <= 0 (niveles sin calcular) se devuelven sin redondear.
+
+    Args:
+        precios: Array o Series de precios en puntos
+
+    Returns:
+        Array de ticks (float64 con valores enteros para precios > 0)
+    """
+    ticks = np.asarray(precios, dtype=np.float64) * TICKS_POR_PUNTO
+    return np.where(ticks > 0, np.ceil(ticks), ticks)
+
+def convertir_a_ticks(df, columnas=COLUMNAS_PRECIO):
+    """
+    Pasa columnas de precio de un DataFrame a ticks int32 (in situ)
+
+    Args:
+        df: DataFrame con precios en puntos
+        columnas: Columnas a convertir (las ausentes se ignoran)
+
+    Returns:
+        El mismo DataFrame
+    """
+    for columna in columnas:
+        if columna in df.columns:
+            df[columna] = a_ticks(df[columna].to_numpy(), columna)
+    return df
+
+def convertir_a_puntos(df, columnas=COLUMNAS_PRECIO):
+    """
+    Pasa columnas en ticks de un DataFrame a puntos float64 (in situ)
+
+    Args:
+        df: DataFrame con precios en ticks
+        columnas: Columnas a convertir (las ausentes se ignoran)
+
+    Returns:
+        El mismo DataFrame
+    """
+    for columna in columnas:
+        if columna in df.columns:
+            df[columna] = a_puntos(df[columna].to_numpy())
+    return df
@@ -0,0 +1,498 @@
+"""
+Registro Declarativo de Familias de Niveles (fórmulas -> expresiones NumPy)
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Los niveles DN (calcular_niveles_DN.py), Expected Move
+    (fase1_calcular_niveles.py) y Skew (fase1_calcular_niveles_skew.py) son
+    la misma clase de cálculo: cantidades base (Q1, Q4, NR2, rango,
+    diferencia de skew) combinadas con coeficientes. Aquí cada familia se
+    declara como una lista de fórmulas de texto:
+
+        registrar_familia('mi_familia', [
+            ('Q1', 'anterior(High)'),
+            ('Q4', 'anterior(Low)'),
+            ('Range', 'Q1 - Q4'),
+            ('Std1', 'Q1 + Range * 0.125'),
+        ], sufijo='_MF')
+
+    y se compila una sola vez a un grafo de expresiones NumPy:
+
+    - Las fórmulas se analizan con ast (solo + - * /, números, nombres y las
+      funciones de FUNCIONES) y se evalúan en el mismo orden de operaciones
+      que el código escrito a mano: los resultados son idénticos bit a bit
+    - Subexpresiones compartidas: cada nodo se identifica por su estructura
+      (operación + operandos), así que una subexpresión que aparece en
+      varias fórmulas o en varias familias se calcula una sola vez
+    - Varias familias se evalúan en una única pasada sobre el grafo común
+    - Añadir una familia no necesita código de bucle: solo sus fórmulas
+
+    Nombres dentro de una fórmula:
+    - Otra fórmula de la misma familia (las referencias pueden ir hacia
+      delante; los ciclos se rechazan)
+    - Si no, una columna/valor de los datos de entrada. Una fórmula no
+      puede referirse a sí misma, así que su propio nombre designa la
+      columna de entrada: ('High', 'max_ventana(High, 3)')
+
+Uso:
+    from registro_niveles import aplicar_familias, familia_dn_ventana
+    df = aplicar_familias(df, ['dn_1d', familia_dn_ventana(3)])
+"""
+
+import ast
+import logging
+
+import numpy as np
+import pandas as pd
+
+from precios_tick import redondear_ticks, redondear_ticks_arriba, a_puntos
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------------------------------------------
+# Funciones disponibles en las fórmulas
+# ----------------------------------------------------------------------------
+
+def _anterior(valores):
+    """Valor del día anterior (desplazamiento de una fila, NaN en la primera)"""
+    resultado = np.full(len(valores), np.nan)
+    resultado[1:] = valores[:-1]
+    return resultado
+
+def _extremo_ventana(valores, ventana, maximo):
+    """
+    Máximo/mínimo de los `ventana` valores anteriores a cada fila
+
+    rolling de pandas (cola monótona, O(n)); min_periods=1 + máscara de las
+    primeras filas: igual que max()/min() de un slice (ignora NaN).
+    """
+    ventana = int(ventana)
+    if ventana < 1:
+        raise ValueError(f"Ventana no válida: {ventana} (mínimo 1)")
+    rolling = pd.Series(valores).rolling(ventana, min_periods=1)
+    extremo = rolling.max() if maximo else rolling.min()
+    resultado = extremo.shift(1).to_numpy(dtype=np.float64, copy=True)
+    resultado[:ventana] = np.nan
+    return resultado
+
+def _max_ventana(valores, ventana):
+    """Máximo de los `ventana` valores anteriores (sin la fila actual)"""
+    return _extremo_ventana(valores, ventana, maximo=True)
+
+def _min_ventana(valores, ventana):
+    """Mínimo de los `ventana` valores anteriores (sin la fila actual)"""
+    return _extremo_ventana(valores, ventana, maximo=False)
+
+def _redondear_cuarto(precios):
+    """Redondeo al 0.25 más cercano (empates al par)"""
+    return a_puntos(redondear_ticks(precios))
+
+def _techo_cuarto(precios):
+    """Redondeo al 0.25 superior de los precios > 0 (RyFEM.cs)"""
+    return a_puntos(redondear_ticks_arriba(precios))
+
+def _redondear_tick(ticks):
+    """Redondeo al tick más cercano de valores ya expresados en ticks (empates al par)"""
+    return np.rint(ticks)
+
+def _techo_tick(ticks):
+    """Redondeo al tick superior de valores > 0 ya expresados en ticks"""
+    return np.where(ticks > 0, np.ceil(ticks), ticks)
+
+# nombre -> (número de argumentos array, número de parámetros constantes, función)
+FUNCIONES = {
+    'anterior': (1, 0, _anterior),
+    'max_ventana': (1, 1, _max_ventana),
+    'min_ventana': (1, 1, _min_ventana),
+    # max de fila que ignora NaN, como DataFrame.max(axis=1)
+    'max': (2, 0, np.fmax),
+    'abs': (1, 0, np.abs),
+    'redondear_cuarto': (1, 0, _redondear_cuarto),
+    'techo_cuarto': (1, 0, _techo_cuarto),
+    'redondear_tick': (1, 0, _redondear_tick),
+    'techo_tick': (1, 0, _techo_tick),
+}
+
+OPERADORES = {
+    ast.Add: '+',
+    ast.Sub: '-',
+    ast.Mult: '*',
+    ast.Div: '/',
+}
+
+_APLICAR_OPERADOR = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.divide,
+}
+
+# ----------------------------------------------------------------------------
+# Registro
+# ----------------------------------------------------------------------------
+
+REGISTRO = {}
+_PROGRAMAS = {}
+
+def registrar_familia(nombre, formulas, sufijo=''):
+    """
+    Declara (o reemplaza) una familia de niveles
+
+    Args:
+        nombre: Identificador de la familia
+        formulas: Lista de (columna, expresión) en el orden de salida; las
+            columnas que empiezan por '_' son intermedias y no se devuelven
+        sufijo: Sufijo añadido a las columnas de salida (p.ej. '_3D')
+
+    Returns:
+        Nombre de la familia
+
+    Raises:
+        ValueError: si una fórmula no es válida o hay columnas repetidas
+    """
+    columnas = [columna for columna, _ in formulas]
+    repetidas = sorted({c for c in columnas if columnas.count(c) > 1})
+    if repetidas:
+        raise ValueError(f"Familia '{nombre}': columnas repetidas {repetidas}")
+
+    arboles = {}
+    for columna, expresion in formulas:
+        try:
+            arboles[columna] = ast.parse(expresion, mode='eval').body
+        except SyntaxError as e:
+            raise ValueError(f"Familia '{nombre}', {columna}: fórmula no válida '{expresion}' ({e.msg})")
+
+    REGISTRO[nombre] = {
+        'nombre': nombre,
+        'formulas': list(formulas),
+        'arboles': arboles,
+        'sufijo': sufijo,
+    }
+    _PROGRAMAS.clear()
+    return nombre
+
+# ----------------------------------------------------------------------------
+# Compilación
+# ----------------------------------------------------------------------------
+
+def _nodo(programa, clave):
+    """Identificador del nodo con esa estructura (lo crea si no existe)"""
+    indice = programa['indice']
+    if clave not in indice:
+        indice[clave] = len(programa['nodos'])
+        programa['nodos'].append(clave)
+    return indice[clave]
+
+def _compilar_expresion(arbol, familia, columna, programa, resueltas, pila):
+    """Convierte un árbol ast en nodos del grafo y devuelve el nodo raíz"""
+    contexto = f"Familia '{familia['nombre']}', {columna}"
+
+    if isinstance(arbol, ast.Constant) and isinstance(arbol.value, (int, float)) \
+            and not isinstance(arbol.value, bool):
+        return _nodo(programa, ('const', float(arbol.value)))
+
+    if isinstance(arbol, ast.Name):
+        if arbol.id in familia['arboles'] and arbol.id != columna:
+            return _resolver(arbol.id, familia, programa, resueltas, pila)
+        return _nodo(programa, ('dato', arbol.id))
+
+    if isinstance(arbol, ast.BinOp) and type(arbol.op) in OPERADORES:
+        izquierda = _compilar_expresion(arbol.left, familia, columna, programa, resueltas, pila)
+        derecha = _compilar_expresion(arbol.right, familia, columna, programa, resueltas, pila)
+        return _nodo(programa, ('op', OPERADORES[type(arbol.op)], izquierda, derecha))
+
+    if isinstance(arbol, ast.UnaryOp) and isinstance(arbol.op, (ast.USub, ast.UAdd)):
+        operando = _compilar_expresion(arbol.operand, familia, columna, programa, resueltas, pila)
+        return _nodo(programa, ('neg', operando)) if isinstance(arbol.op, ast.USub) else operando
+
+    if isinstance(arbol, ast.Call) and isinstance(arbol.func, ast.Name) and arbol.func.id in FUNCIONES:
+        n_arrays, n_parametros, _ = FUNCIONES[arbol.func.id]
+        if len(arbol.args) != n_arrays + n_parametros or arbol.keywords:
+            raise ValueError(f"{contexto}: {arbol.func.id}() espera {n_arrays + n_parametros} argumentos")
+        argumentos = tuple(
+            _compilar_expresion(a, familia, columna, programa, resueltas, pila)
+            for a in arbol.args[:n_arrays]
+        )
+        parametros = []
+        for parametro in arbol.args[n_arrays:]:
+            if not isinstance(parametro, ast.Constant) or not isinstance(parametro.value, (int, float)):
+                raise ValueError(f"{contexto}: los parámetros de {arbol.func.id}() deben ser números")
+            parametros.append(parametro.value)
+        return _nodo(programa, ('fn', arbol.func.id, tuple(parametros)) + argumentos)
+
+    raise ValueError(f"{contexto}: expresión no soportada '{ast.unparse(arbol)}'")
+
+def _resolver(columna, familia, programa, resueltas, pila):
+    """Nodo de una fórmula de la familia (compilada una sola vez)"""
+    if columna in resueltas:
+        return resueltas[columna]
+    if columna in pila:
+        ciclo = ' -> '.join(pila + [columna])
+        raise ValueError(f"Familia '{familia['nombre']}': referencia circular {ciclo}")
+
+    pila.append(columna)
+    nodo = _compilar_expresion(familia['arboles'][columna], familia, columna, programa, resueltas, pila)
+    pila.pop()
+    resueltas[columna] = nodo
+    return nodo
+
+def compilar_familias(nombres):
+    """
+    Compila varias familias a un único grafo de expresiones
+
+    Args:
+        nombres: Nombres de familias registradas
+
+    Returns:
+        Programa: diccionario con 'nodos' (en orden de evaluación),
+        'salidas' [(columna de salida, nodo)] y 'datos' (entradas necesarias)
+
+    Raises:
+        KeyError: si una familia no está registrada
+        ValueError: si dos familias producen la misma columna de salida
+    """
+    clave = tuple(nombres)
+    if clave in _PROGRAMAS:
+        return _PROGRAMAS[clave]
+
+    programa = {'nodos': [], 'indice': {}, 'salidas': []}
+    columnas_salida = set()
+
+    for nombre in nombres:
+        if nombre not in REGISTRO:
+            raise KeyError(f"Familia de niveles no registrada: '{nombre}'")
+        familia = REGISTRO[nombre]
+        resueltas = {}
+        for columna, _ in familia['formulas']:
+            nodo = _resolver(columna, familia, programa, resueltas, [])
+            if columna.startswith('_'):
+                continue
+            salida = f"{columna}{familia['sufijo']}"
+            if salida in columnas_salida:
+                raise ValueError(f"Columna de salida repetida entre familias: {salida}")
+            columnas_salida.add(salida)
+            programa['salidas'].append((salida, nodo))
+
+    programa['datos'] = sorted({n[1] for n in programa['nodos'] if n[0] == 'dato'})
+    _PROGRAMAS[clave] = programa
+    return programa
+
+def columnas_salida(nombres):
+    """
+    Columnas que añaden las familias (en el orden de aplicar_familias())
+
+    Args:
+        nombres: Nombres de familias registradas
+
+    Returns:
+        Lista de columnas de salida
+    """
+    return [salida for salida, _ in compilar_familias(nombres)['salidas']]
+
+# ----------------------------------------------------------------------------
+# Evaluación
+# ----------------------------------------------------------------------------
+
+def _valor_entrada(datos, nombre):
+    """Columna o escalar de entrada como float64"""
+    valor = datos[nombre]
+    if np.ndim(valor) == 0:
+        return np.float64(valor)
+    return np.asarray(valor, dtype=np.float64)
+
+def evaluar_familias(datos, nombres):
+    """
+    Evalúa varias familias en una sola pasada sobre el grafo compilado
+
+    Args:
+        datos: DataFrame o diccionario con las columnas de entrada (y
+            escalares como Multiplicador)
+        nombres: Nombres de familias registradas
+
+    Returns:
+        Diccionario {columna de salida: array} en el orden de declaración
+
+    Raises:
+        KeyError: si falta una entrada necesaria
+    """
+    programa = compilar_familias(nombres)
+
+    disponibles = datos.columns if isinstance(datos, pd.DataFrame) else datos.keys()
+    faltan = [d for d in programa['datos'] if d not in disponibles]
+    if faltan:
+        raise KeyError(f"Faltan datos de entrada para {list(nombres)}: {faltan}")
+
+    # Rangos nulos o NaN dan inf/NaN sin avisos, como las columnas de pandas
+    valores = [None] * len(programa['nodos'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i, nodo in enumerate(programa['nodos']):
+            tipo = nodo[0]
+            if tipo == 'dato':
+                valores[i] = _valor_entrada(datos, nodo[1])
+            elif tipo == 'const':
+                valores[i] = nodo[1]
+            elif tipo == 'op':
+                valores[i] = _APLICAR_OPERADOR[nodo[1]](valores[nodo[2]], valores[nodo[3]])
+            elif tipo == 'neg':
+                valores[i] = np.negative(valores[nodo[1]])
+            else:
+                _, _, funcion = FUNCIONES[nodo[1]]
+                argumentos = [valores[a] for a in nodo[3:]]
+                valores[i] = funcion(*argumentos, *nodo[2])
+
+    return {salida: valores[nodo] for salida, nodo in programa['salidas']}
+
+def aplicar_familias(df, nombres, parametros=None):
+    """
+    Añade al DataFrame las columnas de varias familias (una sola pasada)
+
+    Args:
+        df: DataFrame con las columnas de entrada
+        nombres: Nombres de familias registradas
+        parametros: Escalares adicionales de las fórmulas (p.ej.
+            {'Multiplicador': 0.682})
+
+    Returns:
+        DataFrame con las columnas añadidas (las existentes se sobrescriben)
+    """
+    datos = df
+    if parametros:
+        datos = {columna: df[columna] for columna in df.columns}
+        datos.update(parametros)
+
+    nuevas = evaluar_familias(datos, nombres)
+    # Las salidas que solo dependen de escalares se extienden a todas las filas
+    nuevas = {
+        columna: (np.full(len(df), valor, dtype=np.float64) if np.ndim(valor) == 0 else valor)
+        for columna, valor in nuevas.items()
+    }
+
+    for columna in [c for c in nuevas if c in df.columns]:
+        df[columna] = nuevas.pop(columna)
+    if nuevas:
+        df = pd.concat([df, pd.DataFrame(nuevas, index=df.index)], axis=1)
+    return df
+
+# ----------------------------------------------------------------------------
+# Familias del sistema
+# ----------------------------------------------------------------------------
+
+# Niveles DN: (columna, base, signo, coeficiente) -> base ± Range * coeficiente
+# (calculosDN.md). 1D+/1D- usan medio rango (coeficiente 0.5 = Half_Range)
+NIVELES_DN = [
+    ('Z2H', 'NR2', 1, 0.159),
+    ('Z2L', 'NR2', 1, 0.125),
+    ('Z3H', 'NR2', -1, 0.125),
+    ('Z3L', 'NR2', -1, 0.159),
+    ('TCH', 'Q1', -1, 0.125),
+    ('TCL', 'Q1', -1, 0.159),
+    ('TVH', 'Q4', 1, 0.159),
+    ('TVL', 'Q4', 1, 0.125),
+    ('Std1', 'Q1', 1, 0.125),
+    ('Std2', 'Q1', 1, 0.159),
+    ('Std3', 'Q1', 1, 0.25),
+    ('Std4', 'Q1', 1, 0.341),
+    ('Std5', 'Q1', 1, 0.375),
+    ('Std1_neg', 'Q4', -1, 0.125),
+    ('Std2_neg', 'Q4', -1, 0.159),
+    ('Std3_neg', 'Q4', -1, 0.25),
+    ('Std4_neg', 'Q4', -1, 0.341),
+    ('Std5_neg', 'Q4', -1, 0.375),
+    ('1D_pos', 'Q1', 1, 0.5),
+    ('1D_neg', 'Q4', -1, 0.5),
+]
+
+def _formulas_dn(niveles=NIVELES_DN):
+    """Fórmulas 'base ± Range * coeficiente' de la tabla de niveles DN"""
+    return [
+        (columna, f"{base} {'+' if signo > 0 else '-'} Range * {coeficiente!r}")
+        for columna, base, signo, coeficiente in niveles
+    ]
+
+# DN One Day: Q1/Q4 = High/Low del día anterior (calculosDN.md líneas 3-27)
+registrar_familia('dn_1d', [
+    ('Q1', 'anterior(High)'),
+    ('Q4', 'anterior(Low)'),
+    ('Range', 'Q1 - Q4'),
+    ('Half_Range', 'Range / 2'),
+    ('NR2', 'Q1 - Half_Range'),
+] + _formulas_dn())
+
+def familia_dn_ventana(ventana):
+    """
+    Registra (si no existe) la familia DN de N días y devuelve su nombre
+
+    calculosDN.md líneas 29-53: High/Low de la ventana de los N días
+    anteriores, NR2 desde el mínimo y Q1/Q4 reconstruidos desde NR2.
+    Columnas con sufijo _<N>D.
+
+    Args:
+        ventana: Número de días de la ventana
+
+    Returns:
+        Nombre de la familia ('dn_<N>d')
+    """
+    ventana = int(ventana)
+    if ventana < 1:
+        raise ValueError(f"Ventana DN no válida: {ventana} (mínimo 1 día)")
+
+    nombre = f"dn_{ventana}d" if ventana != 1 else 'dn_1d_ventana'
+    if nombre not in REGISTRO:
+        registrar_familia(nombre, [
+            ('Q1', 'NR2 + Half_Range'),
+            ('Q4', 'NR2 - Half_Range'),
+            ('Range', 'High - Low'),
+            ('High', f'max_ventana(High, {ventana})'),
+            ('Low', f'min_ventana(Low, {ventana})'),
+            ('Half_Range', 'Range / 2'),
+            ('NR2', 'Low + Half_Range'),
+        ] + _formulas_dn(), sufijo=f"_{ventana}D")
+    return nombre
+
+# Expected Move (RyFEM.cs): entradas Open, BullishAvg, BearishAvg (ver
+# expected_move.py) y el escalar Multiplicador (RANGE_MULTIPLIER)
+_FORMULAS_EXPECTED_MOVE = [
+    ('EMH_Raw', 'Open + BullishAvg * Multiplicador'),
+    ('EML_Raw', 'Open - BearishAvg * Multiplicador'),
+    ('EMH', 'techo_cuarto(EMH_Raw)'),
+    ('EML', 'techo_cuarto(EML_Raw)'),
+    ('EM_Range', 'EMH - EML'),
+]
+registrar_familia('expected_move', _FORMULAS_EXPECTED_MOVE)
+
+# Misma familia con precios en ticks: el cuarto es la unidad
+registrar_familia('expected_move_ticks', [
+    (columna, expresion.replace('techo_cuarto', 'techo_tick'))
+    for columna, expresion in _FORMULAS_EXPECTED_MOVE
+])
+
+# Niveles con Skew (calculos.md): Q1/Q4 = EMH/EML y NR2 = Open
+_FORMULAS_SKEW = [
+    ('Q1', 'EMH'),
+    ('Q4', 'EML'),
+    ('NR2', 'Open'),
+    ('RangoTotal', 'Q1 - Q4'),
+    ('PctAboveNR2', '(Q1 - NR2) / RangoTotal * 100'),
+    ('PctBelowNR2', '(NR2 - Q4) / RangoTotal * 100'),
+    ('SkewMayor', 'max(PctAboveNR2, PctBelowNR2)'),
+    ('DiferenciaSkew', 'abs(SkewMayor - 50.0)'),
+    ('TCH', 'Q1 - 0.125 * RangoTotal'),
+    ('TCL', 'Q1 - 0.159 * RangoTotal'),
+    ('TVH', 'Q1 - 0.875 * RangoTotal'),
+    ('TVL', 'Q1 - 0.9375 * RangoTotal'),
+    ('Z2H', 'redondear_cuarto(Q1 - (34.1 + DiferenciaSkew) / 100 * RangoTotal)'),
+    ('Z2L', 'redondear_cuarto(Q1 - (37.5 + DiferenciaSkew) / 100 * RangoTotal)'),
+    ('Z3H', 'redondear_cuarto(Q4 + (37.5 + DiferenciaSkew) / 100 * RangoTotal)'),
+    ('Z3L', 'redondear_cuarto(Q4 + (34.1 + DiferenciaSkew) / 100 * RangoTotal)'),
+    ('Q2', '(TCL + Z2H) / 2'),
+    ('Q3', '(TVH + Z3L) / 2'),
+]
+registrar_familia('skew', _FORMULAS_SKEW)
+
+# Misma familia con precios en ticks
+registrar_familia('skew_ticks', [
+    (columna, expresion.replace('redondear_cuarto', 'redondear_tick'))
+    for columna, expresion in _FORMULAS_SKEW
+])
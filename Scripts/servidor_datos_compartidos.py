@@ -0,0 +1,288 @@
+"""
+Servidor de Datos en Memoria Compartida (multiprocessing.shared_memory)
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Proceso de larga duración que carga una sola vez el histórico de minutos
+    (las columnas binarias de barras_memmap.py) en bloques de
+    multiprocessing.shared_memory y publica sus manejadores en un archivo:
+
+        Procesados/compartido/NQ.json
+            {pid, generacion, filas, bloques: {columna: {nombre, forma, dtype}}}
+
+    Los scripts y notebooks que se ejecutan a la vez se conectan a esos
+    bloques con conectar_datos_compartidos(): N procesos comparten una única
+    copia en RAM y arrancan sin leer disco. Los arrays tienen el mismo
+    formato que abrir_barras_memmap() (DateTime en ns, precios en ticks), así
+    que funcionan con rango_filas(), barras_a_dataframe(), barras_sesion() y
+    consultar_barras().
+
+    Si se republican las barras binarias (el puntero actual.json de
+    barras_memmap.py apunta a otra generación), el servidor carga una
+    generación nueva, reescribe el archivo de manejadores y libera
+    la anterior. Un cliente ya conectado conserva su copia hasta que se
+    desconecta. Si la recarga falla (generación a medio borrar, disco...),
+    el servidor sigue sirviendo la generación actual y lo reintenta en la
+    siguiente revisión.
+
+Uso:
+    python servidor_datos_compartidos.py      (Ctrl+C para detener)
+
+    from servidor_datos_compartidos import conectar_datos_compartidos, desconectar
+    barras, bloques = conectar_datos_compartidos()
+    ...
+    desconectar(bloques)
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from barras_memmap import INSTRUMENTO_DEFECTO, MEMMAP_PATH, abrir_columnas, carpeta_publicada
+
+logger = logging.getLogger(__name__)
+
+COMPARTIDO_PATH = Path("..") / "Procesados" / "compartido"
+# Segundos entre comprobaciones de una nueva publicación de las barras
+INTERVALO_REVISION = 30.0
+
+def _archivo_manejadores(instrumento, ruta):
+    """Archivo JSON con los manejadores publicados de un instrumento"""
+    return Path(ruta) / f"{instrumento}.json"
+
+def _guardar_manejadores(manejadores, archivo):
+    """Escribe el archivo de manejadores de forma atómica"""
+    archivo.parent.mkdir(parents=True, exist_ok=True)
+    temporal = archivo.with_suffix('.json.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manejadores, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, archivo)
+
+def cargar_en_memoria_compartida(instrumento=INSTRUMENTO_DEFECTO, ruta_memmap=MEMMAP_PATH, generacion=0,
+                                 carpeta=None):
+    """
+    Copia las columnas binarias de un instrumento a bloques de memoria compartida
+
+    Args:
+        instrumento: Subcarpeta del instrumento en el almacén binario
+        ruta_memmap: Carpeta raíz de las barras binarias
+        generacion: Número de carga (forma parte del nombre de los bloques)
+        carpeta: Generación publicada a cargar (None = la vigente)
+
+    Returns:
+        Tupla (diccionario de manejadores, lista de SharedMemory creados)
+
+    Raises:
+        FileNotFoundError: si el instrumento no está publicado
+    """
+    if carpeta is None:
+        carpeta = carpeta_publicada(Path(ruta_memmap) / instrumento)
+        if carpeta is None:
+            raise FileNotFoundError(f"No hay barras binarias publicadas en {Path(ruta_memmap) / instrumento}")
+    # Cabecera y columnas de la misma generación
+    cabecera, barras = abrir_columnas(carpeta)
+
+    bloques = []
+    descripcion = {}
+    try:
+        for columna, valores in barras.items():
+            nombre = f"{instrumento.lower()}_{columna.lower()}_{os.getpid()}_{generacion}"
+            # shared_memory no admite bloques de 0 bytes
+            bloque = shared_memory.SharedMemory(name=nombre, create=True, size=max(valores.nbytes, 1))
+            bloques.append(bloque)
+            destino = np.ndarray(valores.shape, dtype=valores.dtype, buffer=bloque.buf)
+            destino[:] = valores
+            descripcion[columna] = {
+                'nombre': bloque.name,
+                'forma': list(valores.shape),
+                'dtype': valores.dtype.str,
+            }
+    except Exception:
+        liberar_bloques(bloques)
+        raise
+
+    manejadores = {
+        'pid': os.getpid(),
+        'generacion': generacion,
+        'instrumento': instrumento,
+        'filas': cabecera['filas'],
+        'inicio': cabecera.get('inicio'),
+        'fin': cabecera.get('fin'),
+        'cargado': datetime.now().isoformat(timespec='seconds'),
+        'bloques': descripcion,
+    }
+    megas = sum(b.size for b in bloques) / 1024**2
+    logger.info(f"✅ {instrumento}: {cabecera['filas']:,} barras en memoria compartida ({megas:.1f} MB)")
+    return manejadores, bloques
+
+def liberar_bloques(bloques):
+    """
+    Cierra y elimina bloques de memoria compartida creados por el servidor
+
+    Args:
+        bloques: Lista de SharedMemory
+    """
+    for bloque in bloques:
+        bloque.close()
+        try:
+            bloque.unlink()
+        except FileNotFoundError:
+            pass
+
+def servir(instrumento=INSTRUMENTO_DEFECTO, ruta_memmap=MEMMAP_PATH, ruta=COMPARTIDO_PATH,
+           intervalo=INTERVALO_REVISION):
+    """
+    Bucle principal: mantiene los bloques vivos y recarga si cambian las barras
+
+    Args:
+        instrumento: Subcarpeta del instrumento
+        ruta_memmap: Carpeta raíz de las barras binarias
+        ruta: Carpeta donde se publica el archivo de manejadores
+        intervalo: Segundos entre comprobaciones de una nueva publicación
+    """
+    archivo = _archivo_manejadores(instrumento, ruta)
+    origen = Path(ruta_memmap) / instrumento
+
+    # Se carga exactamente la generación de la firma: una publicación
+    # posterior se detecta en la siguiente revisión
+    generacion = 0
+    firma = carpeta_publicada(origen)
+    manejadores, bloques = cargar_en_memoria_compartida(instrumento, ruta_memmap, generacion, firma)
+    _guardar_manejadores(manejadores, archivo)
+    logger.info(f"📂 Manejadores publicados: {archivo}")
+
+    try:
+        while True:
+            time.sleep(intervalo)
+            nuevos_bloques = []
+            try:
+                publicada = carpeta_publicada(origen)
+                if publicada is None or publicada == firma:
+                    continue
+
+                logger.info(f"🔄 Barras binarias republicadas ({publicada.name}): cargando nueva generación")
+                nuevos_manejadores, nuevos_bloques = cargar_en_memoria_compartida(
+                    instrumento, ruta_memmap, generacion + 1, publicada
+                )
+                _guardar_manejadores(nuevos_manejadores, archivo)
+            except Exception as e:
+                # Los clientes siguen con la generación actual; se reintenta en la próxima revisión
+                liberar_bloques(nuevos_bloques)
+                logger.warning(f"⚠️  No se pudo recargar {instrumento} ({str(e)}); "
+                               f"se sigue sirviendo la generación {generacion}, reintento en {intervalo:g} s")
+                continue
+
+            generacion += 1
+            firma = publicada
+
+            # Los clientes conectados a la generación anterior conservan su mapeo
+            liberar_bloques(bloques)
+            manejadores, bloques = nuevos_manejadores, nuevos_bloques
+
+    except KeyboardInterrupt:
+        logger.info("⏹️  Servidor detenido")
+    finally:
+        if archivo.exists():
+            archivo.unlink()
+        liberar_bloques(bloques)
+
+def _adjuntar(nombre):
+    """
+    Se conecta a un bloque existente sin que el proceso cliente lo elimine
+
+    En POSIX el resource_tracker de Python < 3.13 registra también los
+    bloques a los que solo se conecta y los elimina al terminar el proceso;
+    el bloque pertenece al servidor, así que se quita del registro.
+    """
+    bloque = shared_memory.SharedMemory(name=nombre)
+    if os.name == 'posix':
+        resource_tracker.unregister(bloque._name, 'shared_memory')
+    return bloque
+
+def conectar_datos_compartidos(instrumento=INSTRUMENTO_DEFECTO, ruta=COMPARTIDO_PATH):
+    """
+    Se conecta a las barras que publica el servidor
+
+    Args:
+        instrumento: Instrumento servido
+        ruta: Carpeta del archivo de manejadores
+
+    Returns:
+        Tupla (diccionario {columna: np.ndarray de solo lectura}, lista de
+        SharedMemory que hay que mantener vivos mientras se usan los arrays)
+
+    Raises:
+        FileNotFoundError: si el servidor no está en marcha
+    """
+    archivo = _archivo_manejadores(instrumento, ruta)
+    if not archivo.exists():
+        raise FileNotFoundError(
+            f"No hay datos compartidos de {instrumento} ({archivo}); "
+            f"arrancar antes servidor_datos_compartidos.py"
+        )
+    with open(archivo, encoding='utf-8') as f:
+        manejadores = json.load(f)
+
+    barras = {}
+    bloques = []
+    try:
+        for columna, info in manejadores['bloques'].items():
+            bloque = _adjuntar(info['nombre'])
+            bloques.append(bloque)
+            valores = np.ndarray(tuple(info['forma']), dtype=np.dtype(info['dtype']), buffer=bloque.buf)
+            valores.flags.writeable = False
+            barras[columna] = valores
+    except FileNotFoundError:
+        desconectar(bloques)
+        raise FileNotFoundError(
+            f"Los bloques de {instrumento} ya no existen (servidor detenido, pid {manejadores['pid']})"
+        )
+
+    logger.info(f"✅ Conectado a {instrumento}: {manejadores['filas']:,} barras "
+                f"(generación {manejadores['generacion']}, pid {manejadores['pid']})")
+    return barras, bloques
+
+def desconectar(bloques):
+    """
+    Cierra la conexión a los bloques (no los elimina: son del servidor)
+
+    Los arrays obtenidos de conectar_datos_compartidos() dejan de ser
+    válidos; hay que soltarlos antes de llamar a esta función.
+
+    Args:
+        bloques: Lista de SharedMemory de conectar_datos_compartidos()
+    """
+    for bloque in bloques:
+        try:
+            bloque.close()
+        except BufferError:
+            logger.warning(f"⚠️  {bloque.name}: aún hay arrays que usan el bloque, se cierra al terminar el proceso")
+
+def main():
+    """
+    Función principal
+    """
+    logger.info("="*80)
+    logger.info("SERVIDOR DE DATOS EN MEMORIA COMPARTIDA")
+    logger.info("="*80)
+
+    servir()
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('../Logs/servidor_datos_compartidos.log'),
+            logging.StreamHandler()
+        ]
+    )
+    main()
@@ -0,0 +1,9 @@
+"""
+Configuración común de pytest: los scripts se importan por nombre de módulo
+(como al ejecutarlos desde Scripts/)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,122 @@
+"""
+Pruebas del back-adjustment en los calculadores diarios
+
+Con MODO_AJUSTE los scripts leen el diario por sesión de la serie continua
+(con Symbol). Si el contrato entrante cotiza siempre 50 puntos por encima
+del saliente, la serie ajustada por diferencia es exactamente el diario del
+contrato entrante: los niveles deben coincidir con los calculados sobre él.
+"""
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indice_sesiones import construir_indice_sesiones, resumen_por_sesion
+
+SALTO = 50.0
+
+
+@pytest.fixture
+def carpeta(tmp_path, monkeypatch):
+    """Carpeta de trabajo temporal con Logs, Originales y Procesados"""
+    for nombre in ['Logs', 'Scripts', 'Originales', 'Procesados']:
+        (tmp_path / nombre).mkdir()
+    monkeypatch.chdir(tmp_path / 'Scripts')
+    return tmp_path
+
+
+def contratos(sesiones=60, semilla=11):
+    """
+    Dos contratos con barras horarias en los mismos minutos
+
+    El entrante cotiza SALTO puntos por encima y gana en volumen a partir
+    de la mitad del periodo.
+    """
+    rng = np.random.default_rng(semilla)
+    timestamps = pd.date_range('2024-01-01 23:01', periods=24 * sesiones, freq='h')
+    cierre = 17000 + np.cumsum(rng.integers(-20, 21, len(timestamps))) * 0.25
+    apertura = cierre + rng.integers(-8, 9, len(timestamps)) * 0.25
+    saliente = pd.DataFrame({
+        'DateTime': timestamps,
+        'Open': apertura,
+        'High': np.maximum(apertura, cierre) + rng.integers(0, 12, len(timestamps)) * 0.25,
+        'Low': np.minimum(apertura, cierre) - rng.integers(0, 12, len(timestamps)) * 0.25,
+        'Close': cierre,
+        'Volume': np.where(timestamps < timestamps[len(timestamps) // 2], 5000, 10),
+        'Symbol': 'NQ 03-24',
+    })
+    entrante = saliente.assign(
+        **{c: saliente[c] + SALTO for c in ['Open', 'High', 'Low', 'Close']},
+        Volume=5010 - saliente['Volume'],
+        Symbol='NQ 06-24',
+    )
+    return saliente, entrante
+
+
+@pytest.fixture
+def serie_ajustada(carpeta):
+    """Escribe Continuo.csv y Ajustes.csv y devuelve el diario ajustado esperado"""
+    serie_continua = importlib.import_module('construir_serie_continua')
+    ajuste_rolls = importlib.import_module('ajuste_rolls')
+
+    saliente, entrante = contratos()
+    df = pd.concat([saliente, entrante], ignore_index=True)
+    serie, tabla_rolls = serie_continua.construir_serie_continua(df[serie_continua.COLUMNAS_SERIE])
+    tabla = ajuste_rolls.calcular_tabla_ajustes(df, tabla_rolls)
+
+    assert serie['Symbol'].unique().tolist() == ['NQ 03-24', 'NQ 06-24']
+    assert tabla['Ajuste_Diferencia'].tolist() == [SALTO, 0.0]
+
+    serie.to_csv(ajuste_rolls.CONTINUO_PATH, index=False, date_format=serie_continua.FORMATO_FECHA)
+    ajuste_rolls.guardar_tabla_ajustes(tabla)
+
+    # Precios del entrante; el volumen no se ajusta (es el de la serie continua)
+    diario = resumen_por_sesion(entrante, construir_indice_sesiones(entrante['DateTime']))
+    diario['Volume'] = resumen_por_sesion(serie, construir_indice_sesiones(serie['DateTime']))['Volume']
+    return diario
+
+
+def test_diario_continuo_lleva_symbol(serie_ajustada):
+    ajuste_rolls = importlib.import_module('ajuste_rolls')
+
+    diario = ajuste_rolls.cargar_diario_continuo()
+    assert diario['Date'].tolist() == serie_ajustada['Date'].tolist()
+    assert diario['Symbol'].iloc[0] == 'NQ 03-24'
+    assert diario['Symbol'].iloc[-1] == 'NQ 06-24'
+
+    ajustado = ajuste_rolls.cargar_diario_ajustado('diferencia')
+    pd.testing.assert_frame_equal(ajustado.drop(columns='Symbol'), serie_ajustada, check_exact=True)
+
+
+def test_niveles_diarios_con_ajuste(serie_ajustada, monkeypatch):
+    niveles = importlib.import_module('fase1_calcular_niveles')
+    serie_ajustada.to_csv(niveles.DATA_PATH, index=False)
+
+    resultados = {}
+    for modo in ['diferencia', None]:
+        monkeypatch.setattr(niveles, 'MODO_AJUSTE', modo)
+        niveles.main()
+        resultados[modo] = pd.read_csv(niveles.OUTPUT_PATH_CSV)
+
+    assert (resultados[None]['EM_Range'] > 0).sum() == len(serie_ajustada) - niveles.DEFAULT_LENGTH
+    pd.testing.assert_frame_equal(resultados['diferencia'], resultados[None], check_exact=True)
+
+
+def test_niveles_dn_con_ajuste(serie_ajustada, carpeta, monkeypatch):
+    dn = importlib.import_module('calcular_niveles_DN')
+    monkeypatch.setattr(dn, 'leer_hojas_excel', lambda ruta: {'2024': serie_ajustada.copy()})
+
+    resultados = {}
+    for modo in ['diferencia', None]:
+        monkeypatch.setattr(dn, 'MODO_AJUSTE', modo)
+        monkeypatch.setattr(dn, 'OUTPUT_FILE', carpeta / f'DN_{modo}.xlsx')
+        dn.generar_niveles_DN()
+        resultados[modo] = pd.read_excel(dn.OUTPUT_FILE, sheet_name='Datos_Completos')
+
+    assert resultados['diferencia']['Symbol'].nunique() == 2
+    assert resultados[None]['Z2H'].notna().sum() == len(serie_ajustada) - 1
+    pd.testing.assert_frame_equal(
+        resultados['diferencia'].drop(columns='Symbol'), resultados[None], check_exact=True
+    )
@@ -0,0 +1,54 @@
+"""
+Pruebas del back-adjustment (ajuste_rolls.py)
+
+El ajuste se elige por el contrato de cada fila (Symbol) y se rechaza
+cuando la serie no se construyó con la tabla de rolls.
+"""
+
+import pandas as pd
+import pytest
+
+from ajuste_rolls import aplicar_ajuste
+
+
+def tabla_ajustes():
+    """Dos contratos con roll el 2024-03-12 22:01 UTC y salto de +100 puntos"""
+    return pd.DataFrame({
+        'Symbol': ['NQ 03-24', 'NQ 06-24'],
+        'Inicio': [pd.NaT, pd.Timestamp('2024-03-12 22:01')],
+        'Fin': [pd.Timestamp('2024-03-12 22:01'), pd.NaT],
+        'Ajuste_Diferencia': [100.0, 0.0],
+        'Ajuste_Ratio': [1.005, 1.0],
+    })
+
+
+def serie(symbols, timestamps):
+    return pd.DataFrame({
+        'DateTime': pd.to_datetime(timestamps),
+        'Close': 18000.0,
+        'Symbol': symbols,
+    })
+
+
+def test_ajuste_por_contrato():
+    df = serie(['NQ 03-24', 'NQ 06-24'], ['2024-03-12 22:00', '2024-03-12 22:01'])
+
+    aplicar_ajuste(df, tabla_ajustes(), 'diferencia')
+
+    assert df['Close'].tolist() == [18100.0, 18000.0]
+
+
+def test_rechaza_serie_sin_symbol():
+    df = serie(['NQ 03-24'], ['2024-03-12 22:00']).drop(columns='Symbol')
+
+    with pytest.raises(ValueError, match='Symbol'):
+        aplicar_ajuste(df, tabla_ajustes(), 'diferencia')
+
+
+def test_rechaza_seleccion_distinta_de_la_tabla():
+    # Consolidado con keep='first': el contrato saliente sigue después del roll
+    df = serie(['NQ 03-24', 'NQ 03-24'], ['2024-03-12 22:00', '2024-03-13 10:00'])
+
+    with pytest.raises(ValueError, match='ventana de roll'):
+        aplicar_ajuste(df, tabla_ajustes(), 'ratio')
+    assert (df['Close'] == 18000.0).all()
@@ -0,0 +1,35 @@
+"""
+Pruebas del almacén Parquet (almacen_barras.py)
+
+El esquema guardado no depende de los tipos con los que llega cada escritor.
+"""
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from almacen_barras import cargar_barras, escribir_almacen
+
+
+def barras(inicio, tipo_precio, tipo_volumen):
+    timestamps = pd.date_range(inicio, periods=3, freq='min')
+    df = pd.DataFrame({'DateTime': timestamps, 'Volume': [1, 2, 3]})
+    for columna in ['Open', 'High', 'Low', 'Close']:
+        df[columna] = [18000.0, 18000.25, 18000.5]
+    return df.astype({c: tipo_precio for c in ['Open', 'High', 'Low', 'Close']} | {'Volume': tipo_volumen})
+
+
+def test_esquema_independiente_del_escritor(tmp_path):
+    # Un año desde main() (float32/int32) y otro desde la vigilancia (float64/int64)
+    escribir_almacen(barras('2023-06-01', 'float32', 'int32'), ruta=tmp_path)
+    escribir_almacen(barras('2024-06-01', 'float64', 'int64'), ruta=tmp_path)
+
+    esquemas = {
+        str(fragmento.physical_schema)
+        for fragmento in ds.dataset(tmp_path, format='parquet').get_fragments()
+    }
+    assert len(esquemas) == 1
+
+    df = cargar_barras(ruta=tmp_path)
+    assert len(df) == 6
+    assert df['Close'].dtype == 'float32'
+    assert df['Volume'].dtype == 'int32'
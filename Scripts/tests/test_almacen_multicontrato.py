@@ -0,0 +1,55 @@
+"""
+Pruebas del almacén multicontrato (almacen_multicontrato.py)
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from almacen_multicontrato import abrir_multicontrato, cargar_contratos, escribir_multicontrato
+from barras_memmap import PUNTERO
+
+
+def contrato(symbol, inicio, minutos, base):
+    timestamps = pd.date_range(inicio, periods=minutos, freq='min')
+    precios = base + 0.25 * np.arange(minutos)
+    return pd.DataFrame({
+        'DateTime': timestamps, 'Open': precios, 'High': precios + 1,
+        'Low': precios - 1, 'Close': precios, 'Volume': np.arange(1, minutos + 1),
+        'Symbol': symbol,
+    })
+
+
+def test_publica_generaciones_y_consulta_por_codigo_cme(tmp_path):
+    # El contrato de junio llega primero: el almacén ordena por vencimiento
+    df = pd.concat([
+        contrato('NQ 06-21', '2021-03-10 00:01', 30, 13000.0),
+        contrato('NQ 03-21', '2021-03-01 00:01', 20, 12900.0),
+    ], ignore_index=True)
+
+    escribir_multicontrato(df, ruta=tmp_path)
+    anterior, _ = abrir_multicontrato(ruta=tmp_path)
+    escribir_multicontrato(df.assign(Close=df['Close'] + 1), ruta=tmp_path)
+
+    carpeta = tmp_path / 'NQ'
+    assert json.loads((carpeta / PUNTERO).read_text())['generacion'] == 2
+    assert sorted(p.name for p in carpeta.iterdir() if p.is_dir()) == ['g000001', 'g000002']
+
+    _, indice = abrir_multicontrato(ruta=tmp_path)
+    assert indice['Symbol'].tolist() == ['NQ 03-21', 'NQ 06-21']
+    assert indice['Barras'].tolist() == [20, 30]
+
+    marzo = cargar_contratos(['NQH1'], '2021-03-01 00:05', '2021-03-01 00:10', ruta=tmp_path)
+    assert marzo['Symbol'].unique().tolist() == ['NQ 03-21']
+    assert len(marzo) == 5
+    assert marzo['Close'].iloc[0] == 12900.0 + 0.25 * 4 + 1
+
+    # El lector que abrió la primera generación sigue viendo sus datos (POSIX)
+    assert anterior['Close'][0] == 12900 * 4
+
+
+def test_sin_publicar(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        abrir_multicontrato(ruta=tmp_path)
@@ -0,0 +1,96 @@
+"""
+Pruebas de la publicación versionada de barras binarias (barras_memmap.py)
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import barras_memmap
+from barras_memmap import (
+    CABECERA, PUNTERO, abrir_barras_memmap, barras_a_dataframe, cargar_sesiones_memmap,
+    cargar_zonas_memmap, carpeta_publicada, escribir_barras_memmap, leer_cabecera
+)
+
+
+def barras(inicio, minutos, base):
+    timestamps = pd.date_range(inicio, periods=minutos, freq='min')
+    precios = base + 0.25 * np.arange(minutos)
+    return pd.DataFrame({
+        'DateTime': timestamps, 'Open': precios, 'High': precios + 1,
+        'Low': precios - 1, 'Close': precios, 'Volume': np.arange(1, minutos + 1),
+    })
+
+
+def test_generaciones_y_lectores_abiertos(tmp_path):
+    escribir_barras_memmap(barras('2024-01-02 00:01', 10, 17000.0), ruta=tmp_path)
+    anterior = abrir_barras_memmap(ruta=tmp_path)
+
+    for generacion in range(2, 5):
+        escribir_barras_memmap(barras('2024-01-02 00:01', 10 + generacion, 18000.0), ruta=tmp_path)
+
+    carpeta = tmp_path / 'NQ'
+    assert json.loads((carpeta / PUNTERO).read_text())['generacion'] == 4
+    assert leer_cabecera(ruta=tmp_path)['filas'] == 14
+    assert cargar_sesiones_memmap(ruta=tmp_path)['Barras'].sum() == 14
+    assert len(cargar_zonas_memmap(ruta=tmp_path)) >= 1
+    # Se conservan la vigente y la anterior; el resto se borra
+    assert sorted(p.name for p in carpeta.iterdir() if p.is_dir()) == ['g000003', 'g000004']
+
+    # El lector que abrió la primera generación sigue viendo sus datos (POSIX)
+    assert barras_a_dataframe(anterior)['Close'].iloc[0] == 17000.0
+    assert barras_a_dataframe(abrir_barras_memmap(ruta=tmp_path))['Close'].iloc[0] == 18000.0
+
+
+def test_fallo_al_escribir_conserva_la_vigente(tmp_path, monkeypatch):
+    escribir_barras_memmap(barras('2024-01-02 00:01', 10, 17000.0), ruta=tmp_path)
+
+    def zonas_fallidas(columnas):
+        raise OSError('disco lleno')
+
+    monkeypatch.setattr(barras_memmap, 'construir_zonas', zonas_fallidas)
+    with pytest.raises(OSError):
+        escribir_barras_memmap(barras('2024-01-02 00:01', 20, 18000.0), ruta=tmp_path)
+
+    assert leer_cabecera(ruta=tmp_path)['filas'] == 10
+    assert [p.name for p in (tmp_path / 'NQ').iterdir() if p.is_dir()] == ['g000001']
+
+
+def test_borrado_fallido_se_reintenta(tmp_path, monkeypatch):
+    # En Windows no se puede borrar una generación que otro proceso tiene mapeada
+    escribir_barras_memmap(barras('2024-01-02 00:01', 5, 17000.0), ruta=tmp_path)
+    escribir_barras_memmap(barras('2024-01-02 00:01', 6, 17000.0), ruta=tmp_path)
+
+    rmtree = barras_memmap.shutil.rmtree
+
+    def rmtree_bloqueado(ruta, *args, **kwargs):
+        raise PermissionError('archivo en uso')
+
+    monkeypatch.setattr(barras_memmap.shutil, 'rmtree', rmtree_bloqueado)
+    escribir_barras_memmap(barras('2024-01-02 00:01', 7, 17000.0), ruta=tmp_path)
+    assert (tmp_path / 'NQ' / 'g000001').exists()
+    assert leer_cabecera(ruta=tmp_path)['filas'] == 7
+
+    monkeypatch.setattr(barras_memmap.shutil, 'rmtree', rmtree)
+    escribir_barras_memmap(barras('2024-01-02 00:01', 8, 17000.0), ruta=tmp_path)
+    assert sorted(p.name for p in (tmp_path / 'NQ').iterdir() if p.is_dir()) == ['g000003', 'g000004']
+
+
+def test_formato_anterior_se_lee_y_se_migra(tmp_path):
+    # Publicación antigua: archivos directamente en la carpeta del instrumento
+    escribir_barras_memmap(barras('2024-01-02 00:01', 5, 17000.0), ruta=tmp_path)
+    carpeta = tmp_path / 'NQ'
+    generacion = carpeta / 'g000001'
+    for archivo in generacion.iterdir():
+        archivo.rename(carpeta / archivo.name)
+    generacion.rmdir()
+    (carpeta / PUNTERO).unlink()
+
+    assert carpeta_publicada(carpeta) == carpeta
+    assert leer_cabecera(ruta=tmp_path)['filas'] == 5
+
+    escribir_barras_memmap(barras('2024-01-02 00:01', 6, 17000.0), ruta=tmp_path)
+    assert leer_cabecera(ruta=tmp_path)['filas'] == 6
+    assert not (carpeta / CABECERA).exists()
@@ -0,0 +1,102 @@
+"""
+Pruebas de la caché direccionada por contenido (cache_artefactos.py)
+
+Cambiar un byte de una entrada, un parámetro o un archivo de código debe
+dar una clave nueva; con la misma clave las salidas se restauran desde la
+caché sin llamar a `generar`.
+"""
+
+import os
+
+import pytest
+
+from cache_artefactos import ejecutar_con_cache
+
+
+@pytest.fixture
+def artefacto(tmp_path):
+    """Entrada, código y salida de un artefacto de prueba"""
+    entrada = tmp_path / 'Datos.csv'
+    codigo = tmp_path / 'calcular.py'
+    salida = tmp_path / 'salidas' / 'Niveles.csv'
+    entrada.write_bytes(b'Date,Close\n2024-01-02,17000.25\n')
+    codigo.write_text('LOOKBACK = 21\n', encoding='utf-8')
+    salida.parent.mkdir()
+    return entrada, codigo, salida
+
+
+def modificar(archivo, contenido):
+    """Reescribe un archivo y mueve su mtime (las huellas se recuerdan por tamaño y mtime)"""
+    stat = archivo.stat()
+    archivo.write_bytes(contenido)
+    os.utime(archivo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_clave_y_restauracion(artefacto, tmp_path):
+    entrada, codigo, salida = artefacto
+    cache = tmp_path / 'Cache'
+    llamadas = []
+
+    def generar():
+        llamadas.append(1)
+        salida.write_text(f"resultado {len(llamadas)}\n", encoding='utf-8')
+
+    def ejecutar(lookback=21):
+        return ejecutar_con_cache('niveles', [entrada], [salida], generar,
+                                  parametros={'lookback': lookback}, codigo=[codigo],
+                                  ruta=cache, activada=True)
+
+    def claves():
+        return {c.name for c in (cache / 'niveles').iterdir()}
+
+    assert ejecutar() is False
+    assert len(llamadas) == 1
+    primera = claves()
+
+    # Misma clave: se restaura la salida borrada sin recalcular
+    salida.unlink()
+    assert ejecutar() is True
+    assert len(llamadas) == 1
+    assert salida.read_text(encoding='utf-8') == 'resultado 1\n'
+    assert claves() == primera
+
+    # Un byte distinto en la entrada (mismo tamaño)
+    modificar(entrada, entrada.read_bytes().replace(b'17000.25', b'17000.50'))
+    assert ejecutar() is False
+    assert len(llamadas) == 2
+    assert len(claves()) == 2
+
+    # Otro parámetro
+    assert ejecutar(lookback=9) is False
+    assert len(llamadas) == 3
+    assert len(claves()) == 3
+
+    # Otro código
+    modificar(codigo, b'LOOKBACK = 22\n')
+    assert ejecutar(lookback=9) is False
+    assert len(llamadas) == 4
+    assert len(claves()) == 4
+
+    # Las versiones anteriores siguen en la caché: volver a la entrada y
+    # al código originales publica el primer resultado
+    modificar(entrada, b'Date,Close\n2024-01-02,17000.25\n')
+    modificar(codigo, b'LOOKBACK = 21\n')
+    assert ejecutar() is True
+    assert len(llamadas) == 4
+    assert salida.read_text(encoding='utf-8') == 'resultado 1\n'
+
+
+def test_cache_desactivada_siempre_genera(artefacto, tmp_path):
+    entrada, codigo, salida = artefacto
+    llamadas = []
+
+    def generar():
+        llamadas.append(1)
+        salida.write_text('resultado\n', encoding='utf-8')
+
+    for _ in range(2):
+        assert ejecutar_con_cache('niveles', [entrada], [salida], generar, codigo=[codigo],
+                                  ruta=tmp_path / 'Cache', activada=False) is False
+
+    assert len(llamadas) == 2
+    assert not (tmp_path / 'Cache').exists()
@@ -0,0 +1,80 @@
+"""
+Pruebas de la caché de lectura Excel -> columnar (cache_excel.py)
+
+La primera lectura pasa por openpyxl y deja las hojas convertidas; las
+siguientes se sirven desde la caché sin abrir el libro. Si el libro
+cambia, la caché anterior se descarta y se vuelve a leer con openpyxl.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache_excel
+
+
+def escribir_libro(ruta, base):
+    """Libro con una hoja numérica y otra de tipos mezclados (va a pickle)"""
+    datos = pd.DataFrame({
+        'Date': pd.bdate_range('2024-01-02', periods=20),
+        'Close': base + np.arange(20) * 0.25,
+    })
+    mezclada = pd.DataFrame({'Nota': ['a', 1, 2.5]})
+    with pd.ExcelWriter(ruta, engine='openpyxl') as writer:
+        datos.to_excel(writer, sheet_name='2024', index=False)
+        mezclada.to_excel(writer, sheet_name='Notas', index=False)
+
+
+@pytest.fixture
+def lecturas(monkeypatch):
+    """Cuenta las hojas leídas con openpyxl"""
+    hojas = []
+    original = pd.read_excel
+
+    def read_excel(libro, hoja, *args, **kwargs):
+        assert libro.engine == 'openpyxl'
+        hojas.append(hoja)
+        return original(libro, hoja, *args, **kwargs)
+
+    monkeypatch.setattr(cache_excel.pd, 'read_excel', read_excel)
+    return hojas
+
+
+def test_lectura_desde_cache_y_relectura_si_cambia(tmp_path, lecturas, monkeypatch):
+    libro = tmp_path / 'Datos_Diarios_por_Año.xlsx'
+    cache = tmp_path / 'Cache'
+    escribir_libro(libro, 17000.0)
+
+    primera = cache_excel.leer_hojas_excel(libro, cache=cache)
+    assert list(primera) == ['2024', 'Notas']
+    assert lecturas == ['2024', 'Notas']
+    with pd.ExcelFile(libro) as original:
+        for nombre, df in primera.items():
+            pd.testing.assert_frame_equal(df, original.parse(nombre))
+
+    # Misma huella: ni siquiera se abre el libro
+    def sin_openpyxl(*args, **kwargs):
+        raise AssertionError('el libro no ha cambiado y se ha vuelto a abrir')
+
+    with monkeypatch.context() as m:
+        m.setattr(cache_excel.pd, 'ExcelFile', sin_openpyxl)
+        segunda = cache_excel.leer_hojas_excel(libro, cache=cache)
+    assert lecturas == ['2024', 'Notas']
+    for nombre in primera:
+        pd.testing.assert_frame_equal(segunda[nombre], primera[nombre])
+    carpetas = list(cache.glob(f'{libro.stem}_*'))
+    assert len(carpetas) == 1
+    assert sorted(a.name for a in carpetas[0].glob('hoja_*')) == ['hoja_000.parquet', 'hoja_001.pkl']
+
+    # Libro modificado: nueva clave, relectura con openpyxl y la versión
+    # anterior de la caché se elimina
+    stat = libro.stat()
+    escribir_libro(libro, 18000.0)
+    os.utime(libro, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    tercera = cache_excel.leer_hoja_excel(libro, '2024', cache=cache)
+    assert lecturas == ['2024', 'Notas', '2024']
+    assert tercera['Close'].iloc[0] == 18000.0
+    nuevas = list(cache.glob(f'{libro.stem}_*'))
+    assert len(nuevas) == 1 and nuevas != carpetas
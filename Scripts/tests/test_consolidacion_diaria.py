@@ -0,0 +1,49 @@
+"""
+Pruebas de la consolidación diaria (consolidar_datos_diarios.py)
+
+La carga por el pipeline debe dar el mismo consolidado con uno o varios
+procesos: keep='first' sigue el orden de los archivos, no el de llegada.
+"""
+
+import importlib
+
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def consolidador(tmp_path, monkeypatch):
+    """Módulo de consolidación importado desde una carpeta de trabajo temporal"""
+    (tmp_path / 'Logs').mkdir()
+    (tmp_path / 'Scripts').mkdir()
+    monkeypatch.chdir(tmp_path / 'Scripts')
+    modulo = importlib.import_module('consolidar_datos_diarios')
+    monkeypatch.setattr(modulo, 'DATOS_DIARIOS_PATH', tmp_path / 'Diarios')
+    monkeypatch.setattr(modulo, 'OUTPUT_PATH', tmp_path / 'Originales')
+    monkeypatch.setattr(modulo, 'MANIFIESTO_PATH', tmp_path / 'Originales' / 'manifiesto_diarios.json')
+    (tmp_path / 'Diarios').mkdir()
+    return modulo
+
+
+def escribir_diario(carpeta, nombre, inicio, dias, base):
+    """Archivo NinjaTrader de `dias` sesiones hábiles desde `inicio`"""
+    lineas = []
+    for i, fecha in enumerate(pd.bdate_range(inicio, periods=dias)):
+        precio = base + i
+        lineas.append(f"{fecha:%Y%m%d};{precio};{precio + 10};{precio - 10};{precio + 5};{1000 + i}")
+    (carpeta / nombre).write_text('\n'.join(lineas) + '\n', encoding='utf-8')
+
+
+def test_carga_en_paralelo_igual_a_secuencial(consolidador, tmp_path):
+    carpeta = tmp_path / 'Diarios'
+    escribir_diario(carpeta, 'NQ 06-24.Last.txt', '2024-03-01', 60, 18000.0)
+    escribir_diario(carpeta, 'NQ 03-24.Last.txt', '2024-01-02', 60, 17000.0)
+    escribir_diario(carpeta, 'NQ 09-24.Last.txt', '2024-05-01', 60, 19000.0)
+
+    secuencial, _ = consolidador.consolidar_incremental(n_workers=1)
+    paralelo, _ = consolidador.consolidar_incremental(n_workers=3)
+
+    pd.testing.assert_frame_equal(paralelo, secuencial)
+    # En los solapes gana el archivo que va antes por nombre
+    assert secuencial.loc[secuencial['Date'] == '2024-03-01', 'Open'].item() == 17000.0 + 43
+    assert secuencial.loc[secuencial['Date'] == '2024-05-01', 'Open'].item() == 18000.0 + 43
@@ -0,0 +1,293 @@
+"""
+Pruebas de la consolidación de minutos (consolidar_datos_minutos.py)
+
+La consolidación incremental y la ruta en streaming deben producir
+exactamente los mismos archivos que una reconstrucción completa en memoria
+con los mismos archivos brutos.
+"""
+
+import importlib
+
+import pandas as pd
+import pytest
+
+from manifiesto_datos import cargar_manifiesto, guardar_manifiesto, fin_si_solo_anexa
+
+
+@pytest.fixture
+def consolidador(tmp_path, monkeypatch):
+    """Módulo de consolidación importado desde una carpeta de trabajo temporal"""
+    (tmp_path / 'Logs').mkdir()
+    (tmp_path / 'Scripts').mkdir()
+    monkeypatch.chdir(tmp_path / 'Scripts')
+    return importlib.import_module('consolidar_datos_minutos')
+
+
+def configurar(modulo, monkeypatch, raiz):
+    """Apunta las rutas del módulo a una raíz temporal"""
+    monkeypatch.setattr(modulo, 'DATOS_MINUTOS_PATH', raiz / 'Minutos')
+    monkeypatch.setattr(modulo, 'OUTPUT_PATH', raiz / 'Originales')
+    monkeypatch.setattr(modulo, 'PROCESSED_PATH', raiz / 'Procesados')
+    monkeypatch.setattr(modulo, 'MANIFIESTO_PATH', raiz / 'Originales' / 'manifiesto_minutos.json')
+    (raiz / 'Minutos').mkdir(parents=True, exist_ok=True)
+
+
+def escribir_bruto(carpeta, nombre, inicio, minutos, base, orden=None):
+    """
+    Archivo NinjaTrader de `minutos` barras consecutivas desde `inicio`
+
+    `orden` permite escribir las filas en otro orden (archivos desordenados)
+    """
+    lineas = []
+    for i, ts in enumerate(pd.date_range(inicio, periods=minutos, freq='min')):
+        precio = base + i * 0.25
+        lineas.append(f"{ts:%Y%m%d %H%M%S};{precio};{precio + 1};{precio - 1};{precio + 0.5};{10 + i}")
+    if orden is not None:
+        lineas = [lineas[i] for i in orden]
+    (carpeta / nombre).write_text('\n'.join(lineas) + '\n', encoding='utf-8')
+
+
+def ejecutar(modulo):
+    """Mismos pasos que main() en modo no streaming, con carga secuencial"""
+    df, manifiesto = modulo.consolidar_incremental(n_workers=1)
+    if df is None:
+        return False
+    df = modulo.validar_datos(df)
+    modulo.exportar_datos(df, modulo.NOMBRE_CONSOLIDADO)
+    guardar_manifiesto(manifiesto, modulo.MANIFIESTO_PATH)
+    return True
+
+
+def ejecutar_streaming(modulo, chunksize=7, n_workers=2):
+    """Mismos pasos que main() en modo streaming, con bloques pequeños"""
+    stats, manifiesto = modulo.consolidar_incremental_streaming(chunksize=chunksize, n_workers=n_workers)
+    if stats is None:
+        return False
+    guardar_manifiesto(manifiesto, modulo.MANIFIESTO_PATH)
+    return True
+
+
+def salidas(modulo, raiz):
+    """Contenido de los consolidados original, limpio y formato Excel"""
+    nombre = modulo.NOMBRE_CONSOLIDADO
+    return (
+        (raiz / 'Originales' / f"{nombre}.csv").read_bytes(),
+        (raiz / 'Procesados' / f"{nombre}_Limpio.csv").read_bytes(),
+        (raiz / 'Procesados' / f"{nombre}_Excel.csv").read_bytes(),
+    )
+
+
+@pytest.mark.parametrize('nombre_nuevo', ['NQ 06-24.Last.txt', 'NQ 03-23.Last.txt'])
+def test_incremental_igual_a_reconstruccion(consolidador, monkeypatch, tmp_path, nombre_nuevo):
+    # El archivo nuevo solapa con el existente y tiene otros precios en el
+    # solape: 'NQ 06-24' va después (fusión incremental), 'NQ 03-23' va
+    # antes (debe ganar él, como en una reconstrucción completa)
+    incremental = tmp_path / 'incremental'
+    configurar(consolidador, monkeypatch, incremental)
+    escribir_bruto(incremental / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 120, 17000.0)
+    assert ejecutar(consolidador)
+    escribir_bruto(incremental / 'Minutos', nombre_nuevo, '2024-01-02 01:30', 90, 18000.0)
+    assert ejecutar(consolidador)
+    resultado_incremental = salidas(consolidador, incremental)
+
+    completa = tmp_path / 'completa'
+    configurar(consolidador, monkeypatch, completa)
+    escribir_bruto(completa / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 120, 17000.0)
+    escribir_bruto(completa / 'Minutos', nombre_nuevo, '2024-01-02 01:30', 90, 18000.0)
+    assert ejecutar(consolidador)
+
+    assert resultado_incremental == salidas(consolidador, completa)
+
+
+def test_archivo_vacio_se_registra(consolidador, monkeypatch, tmp_path):
+    raiz = tmp_path / 'datos'
+    configurar(consolidador, monkeypatch, raiz)
+    escribir_bruto(raiz / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 30, 17000.0)
+    assert ejecutar(consolidador)
+
+    # Archivo sin ningún timestamp válido: se registra y no se relee
+    (raiz / 'Minutos' / 'NQ 06-24.Last.txt').write_text('basura;1;1;1;1;1\n', encoding='utf-8')
+    antes = salidas(consolidador, raiz)
+    assert not ejecutar(consolidador)
+    assert not ejecutar(consolidador)
+    assert salidas(consolidador, raiz) == antes
+
+    manifiesto = pd.read_json(raiz / 'Originales' / 'manifiesto_minutos.json', typ='series')
+    assert manifiesto['archivos']['NQ 06-24.Last.txt']['registros'] == 0
+
+
+def escribir_carpeta_mixta(carpeta):
+    """Contratos solapados, uno desordenado entre bloques y una barra inválida"""
+    escribir_bruto(carpeta, 'NQ 03-24.Last.txt', '2024-01-02 00:00', 40, 17000.0)
+    # Filas que retroceden más de un bloque (chunksize=7) respecto a las anteriores
+    orden = list(range(20, 30)) + list(range(0, 20)) + [31, 30] + list(range(32, 40))
+    escribir_bruto(carpeta, 'NQ 06-24.Last.txt', '2024-01-02 00:30', 40, 18000.0, orden=orden)
+    with open(carpeta / 'NQ 06-24.Last.txt', 'a', encoding='utf-8') as f:
+        f.write('20240102 020000;5;1;9;5;0\n')
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_streaming_igual_a_memoria(consolidador, monkeypatch, tmp_path, n_workers):
+    memoria = tmp_path / 'memoria'
+    configurar(consolidador, monkeypatch, memoria)
+    escribir_carpeta_mixta(memoria / 'Minutos')
+    assert ejecutar(consolidador)
+
+    streaming = tmp_path / 'streaming'
+    configurar(consolidador, monkeypatch, streaming)
+    escribir_carpeta_mixta(streaming / 'Minutos')
+    assert ejecutar_streaming(consolidador, n_workers=n_workers)
+
+    assert salidas(consolidador, streaming) == salidas(consolidador, memoria)
+
+
+def test_streaming_lee_cada_bloque_una_vez(consolidador, monkeypatch, tmp_path):
+    raiz = tmp_path / 'datos'
+    configurar(consolidador, monkeypatch, raiz)
+    escribir_bruto(raiz / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 60, 17000.0)
+    escribir_bruto(raiz / 'Minutos', 'NQ 06-24.Last.txt', '2024-01-02 00:30', 60, 18000.0)
+
+    def sin_inspeccion(*args, **kwargs):
+        raise AssertionError('la reconstrucción no inspecciona los archivos')
+
+    lecturas = []
+    leer_rango = consolidador._leer_rango
+    monkeypatch.setattr(consolidador, 'inspeccionar_archivo_minutos', sin_inspeccion)
+    monkeypatch.setattr(consolidador, '_leer_rango', lambda tarea: lecturas.append(tarea) or leer_rango(tarea))
+    assert ejecutar_streaming(consolidador)
+
+    # Los rangos cubren cada archivo sin solaparse y se leen una sola vez
+    for archivo in (raiz / 'Minutos').iterdir():
+        rangos = sorted((inicio, fin) for ruta, inicio, fin in lecturas if ruta == archivo)
+        assert len(rangos) > 1
+        assert rangos[0][0] == 0 and rangos[-1][1] == archivo.stat().st_size
+        assert all(a[1] == b[0] for a, b in zip(rangos, rangos[1:]))
+
+    manifiesto = cargar_manifiesto(raiz / 'Originales' / 'manifiesto_minutos.json')
+    assert manifiesto['archivos']['NQ 06-24.Last.txt']['registros'] == 60
+
+
+@pytest.mark.parametrize('nombre_nuevo', ['NQ 06-24.Last.txt', 'NQ 03-23.Last.txt'])
+def test_streaming_incremental_igual_a_reconstruccion(consolidador, monkeypatch, tmp_path, nombre_nuevo):
+    incremental = tmp_path / 'incremental'
+    configurar(consolidador, monkeypatch, incremental)
+    escribir_bruto(incremental / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 120, 17000.0)
+    assert ejecutar_streaming(consolidador)
+    escribir_bruto(incremental / 'Minutos', nombre_nuevo, '2024-01-02 01:30', 90, 18000.0)
+    assert ejecutar_streaming(consolidador)
+    assert not ejecutar_streaming(consolidador)
+    resultado_incremental = salidas(consolidador, incremental)
+
+    completa = tmp_path / 'completa'
+    configurar(consolidador, monkeypatch, completa)
+    escribir_bruto(completa / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 120, 17000.0)
+    escribir_bruto(completa / 'Minutos', nombre_nuevo, '2024-01-02 01:30', 90, 18000.0)
+    assert ejecutar(consolidador)
+
+    assert resultado_incremental == salidas(consolidador, completa)
+
+
+def test_streaming_fallo_conserva_salidas(consolidador, monkeypatch, tmp_path):
+    raiz = tmp_path / 'datos'
+    configurar(consolidador, monkeypatch, raiz)
+    escribir_bruto(raiz / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 60, 17000.0)
+    assert ejecutar_streaming(consolidador)
+    antes = salidas(consolidador, raiz)
+
+    def fusion_interrumpida(flujos, columna='DateTime'):
+        yield next(iter(flujos[0]))
+        raise OSError('disco lleno')
+
+    escribir_bruto(raiz / 'Minutos', 'NQ 06-24.Last.txt', '2024-01-02 00:30', 60, 18000.0)
+    monkeypatch.setattr(consolidador, 'fusionar_flujos', fusion_interrumpida)
+    with pytest.raises(OSError):
+        ejecutar_streaming(consolidador)
+
+    assert salidas(consolidador, raiz) == antes
+    assert not list(raiz.rglob('*.tmp'))
+
+
+def ejecutar_anexando(modulo):
+    """Mismos pasos que vigilar_carpetas.ingerir_minutos (CSV anexados si se puede)"""
+    manifiesto_previo = cargar_manifiesto(modulo.MANIFIESTO_PATH)
+    df, manifiesto = modulo.consolidar_incremental(n_workers=1)
+    if df is None:
+        return None
+    desde = fin_si_solo_anexa(manifiesto_previo, manifiesto)
+    df = modulo.validar_datos(df)
+    modulo.exportar_datos(df, modulo.NOMBRE_CONSOLIDADO, desde=desde)
+    guardar_manifiesto(manifiesto, modulo.MANIFIESTO_PATH)
+    return desde
+
+
+@pytest.mark.parametrize('inicio_nuevo, anexa', [('2024-01-02 02:00', True), ('2024-01-02 01:30', False)])
+def test_contrato_posterior_se_anexa(consolidador, monkeypatch, tmp_path, inicio_nuevo, anexa):
+    anexado = tmp_path / 'anexado'
+    configurar(consolidador, monkeypatch, anexado)
+    escribir_bruto(anexado / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 120, 17000.0)
+    assert ejecutar_anexando(consolidador) is None
+    # Una barra inválida en el archivo nuevo: solo va al original
+    escribir_bruto(anexado / 'Minutos', 'NQ 06-24.Last.txt', inicio_nuevo, 90, 18000.0)
+    with open(anexado / 'Minutos' / 'NQ 06-24.Last.txt', 'a', encoding='utf-8') as f:
+        f.write('20240102 040000;5;1;9;5;0\n')
+    modos = []
+    exportar = consolidador.exportar_por_bloques
+
+    def exportar_espia(*args, anexar=False, **kwargs):
+        modos.append(anexar)
+        return exportar(*args, anexar=anexar, **kwargs)
+
+    monkeypatch.setattr(consolidador, 'exportar_por_bloques', exportar_espia)
+    desde = ejecutar_anexando(consolidador)
+    monkeypatch.setattr(consolidador, 'exportar_por_bloques', exportar)
+    assert (desde == pd.Timestamp('2024-01-02 01:59')) if anexa else desde is None
+    assert modos == [anexa, anexa]
+
+    completa = tmp_path / 'completa'
+    configurar(consolidador, monkeypatch, completa)
+    for archivo in (anexado / 'Minutos').iterdir():
+        (completa / 'Minutos' / archivo.name).write_bytes(archivo.read_bytes())
+    assert ejecutar(consolidador)
+
+    assert salidas(consolidador, anexado) == salidas(consolidador, completa)
+
+
+def test_anexado_rechazado_si_el_publicado_no_coincide(consolidador, monkeypatch, tmp_path):
+    raiz = tmp_path / 'datos'
+    configurar(consolidador, monkeypatch, raiz)
+    escribir_bruto(raiz / 'Minutos', 'NQ 03-24.Last.txt', '2024-01-02 00:00', 120, 17000.0)
+    assert ejecutar(consolidador)
+
+    df, _ = consolidador.consolidar_incremental(n_workers=1)
+    assert df is None
+    df = consolidador.validar_datos(pd.read_csv(
+        raiz / 'Originales' / f"{consolidador.NOMBRE_CONSOLIDADO}.csv", parse_dates=['DateTime']
+    ).drop(columns=['Valid']))
+    esperado = salidas(consolidador, raiz)
+
+    # El original termina en 01:59, no en 01:00: se reescribe completo
+    consolidador.exportar_datos(df, consolidador.NOMBRE_CONSOLIDADO, desde=pd.Timestamp('2024-01-02 01:00'))
+    assert salidas(consolidador, raiz) == esperado
+
+
+def test_carga_en_paralelo_igual_a_secuencial(consolidador, monkeypatch, tmp_path):
+    raiz = tmp_path / 'datos'
+    configurar(consolidador, monkeypatch, raiz)
+    carpeta = raiz / 'Minutos'
+    escribir_bruto(carpeta, 'NQ 03-24.Last.txt', '2024-01-02 00:00', 300, 17000.0)
+    escribir_bruto(carpeta, 'NQ 06-24.Last.txt', '2024-01-02 03:00', 50, 18000.0)
+    escribir_bruto(carpeta, 'NQ 09-24.Last.txt', '2024-01-02 04:00', 200, 19000.0)
+    # Lista fuera del orden alfabético: la entrega sigue a `archivos`
+    archivos = [carpeta / 'NQ 03-24.Last.txt', carpeta / 'NQ 09-24.Last.txt', carpeta / 'NQ 06-24.Last.txt']
+
+    secuencial = consolidador.cargar_archivos_minutos(archivos, n_workers=1)
+    paralelo = consolidador.cargar_archivos_minutos(archivos, n_workers=3)
+
+    assert [df['Open'].iat[0] for df in paralelo] == [17000.0, 19000.0, 18000.0]
+    for df_paralelo, df_secuencial in zip(paralelo, secuencial, strict=True):
+        pd.testing.assert_frame_equal(df_paralelo, df_secuencial)
+
+    consolidado = consolidador.consolidar_datos_minutos(n_workers=3, archivos=archivos)
+    pd.testing.assert_frame_equal(
+        consolidado, consolidador.consolidar_datos_minutos(n_workers=1, archivos=archivos)
+    )
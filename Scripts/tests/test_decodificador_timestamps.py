@@ -0,0 +1,36 @@
+"""
+Pruebas de decodificador_timestamps.py
+"""
+
+import numpy as np
+
+from decodificador_timestamps import decodificar_fecha, decodificar_fecha_hora
+
+
+def test_fecha_enteros():
+    fechas = decodificar_fecha(np.array([20230101, 20230230, 20231231]))
+    assert fechas[0] == np.datetime64('2023-01-01')
+    assert np.isnat(fechas[1])
+    assert fechas[2] == np.datetime64('2023-12-31')
+
+
+def test_fecha_float_con_nan():
+    # Una columna Date con un NaN se lee como float: 20230101.0
+    fechas = decodificar_fecha(np.array([20230101., np.nan, 20230105., 20230101.5, np.inf]))
+    assert fechas[0] == np.datetime64('2023-01-01')
+    assert np.isnat(fechas[1])
+    assert fechas[2] == np.datetime64('2023-01-05')
+    assert np.isnat(fechas[3])
+    assert np.isnat(fechas[4])
+
+
+def test_fecha_textos():
+    fechas = decodificar_fecha(np.array(['20230101', 'abc', ''], dtype=object))
+    assert fechas[0] == np.datetime64('2023-01-01')
+    assert np.isnat(fechas[1:]).all()
+
+
+def test_fecha_hora():
+    fechas = decodificar_fecha_hora(['20231217 214600', '20231217 256000', '2023121 214600'])
+    assert fechas[0] == np.datetime64('2023-12-17T21:46:00')
+    assert np.isnat(fechas[1:]).all()
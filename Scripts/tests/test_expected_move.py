@@ -0,0 +1,50 @@
+"""
+Pruebas del barrido de Expected Move (expected_move.py)
+
+Cada combinación del barrido debe coincidir con el Expected Move del
+pipeline diario para ese lookback (misma familia 'expected_move').
+"""
+
+import importlib
+
+import numpy as np
+import pandas as pd
+
+from expected_move import RANGE_MULTIPLIER, barrido_expected_move
+
+
+def datos_diarios(dias, semilla=3):
+    """OHLC diario sintético en la rejilla de 0.25"""
+    rng = np.random.default_rng(semilla)
+    cierre = 15000 + np.cumsum(rng.integers(-400, 401, dias)) * 0.25
+    apertura = cierre + rng.integers(-200, 201, dias) * 0.25
+    return pd.DataFrame({
+        'Date': pd.bdate_range('2024-01-02', periods=dias),
+        'Open': apertura,
+        'High': np.maximum(apertura, cierre) + rng.integers(0, 300, dias) * 0.25,
+        'Low': np.minimum(apertura, cierre) - rng.integers(0, 300, dias) * 0.25,
+        'Close': cierre,
+    })
+
+
+def test_barrido_coincide_con_el_pipeline(tmp_path, monkeypatch):
+    (tmp_path / 'Logs').mkdir()
+    (tmp_path / 'Scripts').mkdir()
+    monkeypatch.chdir(tmp_path / 'Scripts')
+    em = importlib.import_module('fase1_agregar_expected_move_excel')
+
+    df = datos_diarios(200)
+    lookbacks = [9, 21]
+    barrido = barrido_expected_move(df, lookbacks, [RANGE_MULTIPLIER], dias_comunes=False)
+
+    for i, lookback in enumerate(lookbacks):
+        esperado = em.calcular_expected_move(df, lookback)
+        emh = np.nan_to_num(barrido['EMH'][i, 0], nan=0.0)
+        eml = np.nan_to_num(barrido['EML'][i, 0], nan=0.0)
+        assert np.array_equal(emh, esperado['EMH'].to_numpy())
+        assert np.array_equal(eml, esperado['EML'].to_numpy())
+
+    # Sin redondeo se devuelven los niveles en bruto (fuera de la rejilla)
+    bruto = barrido_expected_move(df, [21], [RANGE_MULTIPLIER], redondear=False)['EMH'][0, 0, 21:]
+    assert (bruto * 4 != np.ceil(bruto * 4)).any()
+    assert np.array_equal(np.ceil(bruto * 4) / 4, barrido['EMH'][1, 0, 21:])
@@ -0,0 +1,189 @@
+"""
+Pruebas del motor DN (calcular_niveles_DN.py y registro_niveles.py)
+
+Los niveles del registro deben coincidir bit a bit con los bucles fila a
+fila originales del script (copiados aquí tal cual), también con días sin
+datos (NaN) y días de rango nulo.
+"""
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def dn(tmp_path, monkeypatch):
+    """Importa el script desde una carpeta de trabajo temporal (log en cwd)"""
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module('calcular_niveles_DN')
+
+
+def datos_diarios(dias=80, semilla=5):
+    """
+    OHLC diario sintético con huecos NaN y días de rango nulo
+
+    Precios fuera de la rejilla de 0.25: así un cambio en el orden de las
+    operaciones (redondeo de coma flotante) también se detecta.
+    """
+    rng = np.random.default_rng(semilla)
+    cierre = 15000 + np.cumsum(rng.normal(0, 60, dias))
+    apertura = cierre + rng.normal(0, 30, dias)
+    df = pd.DataFrame({
+        'Date': pd.bdate_range('2024-01-02', periods=dias),
+        'Open': apertura,
+        'High': np.maximum(apertura, cierre) + rng.exponential(40, dias),
+        'Low': np.minimum(apertura, cierre) - rng.exponential(40, dias),
+        'Close': cierre,
+    })
+    # Rango nulo (High == Low), un día sin datos y huecos solo en High o Low
+    df.loc[[5, 6, 30], ['Open', 'High', 'Low', 'Close']] = 15000.0
+    df.loc[12, ['Open', 'High', 'Low', 'Close']] = np.nan
+    df.loc[40, 'High'] = np.nan
+    df.loc[41, 'Low'] = np.nan
+    df.loc[[50, 51, 52], ['High', 'Low']] = np.nan
+    return df
+
+
+# ----------------------------------------------------------------------------
+# Copia congelada de los bucles originales (calcular_niveles_DN.py, v1.0)
+# ----------------------------------------------------------------------------
+
+COLUMNAS_ONEDAY = [
+    'Q1', 'Q4', 'Range', 'Half_Range', 'NR2', 'Z2H', 'Z2L', 'Z3H', 'Z3L',
+    'TCH', 'TCL', 'TVH', 'TVL', 'Std1', 'Std2', 'Std3', 'Std4', 'Std5',
+    'Std1_neg', 'Std2_neg', 'Std3_neg', 'Std4_neg', 'Std5_neg', '1D_pos', '1D_neg',
+]
+
+COLUMNAS_3D = [
+    f"{c}_3D" for c in
+    ['Q1', 'Q4', 'Range', 'High', 'Low', 'Half_Range', 'NR2', 'Z2H', 'Z2L', 'Z3H', 'Z3L',
+     'TCH', 'TCL', 'TVH', 'TVL', 'Std1', 'Std2', 'Std3', 'Std4', 'Std5',
+     'Std1_neg', 'Std2_neg', 'Std3_neg', 'Std4_neg', 'Std5_neg', '1D_pos', '1D_neg']
+]
+
+
+def oneday_original(df):
+    for columna in COLUMNAS_ONEDAY:
+        df[columna] = np.nan
+
+    for i in range(1, len(df)):
+        Q1 = df.loc[i-1, 'High']
+        Q4 = df.loc[i-1, 'Low']
+        range_val = Q1 - Q4
+        half_range = range_val / 2
+        NR2 = Q1 - half_range
+
+        valores = [
+            Q1, Q4, range_val, half_range, NR2,
+            NR2 + (range_val * 0.159), NR2 + (range_val * 0.125),
+            NR2 - (range_val * 0.125), NR2 - (range_val * 0.159),
+            Q1 - (range_val * 0.125), Q1 - (range_val * 0.159),
+            Q4 + (range_val * 0.159), Q4 + (range_val * 0.125),
+            Q1 + (range_val * 0.125), Q1 + (range_val * 0.159), Q1 + (range_val * 0.25),
+            Q1 + (range_val * 0.341), Q1 + (range_val * 0.375),
+            Q4 - (range_val * 0.125), Q4 - (range_val * 0.159), Q4 - (range_val * 0.25),
+            Q4 - (range_val * 0.341), Q4 - (range_val * 0.375),
+            Q1 + half_range, Q4 - half_range,
+        ]
+        for columna, valor in zip(COLUMNAS_ONEDAY, valores):
+            df.loc[i, columna] = valor
+    return df
+
+
+def threedays_original(df):
+    for columna in COLUMNAS_3D:
+        df[columna] = np.nan
+
+    for i in range(3, len(df)):
+        High_3D = df.loc[i-3:i-1, 'High'].max()
+        Low_3D = df.loc[i-3:i-1, 'Low'].min()
+        range_3d = High_3D - Low_3D
+        half_range_3d = range_3d / 2
+        NR2_3D = Low_3D + half_range_3d
+        Q1_3D = NR2_3D + half_range_3d
+        Q4_3D = NR2_3D - half_range_3d
+
+        valores = [
+            Q1_3D, Q4_3D, range_3d, High_3D, Low_3D, half_range_3d, NR2_3D,
+            NR2_3D + (range_3d * 0.159), NR2_3D + (range_3d * 0.125),
+            NR2_3D - (range_3d * 0.125), NR2_3D - (range_3d * 0.159),
+            Q1_3D - (range_3d * 0.125), Q1_3D - (range_3d * 0.159),
+            Q4_3D + (range_3d * 0.159), Q4_3D + (range_3d * 0.125),
+            Q1_3D + (range_3d * 0.125), Q1_3D + (range_3d * 0.159), Q1_3D + (range_3d * 0.25),
+            Q1_3D + (range_3d * 0.341), Q1_3D + (range_3d * 0.375),
+            Q4_3D - (range_3d * 0.125), Q4_3D - (range_3d * 0.159), Q4_3D - (range_3d * 0.25),
+            Q4_3D - (range_3d * 0.341), Q4_3D - (range_3d * 0.375),
+            Q1_3D + half_range_3d, Q4_3D - half_range_3d,
+        ]
+        for columna, valor in zip(COLUMNAS_3D, valores):
+            df.loc[i, columna] = valor
+    return df
+
+
+# ----------------------------------------------------------------------------
+
+def test_oneday_igual_al_bucle_original(dn):
+    df = datos_diarios()
+
+    resultado = dn.calcular_niveles_DN_oneday(df.copy())
+
+    esperado = oneday_original(df.copy())
+    assert esperado.loc[[6, 7, 31], 'Range'].eq(0).all()
+    assert esperado.loc[[13, 41, 42], 'Z2H'].isna().all()
+    pd.testing.assert_frame_equal(resultado, esperado, check_exact=True)
+
+
+def test_una_pasada_igual_a_los_bucles_originales(dn):
+    df = datos_diarios()
+
+    resultado = dn.calcular_niveles_DN(df.copy(), [3])
+
+    esperado = threedays_original(oneday_original(df.copy()))
+    # Ventana entera sin datos -> NaN; ventana con algún dato -> se ignoran los NaN
+    assert np.isnan(esperado.loc[53, 'High_3D'])
+    assert esperado.loc[54, 'High_3D'] == df.loc[53, 'High']
+    pd.testing.assert_frame_equal(resultado, esperado, check_exact=True)
+
+
+VENTANAS = [1, 2, 3, 5, 10, 20]
+
+
+def test_columnas_de_varias_ventanas(dn):
+    df = datos_diarios()
+
+    resultado = dn.calcular_niveles_DN_ndays(df.copy(), VENTANAS)
+
+    nuevas = list(resultado.columns[len(df.columns):])
+    bloque = [c[:-len('_3D')] for c in COLUMNAS_3D]
+    assert nuevas == [f"{c}_{n}D" for n in VENTANAS for c in bloque]
+
+
+@pytest.mark.parametrize('ventana', VENTANAS)
+def test_ventana_igual_a_slice(dn, ventana):
+    registro = importlib.import_module('registro_niveles')
+    df = datos_diarios()
+
+    maximos = registro._extremo_ventana(df['High'].to_numpy(), ventana, maximo=True)
+    minimos = registro._extremo_ventana(df['Low'].to_numpy(), ventana, maximo=False)
+
+    # Prefijo NaN: las `ventana` primeras filas no tienen días anteriores suficientes
+    assert np.isnan(maximos[:ventana]).all() and not np.isnan(maximos[ventana])
+    assert np.isnan(minimos[:ventana]).all() and not np.isnan(minimos[ventana])
+
+    # max()/min() de un slice ignoran los NaN salvo que toda la ventana lo sea
+    esperado_max = np.full(len(df), np.nan)
+    esperado_min = np.full(len(df), np.nan)
+    for i in range(ventana, len(df)):
+        esperado_max[i] = df.loc[i-ventana:i-1, 'High'].max()
+        esperado_min[i] = df.loc[i-ventana:i-1, 'Low'].min()
+    np.testing.assert_array_equal(maximos, esperado_max)
+    np.testing.assert_array_equal(minimos, esperado_min)
+
+    niveles = dn.calcular_niveles_DN_ndays(df.copy(), [ventana])
+    np.testing.assert_array_equal(niveles[f'High_{ventana}D'].to_numpy(), esperado_max)
+    np.testing.assert_array_equal(niveles[f'Low_{ventana}D'].to_numpy(), esperado_min)
+    # Los niveles solo faltan en el prefijo y donde falta el High o el Low
+    sin_datos = np.isnan(esperado_max) | np.isnan(esperado_min)
+    np.testing.assert_array_equal(niveles[f'Z2H_{ventana}D'].isna().to_numpy(), sin_datos)
@@ -0,0 +1,91 @@
+"""
+Pruebas del pipeline de ingesta (pipeline_ingestion.py)
+
+Las tareas leídas deben procesarse en paralelo aunque se entreguen en orden,
+sin superar el límite de tareas en vuelo.
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pipeline_ingestion import ejecutar_pipeline
+
+DURACION_TAREA = 0.5
+N_PROCESOS = 4
+
+_barrera = None
+
+
+def procesar_lento(tarea, datos):
+    """Parser simulado: medio segundo de trabajo por tarea"""
+    time.sleep(DURACION_TAREA)
+    return datos * 2
+
+
+def identidad(tarea):
+    return tarea
+
+
+def _fijar_barrera(barrera):
+    global _barrera
+    _barrera = barrera
+
+
+def procesar_en_grupo(tarea, datos):
+    """Parser que solo termina si N_PROCESOS tareas están en curso a la vez"""
+    _barrera.wait(timeout=30)
+    return datos * 2
+
+
+def test_procesado_se_solapa():
+    # Cada parser espera en una barrera de N_PROCESOS participantes: si el
+    # pipeline no tuviera N_PROCESOS tareas leídas y en proceso a la vez, la
+    # barrera se rompería y esas tareas no tendrían resultado
+    contexto = multiprocessing.get_context('fork')
+    barrera = contexto.Barrier(N_PROCESOS)
+    with ProcessPoolExecutor(N_PROCESOS, mp_context=contexto,
+                             initializer=_fijar_barrera, initargs=(barrera,)) as pool:
+        resultados = list(ejecutar_pipeline(range(8), procesar_en_grupo, leer=identidad, executor=pool))
+
+    assert resultados == [(i, i * 2) for i in range(8)]
+
+
+def test_tareas_en_vuelo_acotadas():
+    max_en_vuelo = 3
+    leidas = []
+    entregadas = []
+    picos = []
+    cerrojo = threading.Lock()
+
+    def leer(tarea):
+        with cerrojo:
+            leidas.append(tarea)
+            picos.append(len(leidas) - len(entregadas))
+        return tarea
+
+    for tarea, resultado in ejecutar_pipeline(range(10), lambda t, d: d, leer=leer,
+                                              n_procesos=1, max_en_vuelo=max_en_vuelo):
+        # Con el consumidor parado los lectores llenan el límite y se detienen
+        limite = time.monotonic() + 10
+        while len(leidas) - len(entregadas) < min(max_en_vuelo, 10 - len(entregadas)):
+            assert time.monotonic() < limite
+            time.sleep(0.001)
+        with cerrojo:
+            entregadas.append(tarea)
+
+    assert entregadas == list(range(10))
+    assert max(picos) == max_en_vuelo
+
+
+def test_errores_no_detienen_la_entrega():
+    def leer_con_fallo(tarea):
+        if tarea == 2:
+            raise OSError('archivo bloqueado')
+        return tarea
+
+    resultados = list(ejecutar_pipeline(range(5), procesar_lento, leer=leer_con_fallo,
+                                        n_procesos=2, max_en_vuelo=2))
+
+    assert resultados == [(0, 0), (1, 2), (2, None), (3, 6), (4, 8)]
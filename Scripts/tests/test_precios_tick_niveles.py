@@ -0,0 +1,91 @@
+"""
+Pruebas del modo PRECIOS_EN_TICKS de los calculadores de niveles
+
+Calcular en ticks y volver a puntos debe dar exactamente los mismos
+niveles que calcular en puntos (DN, Skew y Expected Move del Excel).
+"""
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def modulos(tmp_path, monkeypatch):
+    """Importa un script desde una carpeta de trabajo temporal (logs en ../Logs)"""
+    (tmp_path / 'Logs').mkdir()
+    (tmp_path / 'Scripts').mkdir()
+    monkeypatch.chdir(tmp_path / 'Scripts')
+    return importlib.import_module
+
+
+def datos_diarios(dias=120, semilla=7):
+    """OHLC diario sintético en la rejilla de 0.25"""
+    rng = np.random.default_rng(semilla)
+    cierre = 15000 + np.cumsum(rng.integers(-400, 401, dias)) * 0.25
+    apertura = cierre + rng.integers(-200, 201, dias) * 0.25
+    return pd.DataFrame({
+        'Date': pd.bdate_range('2024-01-02', periods=dias),
+        'Open': apertura,
+        'High': np.maximum(apertura, cierre) + rng.integers(0, 300, dias) * 0.25,
+        'Low': np.minimum(apertura, cierre) - rng.integers(0, 300, dias) * 0.25,
+        'Close': cierre,
+        'Volume': rng.integers(1000, 5000, dias),
+    })
+
+
+def en_ambos_modos(modulo, monkeypatch, calcular):
+    """Resultado de calcular() en puntos y en ticks"""
+    monkeypatch.setattr(modulo, 'PRECIOS_EN_TICKS', False)
+    puntos = calcular()
+    monkeypatch.setattr(modulo, 'PRECIOS_EN_TICKS', True)
+    ticks = calcular()
+    return puntos, ticks
+
+
+def test_expected_move_excel_en_ticks(modulos, monkeypatch):
+    em = modulos('fase1_agregar_expected_move_excel')
+    df = datos_diarios()
+
+    def calcular():
+        entrada = df.copy()
+        if em.PRECIOS_EN_TICKS:
+            em.convertir_a_ticks(entrada)
+        return em.calcular_expected_move(entrada)
+
+    puntos, ticks = en_ambos_modos(em, monkeypatch, calcular)
+
+    assert (puntos['EMH'] > 0).sum() == len(df) - em.DEFAULT_LOOKBACK
+    pd.testing.assert_frame_equal(ticks, puntos, check_exact=True)
+
+
+def test_skew_en_ticks(modulos, monkeypatch):
+    em = modulos('fase1_agregar_expected_move_excel')
+    skew = modulos('fase1_calcular_niveles_skew')
+    df = em.calcular_expected_move(datos_diarios())
+    df = df[df['EMH'] > 0].reset_index(drop=True)
+
+    puntos, ticks = en_ambos_modos(skew, monkeypatch, lambda: skew.calcular_niveles_skew(df))
+
+    assert (puntos['Z2H'] * 4 == np.rint(puntos['Z2H'] * 4)).all()
+    pd.testing.assert_frame_equal(ticks, puntos, check_exact=True)
+
+
+def test_dn_en_ticks(modulos, monkeypatch):
+    dn = modulos('calcular_niveles_DN')
+    df = datos_diarios()
+    monkeypatch.setattr(dn, 'leer_hojas_excel', lambda ruta: {'2024': df.copy()})
+
+    def calcular():
+        niveles = dn.cargar_datos_diarios()
+        niveles = dn.calcular_niveles_DN(niveles, [3, 5])
+        if dn.PRECIOS_EN_TICKS:
+            dn.convertir_a_puntos(niveles, dn.columnas_en_precio([3, 5]))
+        return niveles
+
+    puntos, ticks = en_ambos_modos(dn, monkeypatch, calcular)
+
+    assert {'Z2H', 'Z2H_3D', 'Std5_neg_5D'} <= set(puntos.columns)
+    pd.testing.assert_frame_equal(ticks, puntos, check_exact=True)
@@ -0,0 +1,60 @@
+"""
+Pruebas de la serie continua por cruce de volumen (construir_serie_continua.py)
+
+El roll debe caer en una apertura de sesión CME, no a medianoche UTC.
+"""
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indice_sesiones import calcular_fechas_sesion
+
+
+@pytest.fixture
+def serie_continua(tmp_path, monkeypatch):
+    """Módulo importado desde una carpeta de trabajo temporal (logs en ../Logs)"""
+    (tmp_path / 'Logs').mkdir()
+    (tmp_path / 'Scripts').mkdir()
+    monkeypatch.chdir(tmp_path / 'Scripts')
+    return importlib.import_module('construir_serie_continua')
+
+
+def contratos_solapados():
+    """
+    Dos contratos con barras horarias en los mismos minutos
+
+    El entrante dispara su volumen desde la apertura de la sesión del
+    2024-03-13 (22:01 UTC del día 12, horario de verano): por días UTC el
+    día 12 ya lo gana el entrante, por sesiones lo gana el día 13.
+    """
+    timestamps = pd.date_range('2024-03-10 22:01', '2024-03-14 21:01', freq='h')
+    apertura = pd.Timestamp('2024-03-12 22:01')
+    saliente = pd.DataFrame({'DateTime': timestamps, 'Volume': 100, 'Symbol': 'NQ 03-24'})
+    entrante = pd.DataFrame({
+        'DateTime': timestamps,
+        'Volume': np.where(timestamps >= apertura, 5000, 10),
+        'Symbol': 'NQ 06-24',
+    })
+    df = pd.concat([saliente, entrante], ignore_index=True)
+    for columna in ['Open', 'High', 'Low', 'Close']:
+        df[columna] = 18000.0
+    return df
+
+
+def test_roll_en_apertura_de_sesion(serie_continua):
+    df = contratos_solapados()[serie_continua.COLUMNAS_SERIE]
+
+    serie, tabla = serie_continua.construir_serie_continua(df)
+
+    roll = tabla.iloc[1]
+    assert roll['Fecha_Roll'] == pd.Timestamp('2024-03-13')
+    assert roll['Inicio'] == pd.Timestamp('2024-03-12 22:01')
+    assert roll['Metodo'] == 'cruce_volumen'
+
+    # Ninguna sesión queda repartida entre dos contratos
+    sesiones = pd.Series(calcular_fechas_sesion(serie['DateTime']))
+    assert serie.groupby(sesiones.to_numpy())['Symbol'].nunique().max() == 1
+    assert serie['DateTime'].is_unique
@@ -0,0 +1,65 @@
+"""
+Pruebas del servidor de memoria compartida (servidor_datos_compartidos.py)
+"""
+
+import json
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import servidor_datos_compartidos as servidor
+from barras_memmap import escribir_barras_memmap
+
+
+def barras(minutos, base):
+    timestamps = pd.date_range('2024-01-02 00:01', periods=minutos, freq='min')
+    precios = base + 0.25 * np.arange(minutos)
+    return pd.DataFrame({
+        'DateTime': timestamps, 'Open': precios, 'High': precios + 1,
+        'Low': precios - 1, 'Close': precios, 'Volume': np.arange(1, minutos + 1),
+    })
+
+
+def test_recarga_fallida_sigue_sirviendo(tmp_path, monkeypatch):
+    ruta_memmap = tmp_path / 'memmap'
+    ruta = tmp_path / 'compartido'
+    archivo = ruta / 'NQ.json'
+    escribir_barras_memmap(barras(10, 17000.0), ruta=ruta_memmap)
+
+    # La primera recarga falla (p.ej. la generación se borra mientras se lee)
+    abrir_columnas = servidor.abrir_columnas
+    fallos = []
+
+    def abrir_con_fallo(carpeta, *args, **kwargs):
+        if carpeta.name == 'g000002' and not fallos:
+            fallos.append(carpeta)
+            raise FileNotFoundError(carpeta / 'cabecera.json')
+        return abrir_columnas(carpeta, *args, **kwargs)
+
+    vistos = []
+
+    def revision(intervalo):
+        if archivo.exists():
+            manejadores = json.loads(archivo.read_text())
+            vistos.append((manejadores['generacion'], manejadores['filas']))
+        if len(vistos) == 1:
+            escribir_barras_memmap(barras(20, 18000.0), ruta=ruta_memmap)
+        if len(vistos) == 3:
+            datos, bloques = servidor.conectar_datos_compartidos(ruta=ruta)
+            vistos.append(int(datos['Close'][0]))
+            del datos
+            servidor.desconectar(bloques)
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(servidor, 'abrir_columnas', abrir_con_fallo)
+    # Cliente y servidor en el mismo proceso: el registro del bloque es del servidor
+    monkeypatch.setattr(servidor, '_adjuntar', lambda nombre: shared_memory.SharedMemory(name=nombre))
+    monkeypatch.setattr(servidor.time, 'sleep', revision)
+
+    servidor.servir(ruta_memmap=ruta_memmap, ruta=ruta, intervalo=0)
+
+    assert len(fallos) == 1
+    # Tras el fallo se sigue publicando la generación 0; la siguiente revisión recarga
+    assert vistos == [(0, 10), (0, 10), (1, 20), 18000 * 4]
+    assert not archivo.exists()
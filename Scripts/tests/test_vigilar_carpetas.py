@@ -0,0 +1,138 @@
+"""
+Pruebas del servicio de vigilancia de carpetas (vigilar_carpetas.py)
+
+Una carpeta solo se ingiere cuando lleva ESPERA_ESTABILIDAD segundos sin
+cambios, y cada ingesta deja su resultado y su latencia en el archivo de
+estado. La ingesta de minutos usa la consolidación en streaming.
+"""
+
+import importlib
+import json
+
+import pandas as pd
+import pytest
+
+from almacen_barras import archivos_para_rango, cargar_barras
+from lector_minutos import leer_minutos
+
+
+@pytest.fixture
+def vigilancia(tmp_path, monkeypatch):
+    """Módulo importado desde una carpeta de trabajo temporal (logs en ../Logs)"""
+    (tmp_path / 'Logs').mkdir()
+    (tmp_path / 'Scripts').mkdir()
+    monkeypatch.chdir(tmp_path / 'Scripts')
+    return importlib.import_module('vigilar_carpetas')
+
+
+def escribir_bruto(archivo, inicio, minutos, base):
+    """Archivo NinjaTrader de `minutos` barras consecutivas desde `inicio`"""
+    lineas = []
+    for i, ts in enumerate(pd.date_range(inicio, periods=minutos, freq='min')):
+        precio = base + i * 0.25
+        lineas.append(f"{ts:%Y%m%d %H%M%S};{precio};{precio + 1};{precio - 1};{precio + 0.5};{10 + i}")
+    archivo.write_text('\n'.join(lineas) + '\n', encoding='utf-8')
+
+
+class Reloj:
+    """Sustituto del módulo time: cada sleep avanza el reloj y ejecuta un paso"""
+
+    def __init__(self, pasos):
+        self.ahora = 1000.0
+        self.pasos = list(pasos)
+
+    def time(self):
+        return self.ahora
+
+    def sleep(self, segundos):
+        self.ahora += segundos
+        if not self.pasos:
+            raise KeyboardInterrupt
+        self.pasos.pop(0)()
+
+
+def test_espera_estabilidad_y_estado(vigilancia, monkeypatch, tmp_path):
+    carpetas = {'minutos': tmp_path / 'Minutos', 'diarios': tmp_path / 'Diarios'}
+    for carpeta in carpetas.values():
+        carpeta.mkdir()
+    archivo = carpetas['minutos'] / 'NQ 03-24.Last.txt'
+
+    def crecer(lineas):
+        def paso():
+            with open(archivo, 'a', encoding='utf-8') as f:
+                f.write('20240102 000100;1;2;0;1;5\n' * lineas)
+        return paso
+
+    def nada():
+        pass
+
+    llamadas = []
+    reloj = Reloj([crecer(10), crecer(10), nada, nada, nada])
+
+    def ingesta(tipo):
+        def ingerir():
+            llamadas.append((tipo, reloj.ahora))
+            if tipo == 'diarios':
+                raise OSError('disco lleno')
+            return {'cambios': True, 'registros': 20}
+        return ingerir
+
+    monkeypatch.setattr(vigilancia, 'CARPETAS', carpetas)
+    monkeypatch.setattr(vigilancia, 'INGESTAS', {tipo: ingesta(tipo) for tipo in carpetas})
+    monkeypatch.setattr(vigilancia, 'time', reloj)
+
+    vigilancia.vigilar(intervalo=1.0, espera=2.0, usar_watchdog=False)
+
+    # Arranque (t=1000), cambios en t=1001 y t=1002: se ingiere en t=1004,
+    # no mientras el archivo sigue creciendo
+    assert llamadas == [('minutos', 1000.0), ('diarios', 1000.0), ('minutos', 1004.0)]
+
+    estado = json.loads((tmp_path / 'Procesados' / 'estado_ingesta.json').read_text(encoding='utf-8'))
+    assert estado['minutos']['estado'] == 'ok'
+    assert estado['minutos']['registros'] == 20
+    # Latencia desde el primer cambio detectado, no desde el último
+    assert estado['minutos']['latencia_segundos'] == 3.0
+    assert estado['diarios'] == {
+        'estado': 'error', 'error': 'disco lleno', 'fecha': estado['diarios']['fecha'],
+        'duracion_segundos': 0.0, 'latencia_segundos': 0.0,
+    }
+    assert not list((tmp_path / 'Procesados').glob('*.tmp'))
+
+
+def test_ingesta_de_minutos_en_streaming(vigilancia, monkeypatch, tmp_path):
+    modulo = vigilancia.consolidar_datos_minutos
+    raiz = tmp_path / 'datos'
+    (raiz / 'Minutos').mkdir(parents=True)
+    monkeypatch.setattr(modulo, 'DATOS_MINUTOS_PATH', raiz / 'Minutos')
+    monkeypatch.setattr(modulo, 'OUTPUT_PATH', raiz / 'Originales')
+    monkeypatch.setattr(modulo, 'PROCESSED_PATH', raiz / 'Procesados')
+    monkeypatch.setattr(modulo, 'MANIFIESTO_PATH', raiz / 'Originales' / 'manifiesto_minutos.json')
+
+    def en_memoria(*args, **kwargs):
+        raise AssertionError('la vigilancia no carga el consolidado en memoria')
+
+    monkeypatch.setattr(modulo, 'consolidar_incremental', en_memoria)
+    escribir_bruto(raiz / 'Minutos' / 'NQ 03-24.Last.txt', '2023-12-31 23:00', 120, 17000.0)
+
+    resultado = vigilancia.ingerir_minutos()
+
+    assert resultado == {
+        'cambios': True, 'registros': 120, 'registros_validos': 120,
+        'anios_republicados': [2023, 2024],
+    }
+    assert vigilancia.ingerir_minutos() == {'cambios': False}
+
+    anual = pd.read_csv(tmp_path / 'Procesados' / '2024' / 'NQ_1min_2024.csv')
+    assert len(anual) == 60
+    assert vigilancia.anios_en_almacen() == {2023, 2024}
+
+    # El almacén es una copia fiel del consolidado limpio del que se publica
+    limpio = leer_minutos(raiz / 'Procesados' / 'NQ_1min_2020-2025_Limpio.csv')
+    almacen = tmp_path / 'Procesados' / 'almacen'
+    pd.testing.assert_frame_equal(cargar_barras(ruta=almacen)[list(limpio.columns)], limpio)
+
+    # Un mes se lee sin abrir las particiones de otros meses
+    enero = cargar_barras('2024-01-01', '2024-02-01', columnas=['Close'], ruta=almacen)
+    pd.testing.assert_frame_equal(enero, limpio.loc[limpio['DateTime'] >= '2024-01-01', ['DateTime', 'Close']]
+                                  .reset_index(drop=True))
+    assert len(archivos_para_rango('2024-01-01', '2024-02-01', ruta=almacen)) == 1
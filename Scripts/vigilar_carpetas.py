@@ -0,0 +1,327 @@
+"""
+Servicio de Vigilancia de Carpetas de Datos Brutos (ingesta automática)
+Versión: 1.0
+Fecha: 2025-12-06
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Proceso de larga duración que vigila las carpetas Minutos y Diarios de
+    NinjaTrader y, cuando aparece o cambia un archivo exportado:
+
+    1. Espera a que el archivo deje de crecer (NinjaTrader escribe por partes)
+    2. Ejecuta la consolidación incremental por manifiesto (solo lee los
+       archivos nuevos/modificados)
+    3. Valida y exporta los consolidados (Originales/ y Procesados/); en
+       minutos con la fusión en streaming (memoria acotada, el consolidado
+       previo entra como primer flujo), como main() de
+       consolidar_datos_minutos.py
+    4. En minutos, republica en el almacén Parquet (almacen_barras.py) solo
+       los años que cubren los archivos que cambiaron
+    5. Escribe Procesados/estado_ingesta.json con latencia y registros
+
+    Detección de cambios:
+    - watchdog (inotify en Linux, ReadDirectoryChangesW en Windows) si el
+      paquete está instalado
+    - Sondeo de tamaño/mtime cada INTERVALO_SONDEO segundos en otro caso
+
+Uso:
+    python vigilar_carpetas.py      (Ctrl+C para detener)
+"""
+
+import json
+import logging
+import os
+import queue
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Configurar logging (antes de importar los consolidadores, que también
+# llaman a basicConfig: la primera configuración es la que se aplica)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('../Logs/vigilar_carpetas.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+import consolidar_datos_minutos
+import consolidar_datos_diarios
+from almacen_barras import anios_en_almacen
+from dividir_datos_minutos_por_anio import dividir_por_anios
+from lector_minutos import leer_minutos
+from manifiesto_datos import (
+    cargar_manifiesto, guardar_manifiesto, anios_modificados
+)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_DISPONIBLE = True
+except ImportError:
+    WATCHDOG_DISPONIBLE = False
+
+# Constantes
+ESTADO_PATH = Path("..") / "Procesados" / "estado_ingesta.json"
+
+CARPETAS = {
+    'minutos': consolidar_datos_minutos.DATOS_MINUTOS_PATH,
+    'diarios': consolidar_datos_diarios.DATOS_DIARIOS_PATH,
+}
+
+# Segundos entre comprobaciones (sondeo y espera de estabilidad)
+INTERVALO_SONDEO = 1.0
+# Segundos sin cambios en la carpeta antes de ingerir
+ESPERA_ESTABILIDAD = 2.0
+# Usar watchdog si está disponible (False = forzar sondeo)
+USAR_WATCHDOG = True
+
+def foto_carpeta(carpeta):
+    """
+    Tamaño y mtime de los .txt de una carpeta
+
+    Args:
+        carpeta: Ruta de la carpeta
+
+    Returns:
+        Diccionario {nombre: (tamaño, mtime)}
+    """
+    foto = {}
+    for archivo in carpeta.glob("*.txt"):
+        try:
+            stat = archivo.stat()
+        except FileNotFoundError:
+            continue
+        foto[archivo.name] = (stat.st_size, stat.st_mtime)
+    return foto
+
+if WATCHDOG_DISPONIBLE:
+    class ManejadorEventos(FileSystemEventHandler):
+        """Reenvía a una cola el tipo de carpeta de cada evento sobre un .txt"""
+
+        def __init__(self, tipo, cola):
+            self.tipo = tipo
+            self.cola = cola
+
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            rutas = [event.src_path, getattr(event, 'dest_path', '')]
+            if any(str(r).endswith('.txt') for r in rutas):
+                self.cola.put(self.tipo)
+
+def republicar_anios(ruta_limpio, anios):
+    """
+    Republica los años de minutos afectados
+
+    Además de los años que cambiaron se incluyen los que aún no están en
+    el almacén. El consolidado limpio se lee con tipos reducidos, como en
+    dividir_datos_minutos_por_anio.py (el binario memmap lleva siempre el
+    histórico completo).
+
+    Args:
+        ruta_limpio: CSV consolidado limpio de minutos
+        anios: Años afectados por los archivos que cambiaron
+
+    Returns:
+        Lista ordenada de años regenerados
+    """
+    df_limpio = leer_minutos(ruta_limpio)
+    anios_datos = set(df_limpio['DateTime'].dt.year.unique().tolist())
+    faltantes = anios_datos - anios_en_almacen()
+    anios = sorted((set(anios) & anios_datos) | faltantes)
+
+    if anios:
+        dividir_por_anios(df_limpio, anios=anios)
+    return anios
+
+def ingerir_minutos():
+    """
+    Consolidación incremental de minutos y republicación de años afectados
+
+    Returns:
+        Diccionario con el resultado de la ingesta
+    """
+    modulo = consolidar_datos_minutos
+    manifiesto_previo = cargar_manifiesto(modulo.MANIFIESTO_PATH)
+
+    # Consolidación, validación y exportación en una pasada con memoria acotada
+    stats, manifiesto = modulo.consolidar_incremental_streaming()
+    if stats is None:
+        return {'cambios': False}
+
+    # El manifiesto solo se guarda cuando las salidas ya están en su sitio
+    guardar_manifiesto(manifiesto, modulo.MANIFIESTO_PATH)
+
+    ruta_limpio = modulo.PROCESSED_PATH / f"{modulo.NOMBRE_CONSOLIDADO}_Limpio.csv"
+    anios = republicar_anios(ruta_limpio, anios_modificados(manifiesto_previo, manifiesto))
+
+    return {
+        'cambios': True,
+        'registros': int(stats['registros']),
+        'registros_validos': int(stats['validos']),
+        'anios_republicados': [int(a) for a in anios],
+    }
+
+def ingerir_diarios():
+    """
+    Consolidación incremental de datos diarios
+
+    Returns:
+        Diccionario con el resultado de la ingesta
+    """
+    modulo = consolidar_datos_diarios
+
+    df, manifiesto = modulo.consolidar_incremental()
+    if df is None:
+        return {'cambios': False}
+
+    df = modulo.validar_datos(df)
+    df_limpio = modulo.exportar_datos(df, modulo.NOMBRE_CONSOLIDADO)
+    guardar_manifiesto(manifiesto, modulo.MANIFIESTO_PATH)
+
+    return {
+        'cambios': True,
+        'registros': int(len(df)),
+        'registros_validos': int(len(df_limpio)),
+    }
+
+INGESTAS = {'minutos': ingerir_minutos, 'diarios': ingerir_diarios}
+
+def guardar_estado(estado, ruta=ESTADO_PATH):
+    """
+    Guarda el archivo de estado de forma atómica
+
+    Args:
+        estado: Diccionario de estado (una entrada por carpeta)
+        ruta: Ruta del archivo JSON
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta_tmp = ruta.with_suffix(ruta.suffix + '.tmp')
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(ruta_tmp, ruta)
+
+def ejecutar_ingesta(tipo, detectado_en, estado):
+    """
+    Ejecuta la ingesta de una carpeta y actualiza el estado
+
+    Args:
+        tipo: 'minutos' o 'diarios'
+        detectado_en: time.time() del primer cambio detectado
+        estado: Diccionario de estado (se modifica y se guarda)
+    """
+    logger.info("\n" + "="*80)
+    logger.info(f"INGESTA AUTOMÁTICA: {tipo.upper()}")
+    logger.info("="*80)
+
+    inicio = time.time()
+    try:
+        resultado = INGESTAS[tipo]()
+        resultado['estado'] = 'ok'
+    except Exception as e:
+        logger.error(f"❌ Error en la ingesta de {tipo}: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        resultado = {'estado': 'error', 'error': str(e)}
+    fin = time.time()
+
+    resultado.update({
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'duracion_segundos': round(fin - inicio, 3),
+        # Desde el primer cambio detectado hasta los archivos publicados
+        'latencia_segundos': round(fin - detectado_en, 3),
+    })
+    estado[tipo] = resultado
+    guardar_estado(estado)
+
+    if resultado['estado'] == 'ok':
+        logger.info(f"✅ Ingesta de {tipo} completada: latencia {resultado['latencia_segundos']:.1f} s")
+
+def vigilar(intervalo=INTERVALO_SONDEO, espera=ESPERA_ESTABILIDAD, usar_watchdog=USAR_WATCHDOG):
+    """
+    Bucle principal: detecta cambios e ingiere cada carpeta cuando se estabiliza
+
+    Args:
+        intervalo: Segundos entre comprobaciones
+        espera: Segundos sin cambios antes de ingerir
+        usar_watchdog: Usar eventos del sistema si watchdog está instalado
+    """
+    cola = queue.Queue()
+    observador = None
+
+    if usar_watchdog and WATCHDOG_DISPONIBLE:
+        observador = Observer()
+        for tipo, carpeta in CARPETAS.items():
+            observador.schedule(ManejadorEventos(tipo, cola), str(carpeta), recursive=False)
+        observador.start()
+        logger.info("👀 Detección por eventos del sistema (watchdog)")
+    else:
+        logger.info(f"👀 Detección por sondeo cada {intervalo:.1f} s"
+                    f"{'' if WATCHDOG_DISPONIBLE else ' (watchdog no instalado)'}")
+
+    fotos = {tipo: foto_carpeta(carpeta) for tipo, carpeta in CARPETAS.items()}
+    # tipo -> (primer cambio detectado, último cambio detectado)
+    pendientes = {}
+    estado = {}
+
+    # Arranque: ponerse al día con lo exportado mientras el servicio estaba parado
+    for tipo in CARPETAS:
+        ejecutar_ingesta(tipo, time.time(), estado)
+
+    try:
+        while True:
+            ahora = time.time()
+
+            if observador is not None:
+                try:
+                    while True:
+                        tipo = cola.get(timeout=intervalo)
+                        primero = pendientes.get(tipo, (ahora, ahora))[0]
+                        pendientes[tipo] = (primero, time.time())
+                except queue.Empty:
+                    pass
+            else:
+                time.sleep(intervalo)
+
+            # El sondeo también confirma la estabilidad con watchdog: un
+            # archivo que sigue creciendo cambia la foto aunque no lleguen eventos
+            ahora = time.time()
+            for tipo, carpeta in CARPETAS.items():
+                foto = foto_carpeta(carpeta)
+                if foto != fotos[tipo]:
+                    fotos[tipo] = foto
+                    primero = pendientes.get(tipo, (ahora, ahora))[0]
+                    pendientes[tipo] = (primero, ahora)
+
+            for tipo, (primero, ultimo) in list(pendientes.items()):
+                if ahora - ultimo >= espera:
+                    del pendientes[tipo]
+                    ejecutar_ingesta(tipo, primero, estado)
+
+    except KeyboardInterrupt:
+        logger.info("⏹️  Vigilancia detenida")
+    finally:
+        if observador is not None:
+            observador.stop()
+            observador.join()
+
+def main():
+    """
+    Función principal
+    """
+    logger.info("="*80)
+    logger.info("VIGILANCIA DE CARPETAS DE DATOS BRUTOS")
+    logger.info("="*80)
+    for tipo, carpeta in CARPETAS.items():
+        logger.info(f"📂 {tipo}: {carpeta}")
+
+    vigilar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Zone Maps por Chunk sobre las Barras Binarias
+Versión: 1.0
+Fecha: 2025-12-07
+Autor: Sistema Backtesting NASDAQ
+
+Descripción:
+    Divide el histórico de barras_memmap.py en chunks de FILAS_POR_CHUNK
+    filas y guarda, para cada uno, el mínimo y el máximo de DateTime, High,
+    Low y Volume (Procesados/memmap/NQ/zonas.csv, publicado con las barras).
+
+    Una consulta es una lista de condiciones (columna, operador, valor) que
+    se cumplen todas a la vez. Antes de leer un chunk se comprueba con sus
+    mínimos/máximos si alguna fila puede cumplir las condiciones; si no, el
+    chunk se salta sin tocar sus páginas. Solo los chunks candidatos se leen
+    y se filtran fila a fila.
+
+    Ejemplos:
+        # Minutos que cruzaron los 18.000 puntos
+        [('High', '>=', 18000), ('Low', '<=', 18000)]
+        # Minutos de 2022 con volumen superior a 5.000
+        [('DateTime', '>=', '2022-01-01'), ('DateTime', '<', '2023-01-01'),
+         ('Volume', '>', 5000)]
+
+    Los precios de las condiciones van en puntos; la comparación se hace en
+    ticks (precios_tick.py) contra las columnas binarias.
+
+Uso:
+    from barras_memmap import abrir_barras_memmap, cargar_zonas_memmap
+    from zonas_chunks import consultar_barras
+    df, estadisticas = consultar_barras(abrir_barras_memmap(), cargar_zonas_memmap(),
+                                        [('High', '>=', 18000), ('Low', '<=', 18000)])
+"""
+
+import logging
+import operator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from precios_tick import COLUMNAS_PRECIO, TICKS_POR_PUNTO, a_puntos
+
+logger = logging.getLogger(__name__)
+
+FILAS_POR_CHUNK = 16_384
+COLUMNAS_ZONA = ['DateTime', 'High', 'Low', 'Volume']
+ARCHIVO_ZONAS = 'zonas.csv'
+
+OPERADORES = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+}
+
+def construir_zonas(barras, filas_por_chunk=FILAS_POR_CHUNK):
+    """
+    Calcula mínimo y máximo por chunk de las columnas de zona
+
+    Args:
+        barras: Diccionario {columna: array/memmap} en el formato binario
+            (DateTime en ns, precios en ticks)
+        filas_por_chunk: Filas por chunk
+
+    Returns:
+        DataFrame con Inicio, Fin y <Columna>_Min / <Columna>_Max por chunk
+    """
+    filas = len(barras['DateTime'])
+    inicios = np.arange(0, filas, filas_por_chunk, dtype=np.int64)
+
+    zonas = pd.DataFrame({
+        'Inicio': inicios,
+        'Fin': np.minimum(inicios + filas_por_chunk, filas),
+    })
+    for columna in COLUMNAS_ZONA:
+        valores = np.asarray(barras[columna])
+        if len(inicios) == 0:
+            zonas[f'{columna}_Min'] = np.array([], dtype=valores.dtype)
+            zonas[f'{columna}_Max'] = np.array([], dtype=valores.dtype)
+            continue
+        zonas[f'{columna}_Min'] = np.minimum.reduceat(valores, inicios)
+        zonas[f'{columna}_Max'] = np.maximum.reduceat(valores, inicios)
+
+    return zonas
+
+def guardar_zonas(zonas, ruta):
+    """
+    Guarda los zone maps en CSV (valores en el formato binario: ns y ticks)
+
+    Args:
+        zonas: Resultado de construir_zonas()
+        ruta: Ruta del archivo de salida
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    zonas.to_csv(ruta, index=False)
+
+def cargar_zonas(ruta):
+    """
+    Carga zone maps guardados
+
+    Args:
+        ruta: Ruta del archivo de zonas
+
+    Returns:
+        DataFrame de zonas
+    """
+    return pd.read_csv(ruta)
+
+def _valor_binario(columna, valor):
+    """Lleva el valor de una condición a las unidades del formato binario"""
+    if columna == 'DateTime':
+        return pd.Timestamp(valor).value
+    if columna in COLUMNAS_PRECIO:
+        return valor * TICKS_POR_PUNTO
+    return valor
+
+def _chunks_candidatos(zonas, condiciones):
+    """
+    Máscara de chunks que pueden contener filas que cumplan las condiciones
+
+    Args:
+        zonas: DataFrame de zonas
+        condiciones: Lista de (columna, operador, valor en unidades binarias)
+
+    Returns:
+        Array booleano (True = hay que leer el chunk)
+    """
+    candidatos = np.ones(len(zonas), dtype=bool)
+
+    for columna, op, valor in condiciones:
+        if columna not in COLUMNAS_ZONA:
+            continue
+        minimo = zonas[f'{columna}_Min'].to_numpy()
+        maximo = zonas[f'{columna}_Max'].to_numpy()
+
+        if op in ('>=', '>'):
+            candidatos &= OPERADORES[op](maximo, valor)
+        elif op in ('<=', '<'):
+            candidatos &= OPERADORES[op](minimo, valor)
+        else:
+            candidatos &= (minimo <= valor) & (valor <= maximo)
+
+    return candidatos
+
+def consultar_barras(barras, zonas, condiciones):
+    """
+    Filas que cumplen todas las condiciones, saltando chunks con los zone maps
+
+    Args:
+        barras: Diccionario {columna: array/memmap} de abrir_barras_memmap()
+        zonas: Zone maps de esas mismas barras
+        condiciones: Lista de (columna, operador, valor); operadores
+            '>=', '>', '<=', '<', '=='; precios en puntos y fechas como texto
+            o Timestamp
+
+    Returns:
+        Tupla (DataFrame con las filas en puntos, diccionario de estadísticas
+        con chunks_total, chunks_leidos, chunks_saltados y filas_leidas)
+
+    Raises:
+        ValueError: si una condición usa un operador o columna desconocidos
+    """
+    binarias = []
+    for columna, op, valor in condiciones:
+        if op not in OPERADORES:
+            raise ValueError(f"Operador no soportado: {op} (opciones: {list(OPERADORES)})")
+        if columna not in barras:
+            raise ValueError(f"Columna desconocida: {columna}")
+        binarias.append((columna, op, _valor_binario(columna, valor)))
+
+    candidatos = _chunks_candidatos(zonas, binarias)
+    inicios = zonas['Inicio'].to_numpy()[candidatos]
+    fines = zonas['Fin'].to_numpy()[candidatos]
+
+    filas_seleccionadas = []
+    for inicio, fin in zip(inicios, fines):
+        mascara = np.ones(fin - inicio, dtype=bool)
+        for columna, op, valor in binarias:
+            mascara &= OPERADORES[op](barras[columna][inicio:fin], valor)
+        filas_seleccionadas.append(np.flatnonzero(mascara) + inicio)
+
+    filas = np.concatenate(filas_seleccionadas) if filas_seleccionadas else np.array([], dtype=np.int64)
+
+    datos = {}
+    for columna, valores in barras.items():
+        seleccion = np.asarray(valores[filas]) if len(filas) > 0 else np.array([], dtype=valores.dtype)
+        if columna == 'DateTime':
+            datos[columna] = seleccion.view('datetime64[ns]')
+        elif columna in COLUMNAS_PRECIO:
+            datos[columna] = a_puntos(seleccion)
+        else:
+            datos[columna] = seleccion.astype(np.int64)
+
+    estadisticas = {
+        'chunks_total': int(len(zonas)),
+        'chunks_leidos': int(candidatos.sum()),
+        'chunks_saltados': int(len(zonas) - candidatos.sum()),
+        'filas_leidas': int((fines - inicios).sum()),
+    }
+    logger.info(
+        f"📊 Consulta: {len(filas):,} filas | chunks leídos {estadisticas['chunks_leidos']} "
+        f"/ saltados {estadisticas['chunks_saltados']} de {estadisticas['chunks_total']}"
+    )
+
+    return pd.DataFrame(datos), estadisticas